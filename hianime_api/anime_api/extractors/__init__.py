@@ -1,3 +1,4 @@
+from .document_cache import document_cache
 from .anime_details_extractor import anime_details_extractor
 from .episodes_extractor import episodes_extractor
 from .homepage_extractor import homepage_extractor
@@ -5,6 +6,7 @@ from .search_extractor import search_extractor
 from .streaming_extractor import servers_extractor, streaming_extractor
 
 __all__ = [
+    'document_cache',
     'anime_details_extractor',
     'episodes_extractor',
     'homepage_extractor',
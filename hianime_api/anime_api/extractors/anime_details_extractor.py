@@ -2,9 +2,43 @@ from bs4 import BeautifulSoup
 import re
 from typing import Dict, Any, List
 
+from .document_cache import document_cache
+from .extraction_plan import ExtractionPlan, Field, attr, episode_counts, href_id, image, text
+
 class AnimeDetailsExtractor:
     """Extractor for anime details page"""
     
+    VERSION = 1
+    
+    # Film cards of the related anime sidebar
+    RELATED_CARD = ExtractionPlan(
+        'details.related',
+        title=Field('.film-name a', attr('title')),
+        id=Field('.film-name a', href_id),
+        poster=Field('.film-poster-img', image),
+        type=Field('.fd-infor .fdi-item', text),
+        sub=Field('.fd-infor .tick-sub', text),
+        dub=Field('.fd-infor .tick-dub', text),
+        eps=Field('.fd-infor .tick-eps', text)
+    )
+    
+    # Film cards of the most popular and recommended sidebars
+    SIDEBAR_CARD = ExtractionPlan(
+        'details.sidebar',
+        title=Field('.film-name a', attr('title')),
+        id=Field('.film-name a', href_id),
+        poster=Field('.film-poster-img', image),
+        sub=Field('.tick-sub', text),
+        dub=Field('.tick-dub', text),
+        eps=Field('.tick-eps', text)
+    )
+    
+    # Sidebar lists read with SIDEBAR_CARD, by response field
+    SIDEBARS = (
+        ('mostPopular', 'popular', '.block_area.block_area_sidebar.block_area-popular .anif-block-ul'),
+        ('recommended', 'recommended', '.block_area.block_area_sidebar.block_area-recommend .anif-block-ul')
+    )
+    
     def extract(self, html: str) -> Dict[str, Any]:
         """
         Extract anime details from HTML
@@ -15,7 +49,7 @@ class AnimeDetailsExtractor:
         Returns:
             Dict[str, Any]: Extracted anime details
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = document_cache.parse(html)
         
         response = {
             'title': None,
@@ -58,17 +92,20 @@ class AnimeDetailsExtractor:
         # Extract synopsis
         self._extract_synopsis(soup, response)
         
+        # Index the info panel once; the fields below all read from it
+        info = self._index_info_panel(soup)
+        
         # Extract aired dates
-        self._extract_aired_dates(soup, response)
+        self._extract_aired_dates(info, response)
         
         # Extract additional details
-        self._extract_additional_details(soup, response)
+        self._extract_additional_details(info, response)
         
         # Extract genres
-        self._extract_genres(soup, response)
+        self._extract_genres(info, response)
         
         # Extract studios and producers
-        self._extract_studios_producers(soup, response)
+        self._extract_studios_producers(info, response)
         
         # Extract more seasons
         self._extract_more_seasons(soup, response)
@@ -140,102 +177,77 @@ class AnimeDetailsExtractor:
         if synopsis_elem:
             response['synopsis'] = synopsis_elem.get_text(strip=True)
     
-    def _extract_aired_dates(self, soup: BeautifulSoup, response: Dict[str, Any]):
-        """Extract aired dates"""
-        # Find aired information by looking for the text "Aired:"
-        aired_items = soup.select('.anisc-detail .item-title')
-        for item in aired_items:
-            if item.get_text(strip=True) == "Aired:":
-                aired_elem = item.find_next_sibling('div', class_='item-list')
-                if aired_elem:
-                    aired_text = aired_elem.get_text(strip=True)
-                    # Parse from and to dates
-                    dates = aired_text.split('to')
-                    if len(dates) > 0:
-                        response['aired']['from'] = dates[0].strip()
-                    if len(dates) > 1:
-                        response['aired']['to'] = dates[1].strip()
-                break
+    def _index_info_panel(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        """
+        Map each label of the info panel to its value element in one pass
         
-        # Extract premiered
-        premiered_items = soup.select('.anisc-detail .item-title')
-        for item in premiered_items:
-            if item.get_text(strip=True) == "Premiered:":
-                premiered_elem = item.find_next_sibling('div', class_='item-list')
-                if premiered_elem:
-                    response['premiered'] = premiered_elem.get_text(strip=True)
-                break
+        Args:
+            soup (BeautifulSoup): Parsed details page
         
-        # Extract duration
-        duration_items = soup.select('.anisc-detail .item-title')
-        for item in duration_items:
-            if item.get_text(strip=True) == "Duration:":
-                duration_elem = item.find_next_sibling('div', class_='item-list')
-                if duration_elem:
-                    response['duration'] = duration_elem.get_text(strip=True)
-                break
+        Returns:
+            Dict[str, Any]: Value element (or None) by label, e.g. "Aired:"; the
+            first occurrence of a label wins
+        """
+        info = {}
+        for item in soup.select('.anisc-detail .item-title'):
+            label = item.get_text(strip=True)
+            if label not in info:
+                info[label] = item.find_next_sibling('div', class_='item-list')
+        return info
+    
+    def _info_text(self, info: Dict[str, Any], label: str):
+        """Get the text of an info panel value, or None if it isn't there"""
+        elem = info.get(label)
+        return elem.get_text(strip=True) if elem else None
+    
+    def _extract_aired_dates(self, info: Dict[str, Any], response: Dict[str, Any]):
+        """Extract aired dates"""
+        aired_text = self._info_text(info, "Aired:")
+        if aired_text is not None:
+            # Parse from and to dates
+            dates = aired_text.split('to')
+            if len(dates) > 0:
+                response['aired']['from'] = dates[0].strip()
+            if len(dates) > 1:
+                response['aired']['to'] = dates[1].strip()
         
-        # Extract status
-        status_items = soup.select('.anisc-detail .item-title')
-        for item in status_items:
-            if item.get_text(strip=True) == "Status:":
-                status_elem = item.find_next_sibling('div', class_='item-list')
-                if status_elem:
-                    response['status'] = status_elem.get_text(strip=True)
-                break
+        # Extract premiered, duration, status and MAL score
+        for label, field in (
+            ("Premiered:", 'premiered'),
+            ("Duration:", 'duration'),
+            ("Status:", 'status'),
+            ("MAL Score:", 'MAL_score')
+        ):
+            text = self._info_text(info, label)
+            if text is not None:
+                response[field] = text
         
-        # Extract MAL score
-        mal_score_items = soup.select('.anisc-detail .item-title')
-        for item in mal_score_items:
-            if item.get_text(strip=True) == "MAL Score:":
-                mal_score_elem = item.find_next_sibling('div', class_='item-list')
-                if mal_score_elem:
-                    response['MAL_score'] = mal_score_elem.get_text(strip=True)
-                break
-    
-    def _extract_additional_details(self, soup: BeautifulSoup, response: Dict[str, Any]):
+    def _extract_additional_details(self, info: Dict[str, Any], response: Dict[str, Any]):
         """Extract additional details like synonyms"""
-        synonyms_items = soup.select('.anisc-detail .item-title')
-        for item in synonyms_items:
-            if item.get_text(strip=True) == "Synonyms:":
-                synonyms_elem = item.find_next_sibling('div', class_='item-list')
-                if synonyms_elem:
-                    synonyms_text = synonyms_elem.get_text(strip=True)
-                    response['synonyms'] = [syn.strip() for syn in synonyms_text.split(',') if syn.strip()]
-                break
-    
-    def _extract_genres(self, soup: BeautifulSoup, response: Dict[str, Any]):
+        synonyms_text = self._info_text(info, "Synonyms:")
+        if synonyms_text is not None:
+            response['synonyms'] = [syn.strip() for syn in synonyms_text.split(',') if syn.strip()]
+        
+    def _extract_genres(self, info: Dict[str, Any], response: Dict[str, Any]):
         """Extract genres"""
-        genres_items = soup.select('.anisc-detail .item-title')
-        for item in genres_items:
-            if item.get_text(strip=True) == "Genres:":
-                genres_elem = item.find_next_sibling('div', class_='item-list')
-                if genres_elem:
-                    genre_links = genres_elem.select('a')
-                    response['genres'] = [genre.get_text(strip=True) for genre in genre_links]
-                break
-    
-    def _extract_studios_producers(self, soup: BeautifulSoup, response: Dict[str, Any]):
+        genres_elem = info.get("Genres:")
+        if genres_elem:
+            genre_links = genres_elem.select('a')
+            response['genres'] = [genre.get_text(strip=True) for genre in genre_links]
+        
+    def _extract_studios_producers(self, info: Dict[str, Any], response: Dict[str, Any]):
         """Extract studios and producers"""
         # Extract studios
-        studios_items = soup.select('.anisc-detail .item-title')
-        for item in studios_items:
-            if item.get_text(strip=True) == "Studios:":
-                studios_elem = item.find_next_sibling('div', class_='item-list')
-                if studios_elem:
-                    studio_links = studios_elem.select('a')
-                    response['studios'] = ', '.join([studio.get_text(strip=True) for studio in studio_links])
-                break
+        studios_elem = info.get("Studios:")
+        if studios_elem:
+            studio_links = studios_elem.select('a')
+            response['studios'] = ', '.join([studio.get_text(strip=True) for studio in studio_links])
         
         # Extract producers
-        producers_items = soup.select('.anisc-detail .item-title')
-        for item in producers_items:
-            if item.get_text(strip=True) == "Producers:":
-                producers_elem = item.find_next_sibling('div', class_='item-list')
-                if producers_elem:
-                    producer_links = producers_elem.select('a')
-                    response['producers'] = [producer.get_text(strip=True) for producer in producer_links]
-                break
+        producers_elem = info.get("Producers:")
+        if producers_elem:
+            producer_links = producers_elem.select('a')
+            response['producers'] = [producer.get_text(strip=True) for producer in producer_links]
     
     def _extract_more_seasons(self, soup: BeautifulSoup, response: Dict[str, Any]):
         """Extract more seasons"""
@@ -306,55 +318,15 @@ class AnimeDetailsExtractor:
             related_items = related_container.select('li')
             for related_item in related_items:
                 try:
+                    values = self.RELATED_CARD.run(related_item)
                     related_info = {
-                        'title': None,
-                        'id': None,
-                        'poster': None,
-                        'type': None,
-                        'episodes': {
-                            'sub': None,
-                            'dub': None,
-                            'eps': None
-                        }
+                        'title': values['title'],
+                        'id': values['id'],
+                        'poster': values['poster'],
+                        'type': values['type'],
+                        'episodes': episode_counts(values)
                     }
                     
-                    # Extract title and ID
-                    title_elem = related_item.select_one('.film-name a')
-                    if title_elem:
-                        related_info['title'] = title_elem.get('title')
-                        href = title_elem.get('href')
-                        if href:
-                            related_info['id'] = href.split('/')[-1]
-                    
-                    # Extract poster
-                    poster_elem = related_item.select_one('.film-poster-img')
-                    if poster_elem:
-                        related_info['poster'] = poster_elem.get('data-src') or poster_elem.get('src')
-                    
-                    # Extract type
-                    type_elem = related_item.select_one('.fd-infor .fdi-item')
-                    if type_elem:
-                        related_info['type'] = type_elem.get_text(strip=True)
-                    
-                    # Extract episodes
-                    sub_elem = related_item.select_one('.fd-infor .tick-sub')
-                    if sub_elem:
-                        related_info['episodes']['sub'] = self._parse_number(sub_elem.get_text(strip=True))
-                    
-                    dub_elem = related_item.select_one('.fd-infor .tick-dub')
-                    if dub_elem:
-                        related_info['episodes']['dub'] = self._parse_number(dub_elem.get_text(strip=True))
-                    
-                    eps_elem = related_item.select_one('.fd-infor .tick-eps')
-                    if eps_elem:
-                        eps_text = eps_elem.get_text(strip=True)
-                    elif sub_elem:
-                        eps_text = sub_elem.get_text(strip=True)
-                    else:
-                        eps_text = '0'
-                    
-                    related_info['episodes']['eps'] = self._parse_number(eps_text)
-                    
                     response['related'].append(related_info)
                     
                 except Exception as e:
@@ -363,114 +335,23 @@ class AnimeDetailsExtractor:
     
     def _extract_popular_recommended(self, soup: BeautifulSoup, response: Dict[str, Any]):
         """Extract most popular and recommended anime"""
-        # Most popular
-        popular_container = soup.select_one('.block_area.block_area_sidebar.block_area-popular .anif-block-ul')
-        if popular_container:
-            popular_items = popular_container.select('li')
-            for popular_item in popular_items:
-                try:
-                    popular_info = {
-                        'title': None,
-                        'id': None,
-                        'poster': None,
-                        'episodes': {
-                            'sub': None,
-                            'dub': None,
-                            'eps': None
-                        }
-                    }
-                    
-                    # Extract title and ID
-                    title_elem = popular_item.select_one('.film-name a')
-                    if title_elem:
-                        popular_info['title'] = title_elem.get('title')
-                        href = title_elem.get('href')
-                        if href:
-                            popular_info['id'] = href.split('/')[-1]
-                    
-                    # Extract poster
-                    poster_elem = popular_item.select_one('.film-poster-img')
-                    if poster_elem:
-                        popular_info['poster'] = poster_elem.get('data-src') or poster_elem.get('src')
-                    
-                    # Extract episodes
-                    sub_elem = popular_item.select_one('.tick-sub')
-                    if sub_elem:
-                        popular_info['episodes']['sub'] = self._parse_number(sub_elem.get_text(strip=True))
-                    
-                    dub_elem = popular_item.select_one('.tick-dub')
-                    if dub_elem:
-                        popular_info['episodes']['dub'] = self._parse_number(dub_elem.get_text(strip=True))
-                    
-                    eps_elem = popular_item.select_one('.tick-eps')
-                    if eps_elem:
-                        eps_text = eps_elem.get_text(strip=True)
-                    elif sub_elem:
-                        eps_text = sub_elem.get_text(strip=True)
-                    else:
-                        eps_text = '0'
-                    
-                    popular_info['episodes']['eps'] = self._parse_number(eps_text)
-                    
-                    response['mostPopular'].append(popular_info)
-                    
-                except Exception as e:
-                    print(f"Error extracting popular anime: {e}")
-                    continue
-        
-        # Recommended
-        recommended_container = soup.select_one('.block_area.block_area_sidebar.block_area-recommend .anif-block-ul')
-        if recommended_container:
-            recommended_items = recommended_container.select('li')
-            for recommended_item in recommended_items:
+        for field, label, selector in self.SIDEBARS:
+            container = soup.select_one(selector)
+            if not container:
+                continue
+            
+            for item in container.select('li'):
                 try:
-                    recommended_info = {
-                        'title': None,
-                        'id': None,
-                        'poster': None,
-                        'episodes': {
-                            'sub': None,
-                            'dub': None,
-                            'eps': None
-                        }
-                    }
-                    
-                    # Extract title and ID
-                    title_elem = recommended_item.select_one('.film-name a')
-                    if title_elem:
-                        recommended_info['title'] = title_elem.get('title')
-                        href = title_elem.get('href')
-                        if href:
-                            recommended_info['id'] = href.split('/')[-1]
-                    
-                    # Extract poster
-                    poster_elem = recommended_item.select_one('.film-poster-img')
-                    if poster_elem:
-                        recommended_info['poster'] = poster_elem.get('data-src') or poster_elem.get('src')
-                    
-                    # Extract episodes
-                    sub_elem = recommended_item.select_one('.tick-sub')
-                    if sub_elem:
-                        recommended_info['episodes']['sub'] = self._parse_number(sub_elem.get_text(strip=True))
-                    
-                    dub_elem = recommended_item.select_one('.tick-dub')
-                    if dub_elem:
-                        recommended_info['episodes']['dub'] = self._parse_number(dub_elem.get_text(strip=True))
-                    
-                    eps_elem = recommended_item.select_one('.tick-eps')
-                    if eps_elem:
-                        eps_text = eps_elem.get_text(strip=True)
-                    elif sub_elem:
-                        eps_text = sub_elem.get_text(strip=True)
-                    else:
-                        eps_text = '0'
-                    
-                    recommended_info['episodes']['eps'] = self._parse_number(eps_text)
-                    
-                    response['recommended'].append(recommended_info)
+                    values = self.SIDEBAR_CARD.run(item)
+                    response[field].append({
+                        'title': values['title'],
+                        'id': values['id'],
+                        'poster': values['poster'],
+                        'episodes': episode_counts(values)
+                    })
                     
                 except Exception as e:
-                    print(f"Error extracting recommended anime: {e}")
+                    print(f"Error extracting {label} anime: {e}")
                     continue
     
     def _parse_number(self, text: str) -> int:
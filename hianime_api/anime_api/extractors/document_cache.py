@@ -0,0 +1,241 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from bs4.builder._htmlparser import BeautifulSoupHTMLParser
+from bs4.builder._lxml import LXMLTreeBuilderForXML
+from collections import OrderedDict
+import codecs
+import logging
+import re
+import threading
+import time
+
+from ..services.config import config
+
+logger = logging.getLogger(__name__)
+
+# Parser used when the configured HTML_PARSER isn't installed
+FALLBACK_PARSER = 'html.parser'
+
+# Scripts, styles and comments, complete or still open at the end of the text
+RAW_TEXT_PATTERN = re.compile(
+    r'<!--.*?-->|<(script|style)\b.*?</\1\s*>|(?P<open><!--|<(?:script|style)\b)',
+    re.IGNORECASE | re.DOTALL
+)
+
+def subtrees(*class_names: str) -> SoupStrainer:
+    """
+    Build a SoupStrainer keeping only elements with any of the given classes,
+    along with everything inside them
+    
+    The strainer sees the raw class attribute before it is split into
+    classes, so the names are matched as whole words within it.
+    """
+    names = '|'.join(re.escape(name) for name in class_names)
+    return SoupStrainer(class_=re.compile(rf'(?:^|\s)(?:{names})(?:\s|$)'))
+
+class FeedParser:
+    """
+    Builds a document from a page while it is still downloading
+    
+    Chunks are handed to the parser's incremental interface (lxml's feed
+    parser, or html.parser's feed() method) as they arrive, so the
+    document is ready almost as soon as the last byte has been read. Both
+    produce the same tree as parsing the whole page at once, provided no
+    script, style or comment is split between two feeds (lxml misparses
+    those), so each one is held back until it is complete.
+    
+    The parsers are driven through bs4's tree builder internals, which is
+    why beautifulsoup4 is pinned in requirements.txt; the tests compare the
+    result with a one-shot parse of every saved page.
+    """
+    
+    def __init__(self, document_cache, encoding):
+        self._document_cache = document_cache
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        # Decoded text not fed yet because it may end inside a script, style or comment
+        self._pending = ''
+        self._failed = False
+        
+        self._soup = BeautifulSoup('', document_cache.parser)
+        self._soup.reset()
+        builder = self._soup.builder
+        builder.reset()
+        builder.initialize_soup(self._soup)
+        if isinstance(builder, LXMLTreeBuilderForXML):
+            self._parser = builder.parser_for(None)
+        else:
+            args, kwargs = builder.parser_args
+            self._parser = BeautifulSoupHTMLParser(*args, **kwargs)
+            self._parser.soup = self._soup
+    
+    def feed(self, chunk: bytes):
+        """Parse the next chunk of the page body"""
+        if self._failed:
+            return
+        text = self._pending + self._decoder.decode(chunk)
+        split = self._safe_split(text)
+        self._pending = text[split:]
+        try:
+            if split:
+                self._parser.feed(text[:split])
+        except Exception as e:
+            # The page is parsed from scratch by the extractor instead
+            logger.warning(f"Incremental parse failed, falling back to a full parse: {str(e)}")
+            self._failed = True
+    
+    def close(self, html: str):
+        """
+        Finish the document and hand it to the document cache
+        
+        Args:
+            html (str): The decoded page the chunks added up to
+        """
+        if self._failed:
+            return
+        try:
+            self._parser.feed(self._pending + self._decoder.decode(b'', final=True))
+            self._pending = ''
+            self._parser.close()
+        except Exception as e:
+            logger.warning(f"Incremental parse failed, falling back to a full parse: {str(e)}")
+            return
+        
+        self._soup.endData()
+        while self._soup.currentTag.name != self._soup.ROOT_TAG_NAME:
+            self._soup.popTag()
+        self._soup.builder.soup = None
+        
+        self._document_cache.add(html, self._soup)
+    
+    def _safe_split(self, text: str) -> int:
+        """Get the length of the start of text that can be fed without splitting a script, style or comment"""
+        for match in RAW_TEXT_PATTERN.finditer(text):
+            if match.group('open') is not None:
+                return match.start()
+        
+        # A tag that is still arriving may turn out to open one
+        opened = text.rfind('<')
+        if opened > text.rfind('>'):
+            return opened
+        return len(text)
+
+class DocumentCache:
+    """
+    Short-lived per-process LRU of parsed HTML documents
+    
+    The details, episodes, servers and streaming endpoints all extract from the
+    same upstream page, so a watch flow would otherwise parse one document
+    several times. Documents are keyed by the page content itself and shared
+    between extractors, which must treat them as read-only. Extractors that
+    only need a few subtrees of a page can have just those built; such
+    partial documents are cached separately from the full one.
+    """
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._documents = OrderedDict()
+        self._parsers = {}
+    
+    @property
+    def parser(self) -> str:
+        """
+        Name of the BeautifulSoup tree builder documents are parsed with
+        
+        Set by HTML_PARSER; falls back to html.parser when the configured
+        parser isn't installed.
+        """
+        name = self.config.html_parser
+        parser = self._parsers.get(name)
+        if parser is None:
+            parser = name
+            if builder_registry.lookup(name) is None:
+                logger.warning(f"HTML parser {name} is not available, using {FALLBACK_PARSER}")
+                parser = FALLBACK_PARSER
+            self._parsers[name] = parser
+        return parser
+    
+    def parse(self, html: str, parse_only: SoupStrainer = None) -> BeautifulSoup:
+        """
+        Parse HTML, reusing a recently parsed document for the same content
+        
+        Args:
+            html (str): HTML content
+            parse_only (SoupStrainer): Build only these parts of the document
+                (see subtrees()); the whole page is parsed when none of them
+                is in it
+        
+        Returns:
+            BeautifulSoup: Parsed document
+        """
+        # A full document serves partial requests as well
+        soup = self._get(html)
+        if soup is not None:
+            return soup
+        
+        if parse_only is not None:
+            soup = self._get((html, parse_only))
+            if soup is not None:
+                return soup
+            
+            soup = BeautifulSoup(html, self.parser, parse_only=parse_only)
+            if soup.find() is not None:
+                self._put((html, parse_only), soup)
+                return soup
+            logger.info("None of the subtrees to parse are in the page, parsing all of it")
+        
+        soup = BeautifulSoup(html, self.parser)
+        self.add(html, soup)
+        return soup
+    
+    def add(self, html: str, soup: BeautifulSoup):
+        """Store a document parsed elsewhere, e.g. while the page downloaded"""
+        self._put(html, soup)
+    
+    def _get(self, key):
+        """Get a cached document by its page (or page and strainer), if still fresh"""
+        if self.config.document_cache_size <= 0:
+            return None
+        
+        with self._lock:
+            entry = self._documents.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._documents.move_to_end(key)
+                return entry[0]
+        return None
+    
+    def _put(self, key, soup: BeautifulSoup):
+        max_size = self.config.document_cache_size
+        if max_size <= 0:
+            return
+        
+        with self._lock:
+            self._documents[key] = (soup, time.monotonic() + self.config.document_cache_ttl)
+            self._documents.move_to_end(key)
+            while len(self._documents) > max_size:
+                self._documents.popitem(last=False)
+        
+    def feed_parser(self, encoding: str):
+        """
+        Get a parser that builds a page's document while it downloads
+        
+        Passed to HTTPService as stream_parser; returns None, so the page is
+        read as usual, unless STREAM_PARSE is on and documents are cached.
+        
+        Args:
+            encoding (str): Character encoding of the response body
+        
+        Returns:
+            FeedParser: Parser to feed the body's chunks to, or None
+        """
+        if not self.config.stream_parse or self.config.document_cache_size <= 0:
+            return None
+        return FeedParser(self, encoding)
+    
+    def clear(self):
+        """Drop all cached documents"""
+        with self._lock:
+            self._documents.clear()
+
+# Global document cache instance
+document_cache = DocumentCache()
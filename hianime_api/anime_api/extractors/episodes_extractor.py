@@ -1,9 +1,15 @@
-from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 
+from .document_cache import document_cache, subtrees
+
 class EpisodesExtractor:
     """Extractor for anime episodes"""
     
+    VERSION = 1
+    
+    # Only the episode list containers are built
+    PARSE_ONLY = subtrees('detail-infor-content', 'episodes-range')
+    
     def extract(self, html: str) -> List[Dict[str, Any]]:
         """
         Extract episodes list from HTML
@@ -14,7 +20,7 @@ class EpisodesExtractor:
         Returns:
             List[Dict[str, Any]]: List of episodes
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = document_cache.parse(html, self.PARSE_ONLY)
         episodes = []
         
         # Find episodes container
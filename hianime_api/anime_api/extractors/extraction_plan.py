@@ -0,0 +1,268 @@
+from bs4 import Tag
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+# Parts of a selector the plans support: a tag name and/or classes, e.g. a.film-name
+COMPOUND_PATTERN = re.compile(r'([a-z][a-z0-9-]*)?((?:\.[\w-]+)*)', re.IGNORECASE)
+
+# Seconds spent per (plan, field) while profiled() is active
+_profile = ContextVar('extraction_plan_profile', default=None)
+
+def text(elem: Tag) -> str:
+    """Read an element's stripped text"""
+    return elem.get_text(strip=True)
+
+def attr(name: str) -> Callable[[Tag], Any]:
+    """Read an attribute of the element"""
+    def read(elem: Tag):
+        return elem.get(name)
+    return read
+
+def image(elem: Tag):
+    """Read an image's lazy-loaded source, or its src"""
+    return elem.get('data-src') or elem.get('src')
+
+def href_id(elem: Tag):
+    """Read the ID an anime link points to, the last part of its href"""
+    href = elem.get('href')
+    return href.split('/')[-1] if href else None
+
+def exists(elem: Tag) -> bool:
+    """Read whether the element is there at all"""
+    return True
+
+def parse_number(text: str) -> int:
+    """Parse number from text, return 0 if parsing fails"""
+    clean_text = re.sub(r'[^\d]', '', text)
+    return int(clean_text) if clean_text else 0
+
+def episode_counts(values: Dict[str, Any], scope: str = None) -> Dict[str, Any]:
+    """
+    Build a film card's episode counts from its sub, dub and eps texts
+    
+    Cards without an eps count fall back to the sub count, or 0.
+    
+    Args:
+        values (Dict[str, Any]): Values read by a plan with sub, dub and eps fields
+        scope (str): Field the counts are nested in; all counts are None
+            when it is missing
+    """
+    if scope is not None and values[scope] is None:
+        return {'sub': None, 'dub': None, 'eps': None}
+    
+    sub, dub, eps = values['sub'], values['dub'], values['eps']
+    if eps is None:
+        eps = sub if sub is not None else '0'
+    return {
+        'sub': parse_number(sub) if sub is not None else None,
+        'dub': parse_number(dub) if dub is not None else None,
+        'eps': parse_number(eps)
+    }
+
+@contextmanager
+def profiled():
+    """
+    Time every plan run in the enclosed block, per field
+    
+    Yields:
+        Counter: Seconds by (plan name, field name); the tree walk that finds
+        the elements is counted as the '(walk)' field
+    """
+    timings = Counter()
+    token = _profile.set(timings)
+    try:
+        yield timings
+    finally:
+        _profile.reset(token)
+
+class _Selector:
+    """A descendant selector such as '.film-detail .film-name a', compiled"""
+    
+    def __init__(self, selector: str):
+        self.compounds = []
+        for part in selector.split():
+            match = COMPOUND_PATTERN.fullmatch(part)
+            if not match:
+                raise ValueError(f"Unsupported selector for an extraction plan: {selector!r}")
+            name = match.group(1).lower() if match.group(1) else None
+            classes = tuple(match.group(2).split('.')[1:])
+            self.compounds.append((name, classes))
+        if not self.compounds:
+            raise ValueError('Empty selector for an extraction plan')
+    
+    @property
+    def key(self):
+        """The tag name or class that candidate elements must have"""
+        name, classes = self.compounds[-1]
+        return ('class', classes[0]) if classes else ('name', name)
+    
+    def matches(self, tag: Tag) -> bool:
+        """Check the element and, like CSS does, any of its ancestors"""
+        if not self._matches_compound(tag, self.compounds[-1]):
+            return False
+        
+        ancestor = tag.parent
+        for compound in reversed(self.compounds[:-1]):
+            while ancestor is not None and not self._matches_compound(ancestor, compound):
+                ancestor = ancestor.parent
+            if ancestor is None:
+                return False
+            ancestor = ancestor.parent
+        return True
+    
+    def _matches_compound(self, tag: Tag, compound) -> bool:
+        name, classes = compound
+        if name is not None and tag.name != name:
+            return False
+        if classes:
+            tag_classes = tag.get('class') or ()
+            return all(cls in tag_classes for cls in classes)
+        return True
+
+class Field:
+    """
+    One value of an extraction plan
+    
+    Args:
+        selector (str): Descendant selector of the element to read, made of
+            tag names and classes only
+        read (Callable): Reads the value from the element; the value is None
+            when no element matches
+        within (str): Name of another field whose element this one is looked
+            up in, like calling select_one() on that element
+        index (int): Read the index-th matching element instead of the first
+    """
+    
+    def __init__(self, selector: str, read: Callable[[Tag], Any] = text, within: str = None, index: int = 0):
+        self.selector = selector
+        self.read = read
+        self.within = within
+        self.index = index
+
+class _Lookup:
+    """An element a plan looks for, shared by the fields that read from it"""
+    
+    def __init__(self, slot, selector, within, index):
+        self.slot = slot
+        self.selector = selector
+        self.within = within
+        self.index = index
+
+class ExtractionPlan:
+    """
+    A field -> selector schema for a repeated block such as a film card
+    
+    Each field's selector would otherwise be a separate select_one() call
+    walking the block again. The plan is compiled once, when the extractor
+    declaring it is imported, and run() finds every field's element in a
+    single walk over the block, stopping as soon as all are found. Fields
+    reading the same element share one lookup. Results are the same as
+    calling select_one() (or select()[index]) per field on the block.
+    """
+    
+    def __init__(self, name: str, **fields: Field):
+        self.name = name
+        self.fields = fields
+        self._lookups = []
+        self._slots = {}
+        # Lookups by the tag name or class their element must have
+        self._by_name = {}
+        self._by_class = {}
+        
+        for field_name, field in fields.items():
+            if field.within is not None and field.within not in fields:
+                raise ValueError(f"Field {field_name} of plan {name} is within unknown field {field.within}")
+        self._field_slots = {field_name: self._slot(field) for field_name, field in fields.items()}
+    
+    def _slot(self, field: Field) -> int:
+        """Get the lookup of a field's element, compiling it on first use"""
+        within = self._slot(self.fields[field.within]) if field.within is not None else None
+        key = (field.selector, within, field.index)
+        if key not in self._slots:
+            selector = _Selector(field.selector)
+            lookup = _Lookup(len(self._lookups), selector, within, field.index)
+            self._slots[key] = lookup.slot
+            self._lookups.append(lookup)
+            kind, value = selector.key
+            candidates = self._by_class if kind == 'class' else self._by_name
+            candidates.setdefault(value, []).append(lookup)
+        return self._slots[key]
+    
+    def find(self, container: Tag) -> List[Tag]:
+        """
+        Find the element of every lookup in one walk over the container
+        
+        Returns:
+            List[Tag]: Element (or None) by lookup slot
+        """
+        found = [None] * len(self._lookups)
+        skipped = [0] * len(self._lookups)
+        pending = len(self._lookups)
+        
+        for tag in container.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            
+            candidates = self._by_name.get(tag.name)
+            classes = tag.get('class')
+            if classes:
+                for cls in classes:
+                    if cls in self._by_class:
+                        candidates = (candidates or []) + self._by_class[cls]
+            if not candidates:
+                continue
+            
+            for lookup in candidates:
+                if found[lookup.slot] is not None or not lookup.selector.matches(tag):
+                    continue
+                if lookup.within is not None and not self._is_within(tag, found[lookup.within]):
+                    continue
+                if skipped[lookup.slot] < lookup.index:
+                    skipped[lookup.slot] += 1
+                    continue
+                
+                found[lookup.slot] = tag
+                pending -= 1
+                if not pending:
+                    return found
+        return found
+    
+    def run(self, container: Tag) -> Dict[str, Any]:
+        """
+        Read every field from a block
+        
+        Args:
+            container (Tag): The block, e.g. one film card
+        
+        Returns:
+            Dict[str, Any]: Value by field name, None for missing elements
+        """
+        timings = _profile.get()
+        started = time.perf_counter() if timings is not None else None
+        found = self.find(container)
+        if timings is not None:
+            timings[(self.name, '(walk)')] += time.perf_counter() - started
+        
+        values = {}
+        for name, field in self.fields.items():
+            if timings is not None:
+                started = time.perf_counter()
+            elem = found[self._field_slots[name]]
+            values[name] = field.read(elem) if elem is not None else None
+            if timings is not None:
+                timings[(self.name, name)] += time.perf_counter() - started
+        return values
+    
+    def _is_within(self, tag: Tag, scope: Tag) -> bool:
+        if scope is None:
+            return False
+        parent = tag.parent
+        while parent is not None:
+            if parent is scope:
+                return True
+            parent = parent.parent
+        return False
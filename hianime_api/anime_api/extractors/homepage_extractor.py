@@ -2,9 +2,52 @@ from bs4 import BeautifulSoup
 import re
 from typing import Dict, List, Any
 
+from .document_cache import document_cache
+from .extraction_plan import ExtractionPlan, Field, attr, episode_counts, exists, href_id, image, text
+
 class HomepageExtractor:
     """Extractor for homepage data"""
     
+    VERSION = 1
+    
+    # Film cards of the featured blocks (top airing, most popular, ...)
+    FEATURED_CARD = ExtractionPlan(
+        'homepage.featured',
+        title=Field('.film-detail .film-name a', attr('title')),
+        alternativeTitle=Field('.film-detail .film-name a', attr('data-jname')),
+        id=Field('.film-detail .film-name a', href_id),
+        poster=Field('.film-poster .film-poster-img', image),
+        type=Field('.fd-infor .fdi-item', text),
+        sub=Field('.fd-infor .tick-sub', text),
+        dub=Field('.fd-infor .tick-dub', text),
+        eps=Field('.fd-infor .tick-eps', text)
+    )
+    
+    # Film cards of the home sections (latest episode, new added, ...)
+    HOME_CARD = ExtractionPlan(
+        'homepage.home',
+        title=Field('.film-detail .film-name .dynamic-name', attr('title')),
+        alternativeTitle=Field('.film-detail .film-name .dynamic-name', attr('data-jname')),
+        id=Field('.film-detail .film-name .dynamic-name', href_id),
+        poster=Field('.film-poster img', image),
+        ticks=Field('.film-poster .tick', exists),
+        sub=Field('.tick-sub', text, within='ticks'),
+        dub=Field('.tick-dub', text, within='ticks'),
+        eps=Field('.tick-eps', text, within='ticks')
+    )
+    
+    # Entries of the top 10 lists
+    TOP10_CARD = ExtractionPlan(
+        'homepage.top10',
+        title=Field('.film-name a', text),
+        alternativeTitle=Field('.film-name a', attr('data-jname')),
+        id=Field('.film-name a', href_id),
+        poster=Field('.film-poster img', image),
+        sub=Field('.tick-item.tick-sub', text),
+        dub=Field('.tick-item.tick-dub', text),
+        eps=Field('.tick-item.tick-eps', text)
+    )
+    
     def extract(self, html: str) -> Dict[str, Any]:
         """
         Extract homepage data from HTML
@@ -15,7 +58,7 @@ class HomepageExtractor:
         Returns:
             Dict[str, Any]: Extracted homepage data
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = document_cache.parse(html)
         
         response = {
             'spotlight': [],
@@ -221,57 +264,16 @@ class HomepageExtractor:
                 
                 for item in items:
                     try:
+                        values = self.FEATURED_CARD.run(item)
                         anime_item = {
-                            'title': None,
-                            'alternativeTitle': None,
-                            'id': None,
-                            'poster': None,
-                            'type': None,
-                            'episodes': {
-                                'sub': None,
-                                'dub': None,
-                                'eps': None
-                            }
+                            'title': values['title'],
+                            'alternativeTitle': values['alternativeTitle'],
+                            'id': values['id'],
+                            'poster': values['poster'],
+                            'type': values['type'],
+                            'episodes': episode_counts(values)
                         }
                         
-                        # Extract title and ID
-                        title_elem = item.select_one('.film-detail .film-name a')
-                        if title_elem:
-                            anime_item['title'] = title_elem.get('title')
-                            anime_item['alternativeTitle'] = title_elem.get('data-jname')
-                            href = title_elem.get('href')
-                            if href:
-                                anime_item['id'] = href.split('/')[-1]
-                        
-                        # Extract poster
-                        poster_elem = item.select_one('.film-poster .film-poster-img')
-                        if poster_elem:
-                            anime_item['poster'] = poster_elem.get('data-src') or poster_elem.get('src')
-                        
-                        # Extract type
-                        type_elem = item.select_one('.fd-infor .fdi-item')
-                        if type_elem:
-                            anime_item['type'] = type_elem.get_text(strip=True)
-                        
-                        # Extract episodes
-                        sub_elem = item.select_one('.fd-infor .tick-sub')
-                        if sub_elem:
-                            anime_item['episodes']['sub'] = self._parse_number(sub_elem.get_text(strip=True))
-                        
-                        dub_elem = item.select_one('.fd-infor .tick-dub')
-                        if dub_elem:
-                            anime_item['episodes']['dub'] = self._parse_number(dub_elem.get_text(strip=True))
-                        
-                        eps_elem = item.select_one('.fd-infor .tick-eps')
-                        if eps_elem:
-                            eps_text = eps_elem.get_text(strip=True)
-                        elif sub_elem:
-                            eps_text = sub_elem.get_text(strip=True)
-                        else:
-                            eps_text = '0'
-                        
-                        anime_item['episodes']['eps'] = self._parse_number(eps_text)
-                        
                         section_data.append(anime_item)
                         
                     except Exception as e:
@@ -314,53 +316,15 @@ class HomepageExtractor:
                 
                 for item in items:
                     try:
+                        values = self.HOME_CARD.run(item)
                         anime_item = {
-                            'title': None,
-                            'alternativeTitle': None,
-                            'id': None,
-                            'poster': None,
-                            'episodes': {
-                                'sub': None,
-                                'dub': None,
-                                'eps': None
-                            }
+                            'title': values['title'],
+                            'alternativeTitle': values['alternativeTitle'],
+                            'id': values['id'],
+                            'poster': values['poster'],
+                            'episodes': episode_counts(values, scope='ticks')
                         }
                         
-                        # Extract title and ID
-                        title_elem = item.select_one('.film-detail .film-name .dynamic-name')
-                        if title_elem:
-                            anime_item['title'] = title_elem.get('title')
-                            anime_item['alternativeTitle'] = title_elem.get('data-jname')
-                            href = title_elem.get('href')
-                            if href:
-                                anime_item['id'] = href.split('/')[-1]
-                        
-                        # Extract poster
-                        poster_elem = item.select_one('.film-poster img')
-                        if poster_elem:
-                            anime_item['poster'] = poster_elem.get('data-src') or poster_elem.get('src')
-                        
-                        # Extract episodes
-                        episodes_elem = item.select_one('.film-poster .tick')
-                        if episodes_elem:
-                            sub_elem = episodes_elem.select_one('.tick-sub')
-                            if sub_elem:
-                                anime_item['episodes']['sub'] = self._parse_number(sub_elem.get_text(strip=True))
-                            
-                            dub_elem = episodes_elem.select_one('.tick-dub')
-                            if dub_elem:
-                                anime_item['episodes']['dub'] = self._parse_number(dub_elem.get_text(strip=True))
-                            
-                            eps_elem = episodes_elem.select_one('.tick-eps')
-                            if eps_elem:
-                                eps_text = eps_elem.get_text(strip=True)
-                            elif sub_elem:
-                                eps_text = sub_elem.get_text(strip=True)
-                            else:
-                                eps_text = '0'
-                            
-                            anime_item['episodes']['eps'] = self._parse_number(eps_text)
-                        
                         section_data.append(anime_item)
                         
                     except Exception as e:
@@ -397,52 +361,16 @@ class HomepageExtractor:
                 
                 for i, item in enumerate(items):
                     try:
+                        values = self.TOP10_CARD.run(item)
                         top_item = {
-                            'title': None,
+                            'title': values['title'],
                             'rank': i + 1,
-                            'alternativeTitle': None,
-                            'id': None,
-                            'poster': None,
-                            'episodes': {
-                                'sub': None,
-                                'dub': None,
-                                'eps': None
-                            }
+                            'alternativeTitle': values['alternativeTitle'],
+                            'id': values['id'],
+                            'poster': values['poster'],
+                            'episodes': episode_counts(values)
                         }
                         
-                        # Extract title and alternative title
-                        title_elem = item.select_one('.film-name a')
-                        if title_elem:
-                            top_item['title'] = title_elem.get_text(strip=True)
-                            top_item['alternativeTitle'] = title_elem.get('data-jname')
-                            href = title_elem.get('href')
-                            if href:
-                                top_item['id'] = href.split('/')[-1]
-                        
-                        # Extract poster
-                        poster_elem = item.select_one('.film-poster img')
-                        if poster_elem:
-                            top_item['poster'] = poster_elem.get('data-src') or poster_elem.get('src')
-                        
-                        # Extract episodes
-                        sub_elem = item.select_one('.tick-item.tick-sub')
-                        if sub_elem:
-                            top_item['episodes']['sub'] = self._parse_number(sub_elem.get_text(strip=True))
-                        
-                        dub_elem = item.select_one('.tick-item.tick-dub')
-                        if dub_elem:
-                            top_item['episodes']['dub'] = self._parse_number(dub_elem.get_text(strip=True))
-                        
-                        eps_elem = item.select_one('.tick-item.tick-eps')
-                        if eps_elem:
-                            eps_text = eps_elem.get_text(strip=True)
-                        elif sub_elem:
-                            eps_text = sub_elem.get_text(strip=True)
-                        else:
-                            eps_text = '0'
-                        
-                        top_item['episodes']['eps'] = self._parse_number(eps_text)
-                        
                         period_data.append(top_item)
                         
                     except Exception as e:
@@ -2,9 +2,32 @@ from bs4 import BeautifulSoup
 import re
 from typing import List, Dict, Any
 
+from .document_cache import document_cache, subtrees
+from .extraction_plan import ExtractionPlan, Field, attr, episode_counts, exists, href_id, image, text
+
 class SearchExtractor:
     """Extractor for search results"""
     
+    VERSION = 1
+    
+    # Suggestions only need their container built
+    SUGGESTIONS_PARSE_ONLY = subtrees('film-search-result', 'search-suggestions')
+    
+    # Film cards of the result list
+    RESULT_CARD = ExtractionPlan(
+        'search.results',
+        title=Field('.film-detail .film-name a', attr('title')),
+        alternativeTitle=Field('.film-detail .film-name a', attr('data-jname')),
+        id=Field('.film-detail .film-name a', href_id),
+        poster=Field('.film-poster img', image),
+        type=Field('.fd-infor .fdi-item', text),
+        duration=Field('.fd-infor .fdi-item', text, index=1),
+        ticks=Field('.film-poster .tick', exists),
+        sub=Field('.tick-sub', text, within='ticks'),
+        dub=Field('.tick-dub', text, within='ticks'),
+        eps=Field('.tick-eps', text, within='ticks')
+    )
+    
     def extract_search_results(self, html: str) -> Dict[str, Any]:
         """
         Extract search results from HTML
@@ -15,7 +38,7 @@ class SearchExtractor:
         Returns:
             Dict[str, Any]: Search results with pagination info
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = document_cache.parse(html)
         
         response = {
             'pageInfo': {
@@ -44,7 +67,7 @@ class SearchExtractor:
         Returns:
             List[Dict[str, Any]]: List of suggestions
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = document_cache.parse(html, self.SUGGESTIONS_PARSE_ONLY)
         suggestions = []
         
         # Find suggestions container
@@ -141,62 +164,17 @@ class SearchExtractor:
             result_items = results_container.select('.flw-item')
             for result_item in result_items:
                 try:
+                    values = self.RESULT_CARD.run(result_item)
                     result_info = {
-                        'title': None,
-                        'alternativeTitle': None,
-                        'id': None,
-                        'poster': None,
-                        'type': None,
-                        'duration': None,
-                        'episodes': {
-                            'sub': None,
-                            'dub': None,
-                            'eps': None
-                        }
+                        'title': values['title'],
+                        'alternativeTitle': values['alternativeTitle'],
+                        'id': values['id'],
+                        'poster': values['poster'],
+                        'type': values['type'],
+                        'duration': values['duration'],
+                        'episodes': episode_counts(values, scope='ticks')
                     }
                     
-                    # Extract title and alternative title
-                    title_elem = result_item.select_one('.film-detail .film-name a')
-                    if title_elem:
-                        result_info['title'] = title_elem.get('title')
-                        result_info['alternativeTitle'] = title_elem.get('data-jname')
-                        href = title_elem.get('href')
-                        if href:
-                            result_info['id'] = href.split('/')[-1]
-                    
-                    # Extract poster
-                    poster_elem = result_item.select_one('.film-poster img')
-                    if poster_elem:
-                        result_info['poster'] = poster_elem.get('data-src') or poster_elem.get('src')
-                    
-                    # Extract type and duration
-                    info_elems = result_item.select('.fd-infor .fdi-item')
-                    if len(info_elems) > 0:
-                        result_info['type'] = info_elems[0].get_text(strip=True)
-                    if len(info_elems) > 1:
-                        result_info['duration'] = info_elems[1].get_text(strip=True)
-                    
-                    # Extract episodes
-                    episodes_elem = result_item.select_one('.film-poster .tick')
-                    if episodes_elem:
-                        sub_elem = episodes_elem.select_one('.tick-sub')
-                        if sub_elem:
-                            result_info['episodes']['sub'] = self._parse_number(sub_elem.get_text(strip=True))
-                        
-                        dub_elem = episodes_elem.select_one('.tick-dub')
-                        if dub_elem:
-                            result_info['episodes']['dub'] = self._parse_number(dub_elem.get_text(strip=True))
-                        
-                        eps_elem = episodes_elem.select_one('.tick-eps')
-                        if eps_elem:
-                            eps_text = eps_elem.get_text(strip=True)
-                        elif sub_elem:
-                            eps_text = sub_elem.get_text(strip=True)
-                        else:
-                            eps_text = '0'
-                        
-                        result_info['episodes']['eps'] = self._parse_number(eps_text)
-                    
                     response['response'].append(result_info)
                     
                 except Exception as e:
@@ -1,11 +1,23 @@
-from bs4 import BeautifulSoup
+from html import unescape
 import re
 import json
 from typing import Dict, Any, List
 
+from ..services.read_limit import ReadLimit, page_read
+from .document_cache import document_cache, subtrees
+
 class ServersExtractor:
     """Extractor for episode servers"""
     
+    VERSION = 1
+    
+    # Stop once the episode title and both server blocks have been read to
+    # their closing tags; pages missing any of them are read in full
+    READ_LIMIT = ReadLimit('server-blocks', until=page_read(classes=('anime-detail', 'server-sub', 'server-dub')))
+    
+    # Only the episode title and the server blocks are built
+    PARSE_ONLY = subtrees('anime-detail', 'server-sub', 'server-dub')
+    
     def extract(self, html: str) -> Dict[str, Any]:
         """
         Extract server information from HTML
@@ -16,7 +28,7 @@ class ServersExtractor:
         Returns:
             Dict[str, Any]: Server information
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = document_cache.parse(html, self.PARSE_ONLY)
         
         response = {
             'episode': None,
@@ -93,10 +105,34 @@ class ServersExtractor:
 class StreamingExtractor:
     """Extractor for streaming links"""
     
+    VERSION = 1
+    
+    # Stop once both the script holding the sources and the first iframe have
+    # arrived, in either order; pages missing either are read in full so the
+    # <video> and <iframe> fallbacks still work
+    READ_LIMIT = ReadLimit(
+        'sources-iframe',
+        until=page_read(tags=('iframe',), script=re.compile(rb'var\s+(?:streaming|sources)\s*='))
+    )
+    
+    # Fast path patterns, run over the raw page instead of each script
+    DATA_START_PATTERN = re.compile(r'var\s+(streaming|sources)\s*=')
+    DATA_PATTERNS = {
+        'streaming': re.compile(r'var\s+streaming\s*=\s*({.*?});', re.DOTALL),
+        'sources': re.compile(r'var\s+sources\s*=\s*(\[.*?\]);', re.DOTALL)
+    }
+    # The first iframe outside scripts and comments, like the DOM would find it
+    IFRAME_PATTERN = re.compile(r'<script\b.*?</script\s*>|<!--.*?-->|<iframe\b(?P<attrs>[^>]*)>', re.IGNORECASE | re.DOTALL)
+    SRC_PATTERN = re.compile(r'''(?:^|\s)src\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.IGNORECASE)
+    
     def extract(self, html: str, server_name: str = None) -> Dict[str, Any]:
         """
         Extract streaming links from HTML
         
+        The page is scanned for its streaming data without parsing it first;
+        pages the scan can't handle unambiguously are parsed and searched
+        script by script instead.
+        
         Args:
             html (str): HTML content
             server_name (str): Server name
@@ -104,9 +140,13 @@ class StreamingExtractor:
         Returns:
             Dict[str, Any]: Streaming information
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        response = self._extract_fast(html, server_name)
+        if response is None:
+            response = self._extract_from_document(html, server_name)
+        return response
         
-        response = {
+    def _new_response(self, server_name: str) -> Dict[str, Any]:
+        return {
             'streamingLink': {
                 'id': None,
                 'type': None,
@@ -129,6 +169,63 @@ class StreamingExtractor:
             'servers': server_name
         }
         
+    def _extract_fast(self, html: str, server_name: str):
+        """
+        Find the streaming data with a few scans of the raw page
+        
+        Only handles pages with a single streaming or sources variable inside
+        a script that yields a link, where the result is the same as the DOM
+        route's.
+        
+        Returns:
+            Dict[str, Any]: Streaming information, or None to use the DOM route
+        """
+        start = self.DATA_START_PATTERN.search(html)
+        if not start or self.DATA_START_PATTERN.search(html, start.end()):
+            return None
+        
+        json_match = self.DATA_PATTERNS[start.group(1)].match(html, start.start())
+        if not json_match or not self._in_script(html, json_match):
+            return None
+        
+        try:
+            streaming_data = json.loads(json_match.group(1))
+        except ValueError:
+            return None
+        
+        response = self._new_response(server_name)
+        try:
+            self._apply_streaming_data(streaming_data, response)
+        except Exception:
+            return None
+        if not response['streamingLink']['link']['file']:
+            return None
+        
+        if not response['streamingLink']['iframe']:
+            response['streamingLink']['iframe'] = self._find_iframe_src(html)
+        return response
+    
+    def _in_script(self, html: str, match) -> bool:
+        """Check whether a match lies entirely within one <script> element"""
+        opened = html.rfind('<script', 0, match.start())
+        return opened > html.rfind('</script', 0, match.start()) and html.find('</script', match.start(), match.end()) == -1
+    
+    def _find_iframe_src(self, html: str):
+        """Get the src of the page's first iframe, or None"""
+        for match in self.IFRAME_PATTERN.finditer(html):
+            if match.group('attrs') is None:
+                continue
+            src_match = self.SRC_PATTERN.search(match.group('attrs'))
+            if not src_match:
+                return None
+            return unescape(next(value for value in src_match.groups() if value is not None))
+        return None
+    
+    def _extract_from_document(self, html: str, server_name: str) -> Dict[str, Any]:
+        """Extract streaming links by parsing the page and searching each script"""
+        soup = document_cache.parse(html)
+        response = self._new_response(server_name)
+        
         # Extract streaming data from script tags
         script_tags = soup.find_all('script')
         for script in script_tags:
@@ -145,47 +242,7 @@ class StreamingExtractor:
                     try:
                         json_str = json_match.group(1)
                         streaming_data = json.loads(json_str)
-                        
-                        # Extract streaming link
-                        if isinstance(streaming_data, dict):
-                            if 'sources' in streaming_data:
-                                sources = streaming_data['sources']
-                                if sources and len(sources) > 0:
-                                    source = sources[0]
-                                    response['streamingLink']['link']['file'] = source.get('file')
-                                    response['streamingLink']['link']['type'] = source.get('type', 'hls')
-                            
-                            # Extract tracks
-                            if 'tracks' in streaming_data:
-                                response['streamingLink']['tracks'] = streaming_data['tracks']
-                            
-                            # Extract intro/outro timings
-                            if 'intro' in streaming_data:
-                                response['streamingLink']['intro'] = streaming_data['intro']
-                            if 'outro' in streaming_data:
-                                response['streamingLink']['outro'] = streaming_data['outro']
-                            
-                            # Extract server info
-                            if 'server' in streaming_data:
-                                response['streamingLink']['server'] = streaming_data['server']
-                            
-                            # Extract iframe
-                            if 'iframe' in streaming_data:
-                                response['streamingLink']['iframe'] = streaming_data['iframe']
-                            
-                            # Extract ID
-                            if 'id' in streaming_data:
-                                response['streamingLink']['id'] = streaming_data['id']
-                            
-                            # Extract type
-                            if 'type' in streaming_data:
-                                response['streamingLink']['type'] = streaming_data['type']
-                        
-                        elif isinstance(streaming_data, list) and len(streaming_data) > 0:
-                            # Handle case where streaming_data is a list of sources
-                            source = streaming_data[0]
-                            response['streamingLink']['link']['file'] = source.get('file')
-                            response['streamingLink']['link']['type'] = source.get('type', 'hls')
+                        self._apply_streaming_data(streaming_data, response)
                     
                     except (json.JSONDecodeError, Exception) as e:
                         print(f"Error parsing streaming data: {e}")
@@ -208,6 +265,49 @@ class StreamingExtractor:
         
         return response
 
+    def _apply_streaming_data(self, streaming_data, response: Dict[str, Any]):
+        """Copy the fields of a page's streaming data into the response"""
+        # Extract streaming link
+        if isinstance(streaming_data, dict):
+            if 'sources' in streaming_data:
+                sources = streaming_data['sources']
+                if sources and len(sources) > 0:
+                    source = sources[0]
+                    response['streamingLink']['link']['file'] = source.get('file')
+                    response['streamingLink']['link']['type'] = source.get('type', 'hls')
+            
+            # Extract tracks
+            if 'tracks' in streaming_data:
+                response['streamingLink']['tracks'] = streaming_data['tracks']
+            
+            # Extract intro/outro timings
+            if 'intro' in streaming_data:
+                response['streamingLink']['intro'] = streaming_data['intro']
+            if 'outro' in streaming_data:
+                response['streamingLink']['outro'] = streaming_data['outro']
+            
+            # Extract server info
+            if 'server' in streaming_data:
+                response['streamingLink']['server'] = streaming_data['server']
+            
+            # Extract iframe
+            if 'iframe' in streaming_data:
+                response['streamingLink']['iframe'] = streaming_data['iframe']
+            
+            # Extract ID
+            if 'id' in streaming_data:
+                response['streamingLink']['id'] = streaming_data['id']
+            
+            # Extract type
+            if 'type' in streaming_data:
+                response['streamingLink']['type'] = streaming_data['type']
+        
+        elif isinstance(streaming_data, list) and len(streaming_data) > 0:
+            # Handle case where streaming_data is a list of sources
+            source = streaming_data[0]
+            response['streamingLink']['link']['file'] = source.get('file')
+            response['streamingLink']['link']['type'] = source.get('type', 'hls')
+
 # Global extractor instances
 servers_extractor = ServersExtractor()
 streaming_extractor = StreamingExtractor()
\ No newline at end of file
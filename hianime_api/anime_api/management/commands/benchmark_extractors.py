@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from pathlib import Path
+import statistics
+import time
+
+from ...extractors import document_cache
+from ...extractors.extraction_plan import profiled
+from .compare_parsers import EXTRACTORS
+
+class Command(BaseCommand):
+    help = 'Measure the CPU time each extractor spends on saved pages, with and without parsing them'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('pages', nargs='+', help='Saved .html pages, or directories of them')
+        parser.add_argument('--extractor', choices=sorted(EXTRACTORS), default='details')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--fields', action='store_true', help='Also break the time of extraction plans down per field')
+    
+    def handle(self, *args, **options):
+        pages = []
+        for path in map(Path, options['pages']):
+            pages.extend(sorted(path.glob('*.html')) if path.is_dir() else [path])
+        if not pages:
+            raise CommandError('No pages to benchmark')
+        if document_cache.config.document_cache_size <= 0:
+            raise CommandError('Timing extraction alone needs the document cache (DOCUMENT_CACHE_SIZE > 0)')
+        
+        extractor, method = EXTRACTORS[options['extractor']]
+        extract = getattr(extractor, method)
+        
+        self.stdout.write(
+            f"{options['extractor']} extractor with {document_cache.parser}, "
+            f"median CPU time of {options['runs']} runs:"
+        )
+        self.stdout.write(f"{'page':<32} {'bytes':>9} {'parse + extract':>16} {'extract':>12}")
+        totals = [0.0, 0.0]
+        for path in pages:
+            html = path.read_text(encoding='utf-8', errors='replace')
+            cold = self._measure(options['runs'], lambda: extract(html), document_cache.clear)
+            # The document stays cached between runs, leaving only the extraction
+            warm = self._measure(options['runs'], lambda: extract(html))
+            totals[0] += cold
+            totals[1] += warm
+            self.stdout.write(f"{path.name[:32]:<32} {len(html):>9} {cold * 1000:13.2f} ms {warm * 1000:9.2f} ms")
+        
+        self.stdout.write(f"{'total':<32} {'':>9} {totals[0] * 1000:13.2f} ms {totals[1] * 1000:9.2f} ms")
+    
+        if options['fields']:
+            self._report_fields(pages, extract, options['runs'])
+    
+    def _report_fields(self, pages, extract, runs):
+        """Print the mean time per run each extraction plan spends per field"""
+        htmls = [path.read_text(encoding='utf-8', errors='replace') for path in pages]
+        with profiled() as timings:
+            for _ in range(runs):
+                for html in htmls:
+                    extract(html)
+        
+        if not timings:
+            self.stdout.write('The extractor runs no extraction plans')
+            return
+        
+        self.stdout.write("Extraction plans, mean time per run over all pages:")
+        for (plan, field), seconds in sorted(timings.items()):
+            self.stdout.write(f"  {plan:<24} {field:<20} {seconds / runs * 1000:9.2f} ms")
+    
+    def _measure(self, runs, fn, setup=None):
+        """Get the median CPU time of fn, calling setup untimed before each run"""
+        durations = []
+        for _ in range(runs):
+            if setup:
+                setup()
+            started = time.process_time()
+            fn()
+            durations.append(time.process_time() - started)
+        return statistics.median(durations)
@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand, CommandError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import statistics
+import threading
+import time
+import requests
+
+from ...extractors import (
+    document_cache,
+    anime_details_extractor,
+    episodes_extractor,
+    homepage_extractor,
+    search_extractor,
+    streaming_extractor
+)
+from ...extractors.document_cache import FeedParser
+from ...services import http_service
+from ...services.read_limit import STREAM_CHUNK_SIZE
+
+# Extractors that can be benchmarked, with the method producing their result
+EXTRACTORS = {
+    'homepage': (homepage_extractor, 'extract'),
+    'details': (anime_details_extractor, 'extract'),
+    'episodes': (episodes_extractor, 'extract'),
+    'search': (search_extractor, 'extract_search_results'),
+    'streaming': (streaming_extractor, 'extract'),
+}
+
+# Bytes the simulated upstream sends at a time
+SEND_SIZE = 4096
+
+class Command(BaseCommand):
+    help = 'Compare time-to-result of parsing pages after and while they download (see STREAM_PARSE)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('html', nargs='?', help='Saved page to serve; fetched from --endpoint when omitted')
+        parser.add_argument('--endpoint', default='/home', help='Upstream endpoint to sample')
+        parser.add_argument('--extractor', choices=sorted(EXTRACTORS), default='homepage')
+        parser.add_argument('--rate', type=int, default=256, help='Simulated upstream bandwidth in KiB/s')
+        parser.add_argument('--runs', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        if document_cache.config.document_cache_size <= 0:
+            raise CommandError('Parsing while downloading needs the document cache (DOCUMENT_CACHE_SIZE > 0)')
+        
+        page = self._load_page(options)
+        extractor, method = EXTRACTORS[options['extractor']]
+        extract = getattr(extractor, method)
+        
+        server = self._serve(page, options['rate'] * 1024)
+        url = f"http://127.0.0.1:{server.server_port}/"
+        try:
+            after, after_result = self._measure(options['runs'], lambda: self._parse_after(url, extract))
+            during, during_result = self._measure(options['runs'], lambda: self._parse_during(url, extract))
+        finally:
+            server.shutdown()
+        
+        if after_result != during_result:
+            raise CommandError('Both modes must extract the same data, but they differ')
+        
+        self.stdout.write(
+            f"{len(page)} byte page at {options['rate']} KiB/s, {options['extractor']} extractor, "
+            f"median of {options['runs']} runs:"
+        )
+        self.stdout.write(f"  parse after download:  {after * 1000:8.1f} ms")
+        self.stdout.write(f"  parse while reading:   {during * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"  time-to-result saved: {(1 - during / after) * 100:7.1f} %"))
+    
+    def _load_page(self, options):
+        """Read the sample page from disk or fetch it from upstream"""
+        if options['html']:
+            with open(options['html'], 'rb') as f:
+                return f.read()
+        
+        result = http_service.get(options['endpoint'])
+        if not result['success']:
+            raise CommandError(f"Failed to fetch {options['endpoint']}: {result['message']}")
+        return result['data'].encode('utf-8')
+    
+    def _serve(self, page, rate):
+        """Serve the page locally at the given bandwidth in bytes per second"""
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                for start in range(0, len(page), SEND_SIZE):
+                    self.wfile.write(page[start:start + SEND_SIZE])
+                    self.wfile.flush()
+                    time.sleep(SEND_SIZE / rate)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    
+    def _measure(self, runs, fn):
+        """Get the median duration of fn and its last result"""
+        durations = []
+        for _ in range(runs):
+            document_cache.clear()
+            started = time.perf_counter()
+            result = fn()
+            durations.append(time.perf_counter() - started)
+        return statistics.median(durations), result
+    
+    def _parse_after(self, url, extract):
+        response = requests.get(url)
+        return extract(response.text)
+    
+    def _parse_during(self, url, extract):
+        response = requests.get(url, stream=True)
+        parser = FeedParser(document_cache, response.encoding)
+        chunks = []
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            parser.feed(chunk)
+            chunks.append(chunk)
+        
+        html = b''.join(chunks).decode(response.encoding, errors='replace')
+        parser.close(html)
+        # The extractor finds the document already parsed
+        return extract(html)
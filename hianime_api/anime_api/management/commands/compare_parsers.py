@@ -0,0 +1,120 @@
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from pathlib import Path
+import re
+import statistics
+import time
+
+from ...extractors import (
+    document_cache,
+    anime_details_extractor,
+    episodes_extractor,
+    homepage_extractor,
+    search_extractor,
+    servers_extractor,
+    streaming_extractor
+)
+from ...services import http_service
+
+# Every extractor method whose output must not depend on the parser
+EXTRACTORS = {
+    'homepage': (homepage_extractor, 'extract'),
+    'details': (anime_details_extractor, 'extract'),
+    'episodes': (episodes_extractor, 'extract'),
+    'search': (search_extractor, 'extract_search_results'),
+    'suggestions': (search_extractor, 'extract_suggestions'),
+    'servers': (servers_extractor, 'extract'),
+    'streaming': (streaming_extractor, 'extract'),
+}
+
+class Command(BaseCommand):
+    help = 'Check that every extractor gives the same output with each HTML parser and compare parse times'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', help='Directory of saved .html pages')
+        parser.add_argument('--fetch', nargs='+', metavar='ENDPOINT', help='Save these upstream pages to the corpus first')
+        parser.add_argument('--parsers', nargs='+', default=['lxml', 'html.parser'])
+        parser.add_argument('--runs', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        corpus = Path(options['corpus'])
+        if options['fetch']:
+            self._fetch(corpus, options['fetch'])
+        
+        pages = sorted(corpus.glob('*.html'))
+        if not pages:
+            raise CommandError(f"No .html pages in {corpus}")
+        
+        parsers = options['parsers']
+        for parser in parsers:
+            with override_settings(HTML_PARSER=parser):
+                if document_cache.parser != parser:
+                    raise CommandError(f"HTML parser {parser} is not available")
+        
+        self.stdout.write(f"{'page':<32} {'bytes':>9} " + ' '.join(f"{parser:>13}" for parser in parsers))
+        totals = dict.fromkeys(parsers, 0.0)
+        mismatches = []
+        for path in pages:
+            html = path.read_text(encoding='utf-8', errors='replace')
+            outputs = {}
+            timings = []
+            for parser in parsers:
+                with override_settings(HTML_PARSER=parser):
+                    duration = self._parse_time(html, options['runs'])
+                    outputs[parser] = self._extract(html)
+                totals[parser] += duration
+                timings.append(f"{duration * 1000:10.1f} ms")
+            
+            self.stdout.write(f"{path.name[:32]:<32} {len(html):>9} " + ' '.join(timings))
+            
+            reference = outputs[parsers[0]]
+            for parser in parsers[1:]:
+                for name in EXTRACTORS:
+                    if outputs[parser][name] != reference[name]:
+                        mismatches.append(f"{path.name}: {name} differs between {parsers[0]} and {parser}")
+        
+        self.stdout.write(f"{'total':<32} {'':>9} " + ' '.join(f"{totals[parser] * 1000:10.1f} ms" for parser in parsers))
+        for parser in parsers[1:]:
+            if totals[parser]:
+                self.stdout.write(f"{parsers[0]} parses {totals[parser] / totals[parsers[0]]:.1f}x as fast as {parser}")
+        
+        if mismatches:
+            for mismatch in mismatches:
+                self.stderr.write(mismatch)
+            raise CommandError(f"{len(mismatches)} extractor outputs differ between parsers")
+        self.stdout.write(self.style.SUCCESS(f"All extractors gave identical output on {len(pages)} pages"))
+    
+    def _fetch(self, corpus, endpoints):
+        """Save upstream pages to the corpus, named after their endpoint"""
+        corpus.mkdir(parents=True, exist_ok=True)
+        for endpoint in endpoints:
+            result = http_service.get(endpoint)
+            if not result['success']:
+                raise CommandError(f"Failed to fetch {endpoint}: {result['message']}")
+            
+            name = re.sub(r'[^A-Za-z0-9]+', '-', endpoint).strip('-') or 'index'
+            (corpus / f"{name}.html").write_text(result['data'], encoding='utf-8')
+            self.stdout.write(f"Saved {endpoint} to {corpus / name}.html")
+    
+    def _parse_time(self, html, runs):
+        """Get the median time to parse a page with the configured parser"""
+        parser = document_cache.parser
+        durations = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            BeautifulSoup(html, parser)
+            durations.append(time.perf_counter() - started)
+        return statistics.median(durations)
+    
+    def _extract(self, html):
+        """Run every extractor on a page, parsing it once with the configured parser"""
+        # Don't reuse the document another parser built
+        document_cache.clear()
+        outputs = {}
+        for name, (extractor, method) in EXTRACTORS.items():
+            try:
+                outputs[name] = getattr(extractor, method)(html)
+            except Exception as e:
+                outputs[name] = f"{type(e).__name__}: {str(e)}"
+        return outputs
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+import pickle
+
+from ...services import http_service
+from ...services.cache_compressor import train_dictionary
+from ...services.upstream_scheduler import upstream_scheduler
+
+# Pages sampled when no endpoints are given
+DEFAULT_ENDPOINTS = [
+    '/home',
+    '/most-popular',
+    '/top-airing',
+    '/recently-updated',
+    '/movie',
+    '/tv',
+    '/ova',
+    '/ona',
+    '/special',
+    '/completed',
+]
+
+class Command(BaseCommand):
+    help = 'Train a zstd dictionary for compressing cached pages (see CACHE_ZSTD_DICTIONARY)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path the dictionary is written to')
+        parser.add_argument('endpoints', nargs='*', help='Upstream endpoints to sample')
+        parser.add_argument('--pages', type=int, default=3, help='Listing pages fetched per endpoint')
+        parser.add_argument('--size', type=int, default=112640, help='Maximum dictionary size in bytes')
+    
+    def handle(self, *args, **options):
+        endpoints = [
+            f"{endpoint}?page={page}"
+            for endpoint in options['endpoints'] or DEFAULT_ENDPOINTS
+            for page in range(1, options['pages'] + 1)
+        ]
+        with upstream_scheduler.background():
+            results = http_service.get_many(endpoints)
+        
+        # Train on values as django-redis stores them
+        samples = [
+            pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+            for result in results if result['success']
+        ]
+        
+        if not samples:
+            raise CommandError('No pages could be fetched to train on')
+        
+        try:
+            dictionary = train_dictionary(samples, options['size'])
+        except Exception as e:
+            raise CommandError(f"Failed to train dictionary: {str(e)}")
+        
+        with open(options['output'], 'wb') as f:
+            f.write(dictionary)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(dictionary)} byte dictionary trained on {len(samples)} pages to {options['output']}"
+        ))
@@ -0,0 +1,249 @@
+from django.core.cache import cache
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+import logging
+import threading
+import zlib
+from .config import config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Every zstd frame starts with this magic number
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Level used for both codecs; zstd's default trades ratio for speed well
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+class CompressionStats:
+    """Counters showing how much cached values shrink when compressed"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.skipped = 0
+        # Entries that could not be decoded and were treated as misses
+        self.unreadable = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+    
+    def record(self, size_in, size_out):
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += size_in
+            self.bytes_out += size_out
+    
+    def record_skipped(self):
+        with self._lock:
+            self.skipped += 1
+    
+    def record_unreadable(self):
+        with self._lock:
+            self.unreadable += 1
+    
+    def snapshot(self):
+        """Get the counters and the overall compression ratio"""
+        with self._lock:
+            return {
+                'compressed': self.compressed,
+                'skipped': self.skipped,
+                'unreadable': self.unreadable,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None
+            }
+
+class CacheCompressor(BaseCompressor):
+    """
+    django-redis compressor for cached pages and extractions
+    
+    Values of at least CACHE_COMPRESS_MIN_LENGTH bytes are compressed with
+    zstd when the zstandard package is installed, using the dictionary at
+    CACHE_ZSTD_DICTIONARY if one was trained, and with zlib otherwise. Smaller
+    values are stored as-is. Decompression detects the codec from the stored
+    bytes, so switching codecs does not invalidate existing entries.
+    
+    zstd frames record the ID of the dictionary they were compressed with.
+    Frames from another dictionary (or none) are refused, so retraining or
+    changing CACHE_ZSTD_DICTIONARY turns old entries into misses; read them
+    with get_cached() / get_many_cached() or their async versions.
+    """
+    
+    def __init__(self, options):
+        super().__init__(options)
+        self.config = config
+        self.min_length = self.config.cache_compress_min_length
+        self._dictionary = self._load_dictionary()
+        # zstd writes 0 for frames compressed without a dictionary
+        self._dictionary_id = self._dictionary.dict_id() if self._dictionary is not None else 0
+        # zstandard (de)compressor objects must not be shared between threads
+        self._local = threading.local()
+    
+    def compress(self, value: bytes) -> bytes:
+        if len(value) < self.min_length:
+            compression_stats.record_skipped()
+            return value
+        
+        if zstandard is not None:
+            compressed = self._zstd_compressor().compress(value)
+        else:
+            compressed = zlib.compress(value, ZLIB_LEVEL)
+        
+        compression_stats.record(len(value), len(compressed))
+        logger.debug(f"Compressed cache value {len(value)} -> {len(compressed)} bytes")
+        return compressed
+    
+    def decompress(self, value: bytes) -> bytes:
+        if value[:4] == ZSTD_MAGIC:
+            if zstandard is None:
+                raise CompressorError('zstandard is required to read zstd compressed cache values')
+            try:
+                frame_dict_id = zstandard.get_frame_parameters(value).dict_id
+                if frame_dict_id != self._dictionary_id:
+                    raise CompressorError(
+                        f"Cache value was compressed with zstd dictionary {frame_dict_id}, not {self._dictionary_id}"
+                    )
+                return self._zstd_decompressor().decompress(value)
+            except zstandard.ZstdError as e:
+                raise CompressorError(e)
+        
+        # Anything else is either zlib data or a value too small to compress
+        try:
+            return zlib.decompress(value)
+        except zlib.error as e:
+            raise CompressorError(e)
+    
+    def _load_dictionary(self):
+        """Load the trained zstd dictionary, if one is configured"""
+        path = self.config.cache_zstd_dictionary
+        if not path or zstandard is None:
+            return None
+        
+        try:
+            with open(path, 'rb') as f:
+                return zstandard.ZstdCompressionDict(f.read())
+        except OSError as e:
+            logger.error(f"Failed to load zstd dictionary {path}: {str(e)}")
+            return None
+    
+    def _zstd_compressor(self):
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL,
+                dict_data=self._dictionary
+            )
+        return compressor
+    
+    def _zstd_decompressor(self):
+        decompressor = getattr(self._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionary)
+        return decompressor
+
+def get_cached(key, default=None):
+    """
+    Read a cache entry, treating one that cannot be decoded as a miss
+    
+    django-redis passes values that fail to decompress on to the
+    serializer as if they were stored uncompressed, so an entry compressed
+    with another zstd dictionary raises while being unpickled. Such entries
+    are deleted so the next write replaces them.
+    
+    Args:
+        key (str): Cache key
+        default: Value returned on a miss
+    
+    Returns:
+        The cached value, or default
+    """
+    try:
+        return cache.get(key, default)
+    except Exception as e:
+        _log_unreadable(key, e)
+    
+    try:
+        cache.delete(key)
+    except Exception as e:
+        logger.error(f"Failed to delete unreadable cache entry {key}: {str(e)}")
+    return default
+
+async def aget_cached(key, default=None):
+    """Async version of get_cached()"""
+    try:
+        return await cache.aget(key, default)
+    except Exception as e:
+        _log_unreadable(key, e)
+    
+    try:
+        await cache.adelete(key)
+    except Exception as e:
+        logger.error(f"Failed to delete unreadable cache entry {key}: {str(e)}")
+    return default
+
+def get_many_cached(keys):
+    """
+    Read several cache entries in one round trip, treating ones that cannot be decoded as misses
+    
+    One unreadable entry makes the whole multi-get raise, so the keys are
+    then read one at a time through get_cached(), which deletes the bad
+    entries and still returns the good ones.
+    
+    Args:
+        keys (list): Cache keys
+    
+    Returns:
+        dict: Values of the keys found, by cache key
+    """
+    try:
+        return cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Cache multi-get failed for {len(keys)} keys, reading them one at a time: {str(e)}")
+    
+    values = {}
+    for key in keys:
+        value = get_cached(key)
+        if value is not None:
+            values[key] = value
+    return values
+
+async def aget_many_cached(keys):
+    """Async version of get_many_cached()"""
+    try:
+        return await cache.aget_many(keys)
+    except Exception as e:
+        logger.warning(f"Cache multi-get failed for {len(keys)} keys, reading them one at a time: {str(e)}")
+    
+    values = {}
+    for key in keys:
+        value = await aget_cached(key)
+        if value is not None:
+            values[key] = value
+    return values
+
+def _log_unreadable(key, error):
+    compression_stats.record_unreadable()
+    logger.warning(f"Unreadable cache entry {key}, treating it as a miss: {str(error)}")
+
+def train_dictionary(samples, size=112640):
+    """
+    Train a zstd dictionary on sample cache values
+    
+    Args:
+        samples (list): Sample values as bytes, e.g. pickled cached pages
+        size (int): Maximum dictionary size in bytes
+    
+    Returns:
+        bytes: The trained dictionary
+    """
+    if zstandard is None:
+        raise RuntimeError('zstandard is required to train a dictionary')
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+# Global compression statistics
+compression_stats = CompressionStats()
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding a single upstream origin
+    
+    Closed: requests flow normally and consecutive failures are counted.
+    Open: after failure_threshold consecutive failures requests fail fast
+    until recovery_timeout has passed.
+    Half-open: a single trial request is let through; its success closes the
+    circuit again and its failure re-opens it. A trial that ends without an
+    outcome, e.g. because it was cancelled, must be released so another
+    request can take its place.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name, failure_threshold, recovery_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._trial_in_flight = False
+    
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._recovery_due():
+                return self.HALF_OPEN
+            return self._state
+    
+    def allow_request(self):
+        """Check whether a request to the origin may be attempted"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            
+            if self._state == self.OPEN:
+                if not self._recovery_due():
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+                logger.info(f"Circuit half-open for: {self.name}")
+            
+            # Half-open: only one trial request at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+    
+    def record_success(self):
+        """Record a healthy response from the origin"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit closed for: {self.name}")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Record a failed request to the origin"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit opened for: {self.name} after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+    
+    def release_trial(self):
+        """Let another trial request through after one ended without an outcome"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+    
+    def _recovery_due(self):
+        return time.monotonic() - self._opened_at >= self.recovery_timeout
+
+class CircuitBreakerRegistry:
+    """Registry holding one circuit breaker per upstream origin"""
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._breakers = {}
+    
+    def get(self, origin):
+        """Get the circuit breaker for an origin, creating it on first use"""
+        with self._lock:
+            breaker = self._breakers.get(origin)
+            if breaker is None:
+                breaker = self._breakers[origin] = CircuitBreaker(
+                    origin,
+                    self.config.circuit_breaker_failure_threshold,
+                    self.config.circuit_breaker_recovery_timeout
+                )
+            return breaker
+    
+    def states(self):
+        """Get the current state of every known origin"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.state for breaker in breakers}
+
+# Global circuit breaker registry
+circuit_breakers = CircuitBreakerRegistry()
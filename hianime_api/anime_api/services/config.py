@@ -1,5 +1,19 @@
 from django.conf import settings
 
+# Cache lifetime per upstream endpoint, as (pattern, seconds) pairs. The first
+# pattern found in the endpoint wins; other endpoints use the origin's cache timeout.
+DEFAULT_CACHE_TTL_POLICY = [
+    # Episode pages, whose servers and stream links change quickly
+    (r'ep=', 300),
+    (r'^/home$', 300),
+    (r'^/search/suggestion', 600),
+    (r'^/search', 900),
+    # Listings ordered by recency
+    (r'^/(recently-updated|recently-added|top-airing|top-upcoming)\b', 600),
+    # Listings that only grow when new anime are added
+    (r'^/(genre|az-list|completed)\b', 21600),
+]
+
 class AnimeAPIConfig:
     """Configuration class for Anime API settings"""
     
@@ -15,6 +29,10 @@ class AnimeAPIConfig:
     def providers_url(self):
         return getattr(settings, 'ANIME_API_PROVIDERS', 'https://megacloud.club')
     
+    @property
+    def origin_options(self):
+        return getattr(settings, 'UPSTREAM_ORIGIN_OPTIONS', {})
+    
     @property
     def headers(self):
         return getattr(settings, 'REQUEST_HEADERS', {
@@ -25,9 +43,185 @@ class AnimeAPIConfig:
     def timeout(self):
         return getattr(settings, 'REQUEST_TIMEOUT', 30)
     
+    @property
+    def connect_timeout(self):
+        return getattr(settings, 'REQUEST_CONNECT_TIMEOUT', 5)
+    
+    @property
+    def request_latency_budget(self):
+        return getattr(settings, 'REQUEST_LATENCY_BUDGET', 15)
+    
     @property
     def cache_timeout(self):
         return getattr(settings, 'CACHE_TIMEOUT', 3600)
+    
+    @property
+    def cache_ttl_policy(self):
+        return getattr(settings, 'CACHE_TTL_POLICY', DEFAULT_CACHE_TTL_POLICY)
+    
+    @property
+    def cache_ttl_jitter(self):
+        return getattr(settings, 'CACHE_TTL_JITTER', 0.1)
+    
+    @property
+    def cache_stale_timeout(self):
+        return getattr(settings, 'CACHE_STALE_TIMEOUT', 86400)
+    
+    @property
+    def cache_refresh_workers(self):
+        return getattr(settings, 'CACHE_REFRESH_WORKERS', 4)
+    
+    @property
+    def html_parser(self):
+        return getattr(settings, 'HTML_PARSER', 'lxml')
+    
+    @property
+    def document_cache_size(self):
+        return getattr(settings, 'DOCUMENT_CACHE_SIZE', 8)
+    
+    @property
+    def document_cache_ttl(self):
+        return getattr(settings, 'DOCUMENT_CACHE_TTL', 30)
+    
+    @property
+    def stream_parse(self):
+        return getattr(settings, 'STREAM_PARSE', False)
+    
+    @property
+    def negative_cache_not_found_timeout(self):
+        return getattr(settings, 'NEGATIVE_CACHE_NOT_FOUND_TIMEOUT', 600)
+    
+    @property
+    def negative_cache_error_timeout(self):
+        return getattr(settings, 'NEGATIVE_CACHE_ERROR_TIMEOUT', 15)
+    
+    @property
+    def cache_compress_min_length(self):
+        return getattr(settings, 'CACHE_COMPRESS_MIN_LENGTH', 1024)
+    
+    @property
+    def cache_zstd_dictionary(self):
+        return getattr(settings, 'CACHE_ZSTD_DICTIONARY', '')
+    
+    @property
+    def circuit_breaker_failure_threshold(self):
+        return getattr(settings, 'CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5)
+    
+    @property
+    def circuit_breaker_recovery_timeout(self):
+        return getattr(settings, 'CIRCUIT_BREAKER_RECOVERY_TIMEOUT', 30)
+    
+    @property
+    def upstream_rate_limit(self):
+        return getattr(settings, 'UPSTREAM_RATE_LIMIT', 10)
+    
+    @property
+    def upstream_burst(self):
+        return getattr(settings, 'UPSTREAM_BURST', 20)
+    
+    @property
+    def upstream_max_in_flight(self):
+        return getattr(settings, 'UPSTREAM_MAX_IN_FLIGHT', 16)
+    
+    @property
+    def upstream_processes(self):
+        return getattr(settings, 'UPSTREAM_PROCESSES', 1)
+    
+    @property
+    def upstream_queue_timeout(self):
+        return getattr(settings, 'UPSTREAM_QUEUE_TIMEOUT', 10)
+    
+    @property
+    def retry_budget_ratio(self):
+        return getattr(settings, 'RETRY_BUDGET_RATIO', 0.1)
+    
+    @property
+    def retry_budget_max(self):
+        return getattr(settings, 'RETRY_BUDGET_MAX', 10)
+    
+    @property
+    def retry_backoff_base(self):
+        return getattr(settings, 'RETRY_BACKOFF_BASE', 0.5)
+    
+    @property
+    def retry_backoff_cap(self):
+        return getattr(settings, 'RETRY_BACKOFF_CAP', 10)
+    
+    @property
+    def retry_backoff_sync_cap(self):
+        return getattr(settings, 'RETRY_BACKOFF_SYNC_CAP', 2)
+    
+    @property
+    def retry_after_max(self):
+        return getattr(settings, 'RETRY_AFTER_MAX', 10)
+    
+    @property
+    def multi_origin_fetch(self):
+        return getattr(settings, 'MULTI_ORIGIN_FETCH', False)
+    
+    @property
+    def hedge_delay(self):
+        return getattr(settings, 'HEDGE_DELAY', 0)
+    
+    @property
+    def single_flight_distributed(self):
+        return getattr(settings, 'SINGLE_FLIGHT_DISTRIBUTED', False)
+    
+    @property
+    def single_flight_lock_timeout(self):
+        return getattr(settings, 'SINGLE_FLIGHT_LOCK_TIMEOUT', 30)
+    
+    @property
+    def single_flight_wait_timeout(self):
+        return getattr(settings, 'SINGLE_FLIGHT_WAIT_TIMEOUT', 30)
+    
+    @property
+    def stats_token(self):
+        return getattr(settings, 'STATS_TOKEN', '')
+    
+    @property
+    def async_views(self):
+        return getattr(settings, 'ASYNC_VIEWS', False)
+    
+    @property
+    def http_pool_maxsize(self):
+        return getattr(settings, 'HTTP_POOL_MAXSIZE', 32)
+    
+    @property
+    def http_pool_block(self):
+        return getattr(settings, 'HTTP_POOL_BLOCK', False)
+    
+    @property
+    def warmup_enabled(self):
+        return getattr(settings, 'WARMUP_ENABLED', True)
+    
+    @property
+    def warmup_connections(self):
+        return getattr(settings, 'WARMUP_CONNECTIONS', 2)
+    
+    @property
+    def warmup_prime_endpoints(self):
+        return getattr(settings, 'WARMUP_PRIME_ENDPOINTS', [])
+    
+    @property
+    def warmup_budget(self):
+        return getattr(settings, 'WARMUP_BUDGET', 10)
+    
+    @property
+    def dns_cache_ttl(self):
+        return getattr(settings, 'DNS_CACHE_TTL', 300)
+    
+    @property
+    def async_max_connections(self):
+        return getattr(settings, 'ASYNC_POOL_MAX_CONNECTIONS', 100)
+    
+    @property
+    def async_max_keepalive_connections(self):
+        return getattr(settings, 'ASYNC_POOL_MAX_KEEPALIVE', 20)
+    
+    @property
+    def async_keepalive_expiry(self):
+        return getattr(settings, 'ASYNC_POOL_KEEPALIVE_EXPIRY', 30)
 
 # Global config instance
 config = AnimeAPIConfig()
\ No newline at end of file
@@ -0,0 +1,135 @@
+from urllib.parse import urlsplit
+import asyncio
+import httpcore
+import httpx
+import logging
+import socket
+import threading
+import time
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+class DNSCache:
+    """
+    TTL cache of upstream host name lookups
+    
+    Only the upstream clients use it: the session pool's connections (see
+    session_pool.py) and the async clients' transports (CachedDNSTransport)
+    connect to a cached address for DNS_CACHE_TTL seconds, so connections
+    opened after the warm-up skip the resolver. Certificates are still
+    checked against the host name. When a lookup fails, the last known
+    address is used instead.
+    """
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._entries = {}
+    
+    def resolve(self, url):
+        """Look up the host of a URL now so later connections find it cached"""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        return self.address(parts.hostname, port)
+    
+    def address(self, host, port):
+        """
+        Get the address to connect to for a host
+        
+        Args:
+            host (str): Host name
+            port (int): Port the connection is made to
+        
+        Returns:
+            str: An IP address of the host, or the host itself when caching is
+                off or it can't be resolved, so connecting reports the error
+        """
+        if self.config.dns_cache_ttl <= 0:
+            return host
+        
+        address = self._cached(host, port)
+        if address is not None:
+            return address
+        
+        try:
+            addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        except OSError as e:
+            return self._lookup_failed(host, port, e)
+        return self._store(host, port, addresses)
+    
+    async def aaddress(self, host, port):
+        """Async version of address(), looking the host up without blocking the event loop"""
+        if self.config.dns_cache_ttl <= 0:
+            return host
+        
+        address = self._cached(host, port)
+        if address is not None:
+            return address
+        
+        try:
+            addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            return self._lookup_failed(host, port, e)
+        return self._store(host, port, addresses)
+    
+    def _cached(self, host, port):
+        with self._lock:
+            entry = self._entries.get((host, port))
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+    
+    def _store(self, host, port, addresses):
+        address = addresses[0][4][0]
+        with self._lock:
+            self._entries[(host, port)] = (time.monotonic() + self.config.dns_cache_ttl, address)
+        return address
+    
+    def _lookup_failed(self, host, port, error):
+        """Fall back to the last known address of a host whose lookup failed"""
+        with self._lock:
+            entry = self._entries.get((host, port))
+        if entry is None:
+            logger.warning(f"DNS lookup failed for {host}: {str(error)}")
+            return host
+        logger.warning(f"DNS lookup failed for {host}, using cached address: {str(error)}")
+        return entry[1]
+
+class CachedDNSBackend(httpcore.AsyncNetworkBackend):
+    """httpcore network backend opening TCP connections to addresses from the DNS cache"""
+    
+    def __init__(self):
+        self._backend = httpcore.AnyIOBackend()
+    
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        address = await dns_cache.aaddress(host, port)
+        return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+    
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+    
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+class CachedDNSTransport(httpx.AsyncHTTPTransport):
+    """httpx transport whose connections are opened through the DNS cache"""
+    
+    def __init__(self, limits):
+        """
+        Args:
+            limits (httpx.Limits): Connection pool limits
+        """
+        super().__init__(limits=limits)
+        # httpx takes no network backend, so the pool it built is replaced
+        # with one using ours; TLS still verifies the request's host name
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=CachedDNSBackend()
+        )
+
+# Global DNS cache instance
+dns_cache = DNSCache()
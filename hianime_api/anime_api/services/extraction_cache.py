@@ -0,0 +1,73 @@
+from django.core.cache import cache
+import logging
+import time
+from .cache_compressor import get_cached
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+class ExtractionCache:
+    """
+    Cache of extractor output so cache hits skip HTML parsing
+    
+    Entries are keyed by the page's cache key (derived from its endpoint), the
+    extractor name and the extractor's VERSION, so bumping an extractor's
+    version only invalidates that extractor's entries. Each entry remembers
+    which copy of the page it was extracted from and is ignored once the page
+    has been refetched with new content.
+    """
+    
+    def __init__(self):
+        self.config = config
+    
+    def extract(self, result, extractor, method='extract', args=()):
+        """
+        Run an extractor over a fetch result, reusing a cached extraction when possible
+        
+        Args:
+            result (dict): Successful result returned by HTTPService
+            extractor: Extractor instance
+            method (str): Name of the extractor method to call
+            args (tuple): Extra arguments passed to the extractor method
+        
+        Returns:
+            The extracted data
+        """
+        extract = getattr(extractor, method)
+        
+        # Uncached results have no stable identity to key on
+        page_key = result.get('cache_key')
+        page_version = result.get('page_version')
+        if page_key is None or page_version is None:
+            return extract(result['data'], *args)
+        
+        cache_key = self._make_key(page_key, extractor, method, args)
+        
+        cached_data = get_cached(cache_key)
+        if cached_data and cached_data['page_version'] == page_version:
+            logger.info(f"Extraction cache hit for: {cache_key}")
+            return cached_data['data']
+        
+        data = extract(result['data'], *args)
+        
+        # Live as long as the page entry itself
+        timeout = max(0, result['fresh_until'] - time.time()) + self.config.cache_stale_timeout
+        cache.set(cache_key, {
+            'page_version': page_version,
+            'data': data
+        }, timeout)
+        logger.info(f"Cached extraction for: {cache_key}")
+        
+        return data
+    
+    def _make_key(self, page_key, extractor, method, args):
+        """Build the cache key for an extraction"""
+        name = type(extractor).__name__
+        version = getattr(extractor, 'VERSION', 1)
+        key = f"extracted:{name}.{method}:v{version}:{page_key}"
+        if args:
+            key += ':' + ':'.join(str(arg) for arg in args)
+        return key
+
+# Global extraction cache instance
+extraction_cache = ExtractionCache()
@@ -1,23 +1,84 @@
-import requests
+import httpx
+from requests.compat import chardet
 from requests.exceptions import RequestException, Timeout
 from django.core.cache import cache
 from django.conf import settings
+import asyncio
 import logging
 import time
+import contextvars
+import queue
 import random
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from .cache_compressor import aget_cached, aget_many_cached, get_cached, get_many_cached
 from .config import config
+from .single_flight import single_flight
+from .circuit_breaker import CircuitBreaker, circuit_breakers
+from .dns_cache import CachedDNSTransport
+from .origin_health import origin_health
+from .origins import origins
+from .read_limit import STREAM_CHUNK_SIZE
+from .session_pool import session_pool
+from .request_deadline import request_deadline
+from .upstream_scheduler import UpstreamQueueTimeout, upstream_scheduler
 
 logger = logging.getLogger(__name__)
 
+# User agents rotated on every attempt
+USER_AGENTS = [
+    'Mozilla/5.0 (X11; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0'
+]
+
+class _StreamedBody:
+    """A response body read in chunks"""
+    
+    def __init__(self, content, partial, parser=None):
+        self.content = content
+        # Whether reading stopped before the end of the page
+        self.partial = partial
+        # Parser the chunks were fed to while they arrived
+        self.parser = parser
+
 class HTTPService:
-    """Service for making HTTP requests to anime websites"""
+    """
+    Service for making HTTP requests to anime websites
+    
+    Every upstream origin (see OriginRegistry) is served by the same pipeline:
+    cache lookup, coalescing of concurrent misses, scheduling, fetching (hedged
+    across mirrors when enabled), validation and storage.
+    """
     
     def __init__(self):
         self.config = config
-        self.session = requests.Session()
-        self.session.headers.update(self.config.headers)
+        # Async clients are bound to the event loop that created them, so keep
+        # one set of per-origin pools for every running loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        # Stale entries currently being refreshed in the background
+        self._refresh_lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_executor = None
+        # Hedged async requests still running after another origin answered
+        self._hedge_tasks = set()
     
-    def get(self, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3):
+    def _build_headers(self, base_headers):
+        """Build request headers with a rotated user agent"""
+        headers = dict(base_headers)
+        headers['User-Agent'] = random.choice(USER_AGENTS)
+        headers['Accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+        headers['Accept-Language'] = 'en-US,en;q=0.5'
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        headers['Connection'] = 'keep-alive'
+        headers['Upgrade-Insecure-Requests'] = '1'
+        return headers
+    
+    def get(self, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3, read_limit=None, stream_parser=None):
         """
         Make GET request to the anime website with retry logic
         
@@ -27,71 +88,411 @@ class HTTPService:
             cache_key (str): Custom cache key
             timeout (int): Request timeout in seconds
             max_retries (int): Maximum number of retry attempts
+            read_limit (ReadLimit): Stop reading the page once this limit is reached
+            stream_parser (callable): Parse the page while it downloads, see DocumentCache.feed_parser()
             
         Returns:
             dict: Response data with success flag
         """
-        if timeout is None:
-            timeout = self.config.timeout
+        return self.fetch('primary', endpoint, use_cache, cache_key, timeout, max_retries, read_limit, stream_parser)
+    
+    def get_v2(self, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3, read_limit=None, stream_parser=None):
+        """
+        Make GET request to the v2 anime website with retry logic
+        
+        Args:
+            endpoint (str): API endpoint
+            use_cache (bool): Whether to use caching
+            cache_key (str): Custom cache key
+            timeout (int): Request timeout in seconds
+            max_retries (int): Maximum number of retry attempts
+            read_limit (ReadLimit): Stop reading the page once this limit is reached
+            stream_parser (callable): Parse the page while it downloads, see DocumentCache.feed_parser()
             
-        url = f"{self.config.base_url}{endpoint}"
+        Returns:
+            dict: Response data with success flag
+        """
+        return self.fetch('mirror', endpoint, use_cache, cache_key, timeout, max_retries, read_limit, stream_parser)
+    
+    def fetch(self, origin, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3, read_limit=None, stream_parser=None):
+        """
+        Make GET request to an upstream origin with caching and retry logic
+        
+        Args:
+            origin (str): Origin name: 'primary', 'mirror' or 'provider'
+            endpoint (str): API endpoint
+            use_cache (bool): Whether to use caching
+            cache_key (str): Custom cache key
+            timeout (int): Request timeout in seconds, defaults to the origin's
+            max_retries (int): Maximum number of retry attempts
+            read_limit (ReadLimit): Stop reading the page once this limit is reached
+            stream_parser (callable): Parse the page while it downloads, see DocumentCache.feed_parser()
+            
+        Returns:
+            dict: Response data with success flag
+        """
+        origin = origins.get(origin)
+        if timeout is None:
+            timeout = origin.timeout
         
         # Use caching if enabled
         if use_cache:
             if cache_key is None:
-                cache_key = f"anime_api:{endpoint}"
+                cache_key = self._cache_key(origin, endpoint, read_limit)
             
-            cached_data = cache.get(cache_key)
+            cached_data = get_cached(cache_key)
             if cached_data:
-                logger.info(f"Cache hit for: {cache_key}")
+                self._revalidate_if_stale(cached_data, origin, endpoint, cache_key, timeout, max_retries, read_limit, stream_parser)
                 return cached_data
+            
+            origin.stats.incr('cache_misses')
+            # Concurrent misses for the same key share one upstream fetch
+            return single_flight.do(
+                cache_key,
+                lambda: self._fetch_and_cache(origin, endpoint, cache_key, timeout, max_retries, read_limit, stream_parser)
+            )
+        
+        return self._fetch(origin, endpoint, timeout, max_retries, read_limit=read_limit, stream_parser=stream_parser)
+    
+    def get_many(self, endpoints, origin='primary', use_cache=True, timeout=None, max_retries=3):
+        """
+        Make GET requests for several endpoints of one origin at once
+        
+        Cached pages are read with a single multi-get; the misses are fetched
+        concurrently, as many at a time as the origin's in-flight limit allows.
+        A failing endpoint only fails its own result.
+        
+        Args:
+            endpoints (list): API endpoints
+            origin (str): Origin name: 'primary', 'mirror' or 'provider'
+            use_cache (bool): Whether to use caching
+            timeout (int): Request timeout in seconds, defaults to the origin's
+            max_retries (int): Maximum number of retry attempts
+        
+        Returns:
+            list: Response data with success flag for each endpoint, in input order
+        """
+        origin = origins.get(origin)
+        if timeout is None:
+            timeout = origin.timeout
+        
+        results = self._get_many_cached(origin, endpoints, timeout, max_retries) if use_cache else {}
+        misses = [endpoint for endpoint in dict.fromkeys(endpoints) if endpoint not in results]
+        
+        if misses:
+            workers = max(1, min(len(misses), origin.max_in_flight))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-fetch') as executor:
+                # Each worker carries the request priority and deadline over
+                futures = {
+                    endpoint: executor.submit(
+                        contextvars.copy_context().run,
+                        self._fetch_one, origin, endpoint, use_cache, timeout, max_retries
+                    )
+                    for endpoint in misses
+                }
+                for endpoint, future in futures.items():
+                    results[endpoint] = future.result()
+        
+        return [results[endpoint] for endpoint in endpoints]
+    
+    def _get_many_cached(self, origin, endpoints, timeout, max_retries):
+        """Read the cached pages of several endpoints in one round trip, keyed by endpoint"""
+        keys = {origin.cache_key(endpoint): endpoint for endpoint in endpoints}
+        cached = get_many_cached(list(keys))
+        
+        results = {}
+        for cache_key, cached_data in cached.items():
+            if cached_data:
+                endpoint = keys[cache_key]
+                self._revalidate_if_stale(cached_data, origin, endpoint, cache_key, timeout, max_retries)
+                results[endpoint] = cached_data
+        return results
+    
+    def _fetch_one(self, origin, endpoint, use_cache, timeout, max_retries):
+        """Fetch one endpoint of a bulk request, turning any exception into a failed result"""
+        try:
+            if not use_cache:
+                return self._fetch(origin, endpoint, timeout, max_retries)
+            
+            cache_key = origin.cache_key(endpoint)
+            origin.stats.incr('cache_misses')
+            return single_flight.do(
+                cache_key,
+                lambda: self._fetch_and_cache(origin, endpoint, cache_key, timeout, max_retries)
+            )
+        except Exception as e:
+            logger.error(f"Bulk fetch failed for {origin.url(endpoint)}: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': 'unexpected_error'
+            }
+    
+    def _cache_key(self, origin, endpoint, read_limit=None):
+        """Get the default cache key of an endpoint, kept apart for partially read pages"""
+        cache_key = origin.cache_key(endpoint)
+        if read_limit is not None:
+            cache_key = f"{cache_key}:{read_limit.cache_suffix}"
+        return cache_key
+    
+    def _fetch_and_cache(self, origin, endpoint, cache_key, timeout, max_retries, read_limit=None, stream_parser=None):
+        """Fetch an endpoint on behalf of all callers waiting on cache_key and cache the result"""
+        # Another worker may have refreshed the entry while we waited for the lock
+        cached_data = get_cached(cache_key)
+        if cached_data and not self._is_stale(cached_data):
+            logger.info(f"Cache hit for: {cache_key}")
+            return cached_data
+        
+        # Revalidate a stale copy instead of downloading the page again
+        conditional_headers = self._conditional_headers(cached_data)
+        result = self._fetch(origin, endpoint, timeout, max_retries, conditional_headers, read_limit, stream_parser)
+        
+        result, cache_timeout = self._prepare_cache_entry(result, cached_data, origin, endpoint, cache_key)
+        if cache_timeout:
+            cache.set(cache_key, result, cache_timeout)
+        
+        return result
+    
+    def _prepare_cache_entry(self, result, cached_data, origin, endpoint, cache_key):
+        """
+        Turn a fetch result into what is returned and stored in the cache
+        
+        Args:
+            result (dict): Result of the upstream fetch
+            cached_data (dict): Stale cached entry the fetch revalidated, if any
+            origin (Origin): Origin the endpoint belongs to
+            endpoint (str): API endpoint
+            cache_key (str): Cache key of the endpoint
+        
+        Returns:
+            tuple: (result to return, seconds to cache it for or None to leave the cache alone)
+        """
+        ttl = self._cache_ttl(origin, endpoint)
+        
+        if result.get('not_modified'):
+            logger.info(f"Not modified, extending cache for: {cache_key}")
+            return self._extend_cache_entry(cached_data, ttl), self._cache_entry_timeout(ttl)
+        
+        # Cache the result if successful
+        if result['success']:
+            logger.info(f"Caching result for: {cache_key}")
+            return self._make_cache_entry(result, cache_key, ttl), self._cache_entry_timeout(ttl)
+        
+        # Remember failures briefly, but never in place of a stale copy
+        if not cached_data:
+            negative_timeout = self._negative_cache_timeout(result)
+            if negative_timeout > 0:
+                logger.info(f"Caching failure for: {cache_key} ({negative_timeout}s)")
+                return dict(result, cache_key=cache_key), negative_timeout
+        
+        return result, None
+    
+    def _negative_cache_timeout(self, result):
+        """How long a failed fetch is cached, or 0 if it should not be"""
+        # A missing page stays missing; other upstream errors usually pass quickly.
+        # Failures decided locally (open circuit, full queue) are not cached.
+        if result.get('status_code') == 404:
+            return self.config.negative_cache_not_found_timeout
+        if result['error'] in ('timeout', 'request_error'):
+            return self.config.negative_cache_error_timeout
+        return 0
+    
+    def _cache_ttl(self, origin, endpoint):
+        """Get the jittered cache lifetime of an endpoint"""
+        # Spread expiry so entries written together don't all expire together
+        ttl = origin.cache_timeout_for(endpoint)
+        jitter = self.config.cache_ttl_jitter
+        return max(1, round(ttl * random.uniform(1 - jitter, 1 + jitter)))
+    
+    def _make_cache_entry(self, result, cache_key, ttl):
+        """
+        Stamp a result with its cache key, page version and the time after which it is served stale
+        
+        The cache key and page version identify this copy of the page, which
+        lets derived data such as extracted results be tied to it.
+        """
+        fresh_until = time.time() + ttl
+        return dict(result, cache_key=cache_key, page_version=fresh_until, fresh_until=fresh_until)
+    
+    def _extend_cache_entry(self, cached_data, ttl):
+        """Renew a cache entry the origin reported as not modified, keeping its page version"""
+        return dict(cached_data, fresh_until=time.time() + ttl)
+    
+    def _conditional_headers(self, cached_data):
+        """Build If-None-Match / If-Modified-Since headers from a cached entry's validators"""
+        headers = {}
+        if not cached_data:
+            return headers
+        
+        if cached_data.get('etag'):
+            headers['If-None-Match'] = cached_data['etag']
+        if cached_data.get('last_modified'):
+            headers['If-Modified-Since'] = cached_data['last_modified']
+        return headers
+    
+    def _cache_entry_timeout(self, ttl):
+        """Hard expiry of a cache entry: fresh lifetime plus the stale window"""
+        return ttl + self.config.cache_stale_timeout
+    
+    def _is_stale(self, cached_data):
+        """Check whether a cached result has passed its soft expiry"""
+        return cached_data.get('fresh_until', float('inf')) <= time.time()
+    
+    def _revalidate_if_stale(self, cached_data, origin, endpoint, cache_key, timeout, max_retries, read_limit=None, stream_parser=None):
+        """Log a cache hit, refreshing the entry in the background if it is stale"""
+        if not self._is_stale(cached_data):
+            origin.stats.incr('cache_hits')
+            logger.info(f"Cache hit for: {cache_key}")
+            return
+        
+        origin.stats.incr('stale_hits')
+        logger.info(f"Serving stale cache for: {cache_key}")
+        
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+            
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.config.cache_refresh_workers,
+                    thread_name_prefix='cache-refresh'
+                )
+        
+        self._refresh_executor.submit(self._refresh, origin, endpoint, cache_key, timeout, max_retries, read_limit, stream_parser)
+    
+    def _refresh(self, origin, endpoint, cache_key, timeout, max_retries, read_limit, stream_parser):
+        """Refetch a stale cache entry in the background"""
+        try:
+            logger.info(f"Refreshing stale cache for: {cache_key}")
+            with upstream_scheduler.background():
+                single_flight.do(
+                    cache_key,
+                    lambda: self._fetch_and_cache(origin, endpoint, cache_key, timeout, max_retries, read_limit, stream_parser)
+                )
+        except Exception as e:
+            logger.error(f"Background refresh failed for {cache_key}: {str(e)}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+    
+    def _fetch(self, origin, endpoint, timeout, max_retries, conditional_headers=None, read_limit=None, stream_parser=None):
+        """Fetch an endpoint, racing it against the origin's mirrors when multi-origin fetching is on"""
+        mirrors = origins.mirrors_of(origin)
+        if not mirrors:
+            return self._fetch_from(origin, endpoint, timeout, max_retries, conditional_headers, read_limit, stream_parser)
+        
+        candidates = self._rank_origins([origin] + mirrors)
+        results = queue.Queue()
+        
+        def run(candidate):
+            results.put(self._fetch_from(candidate, endpoint, timeout, max_retries, conditional_headers, read_limit, stream_parser))
+        
+        def launch():
+            candidate = candidates.pop(0)
+            # Carry the request priority and deadline over to the hedging thread
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(run, candidate), name='hedged-fetch', daemon=True).start()
+            return candidate
+        
+        first_origin = launch()
+        in_flight = 1
+        failures = []
         
-        # Retry logic
+        while in_flight:
+            # Hedge to the next origin once the first one is slower than usual
+            wait = origin_health.hedge_delay(first_origin.base_url) if candidates else None
+            try:
+                result = results.get(timeout=wait)
+            except queue.Empty:
+                logger.info(f"Hedging request to {candidates[0].base_url} after {wait:.2f}s: {endpoint}")
+                launch()
+                in_flight += 1
+                continue
+            
+            in_flight -= 1
+            if result['success']:
+                return result
+            
+            failures.append(result)
+            # Fail over straight away instead of waiting for the hedge delay
+            if candidates:
+                logger.info(f"Failing over to {candidates[0].base_url}: {endpoint}")
+                launch()
+                in_flight += 1
+        
+        return failures[0]
+    
+    def _rank_origins(self, candidates):
+        """Order origins from healthiest to least healthy"""
+        order = origin_health.rank([candidate.base_url for candidate in candidates])
+        return sorted(candidates, key=lambda candidate: order.index(candidate.base_url))
+    
+    def _fetch_from(self, origin, endpoint, timeout, max_retries, conditional_headers=None, read_limit=None, stream_parser=None):
+        """Fetch an endpoint from one origin with retry logic, failing fast while its circuit is open"""
+        url = origin.url(endpoint)
+        breaker = circuit_breakers.get(origin.base_url)
+        
+        delay = 0
         for attempt in range(max_retries + 1):
+            # Don't queue for a slot on an origin that would be refused anyway
+            if breaker.state == CircuitBreaker.OPEN:
+                return self._circuit_open_result(origin, url)
+            
+            # Stop once the request's deadline leaves no time for another attempt
+            remaining = request_deadline.remaining()
+            if remaining is not None and remaining <= delay:
+                return self._deadline_exceeded_result(url)
+            
             try:
-                # Add random delay to avoid rate limiting
+                # Back off before retrying. This blocks the worker thread, as
+                # the sync path always has; _retry_delay() keeps the wait under
+                # RETRY_BACKOFF_SYNC_CAP and the request's deadline, and the
+                # async path (ASYNC_VIEWS) backs off without blocking
                 if attempt > 0:
-                    delay = min(2 ** attempt + random.random(), 10)  # Exponential backoff
                     time.sleep(delay)
                     logger.info(f"Retry attempt {attempt} for: {url}")
                 
-                logger.info(f"Making request to: {url}")
-                
-                # Rotate user agent for each attempt
-                user_agents = [
-                    'Mozilla/5.0 (X11; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0',
-                    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0'
-                ]
-                
-                headers = self.session.headers.copy()
-                headers['User-Agent'] = random.choice(user_agents)
-                headers['Accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                headers['Accept-Language'] = 'en-US,en;q=0.5'
-                headers['Accept-Encoding'] = 'gzip, deflate'
-                headers['Connection'] = 'keep-alive'
-                headers['Upgrade-Insecure-Requests'] = '1'
+                with upstream_scheduler.slot(origin):
+                    # Waiting for the slot may have used up the rest of the budget
+                    if request_deadline.remaining() == 0:
+                        return self._deadline_exceeded_result(url)
+                    
+                    if not breaker.allow_request():
+                        return self._circuit_open_result(origin, url)
+                    
+                    logger.info(f"Making request to: {url}")
+                    
+                    # Rotate user agent for each attempt
+                    session = session_pool.get()
+                    headers = self._build_headers(session.headers)
+                    if conditional_headers:
+                        headers.update(conditional_headers)
+                    
+                    started = time.monotonic()
+                    origin.stats.incr('requests')
+                    streamed = read_limit is not None or stream_parser is not None
+                    response = session.get(
+                        url,
+                        timeout=self._attempt_timeout(timeout),
+                        headers=headers,
+                        stream=streamed
+                    )
+                    body = self._read_body(response, read_limit, stream_parser) if streamed else None
                 
-                response = self.session.get(url, timeout=timeout, headers=headers)
                 response.raise_for_status()
+                self._record_success(origin, breaker, response, time.monotonic() - started, body)
                 
-                result = {
-                    'success': True,
-                    'data': response.text,
-                    'status_code': response.status_code
-                }
-                
-                # Cache the result if successful
-                if use_cache and result['success']:
-                    cache.set(cache_key, result, self.config.cache_timeout)
-                    logger.info(f"Cached result for: {cache_key}")
+                return self._build_result(response, body)
                 
-                return result
+            except UpstreamQueueTimeout:
+                return self._queue_timeout_result(origin, url)
                 
             except Timeout:
+                self._record_failure(origin, breaker)
                 logger.error(f"Request timeout for: {url} (attempt {attempt + 1}/{max_retries + 1})")
-                if attempt == max_retries:
+                delay = self._retry_delay(origin, url, attempt, max_retries, delay, cap=self.config.retry_backoff_sync_cap)
+                if delay is None:
                     return {
                         'success': False,
                         'message': 'Request timeout after multiple attempts',
@@ -99,26 +500,286 @@ class HTTPService:
                     }
                     
             except RequestException as e:
+                response = e.response
+                self._record_request_error(origin, breaker, response)
                 logger.error(f"Request failed for {url}: {str(e)} (attempt {attempt + 1}/{max_retries + 1})")
-                if attempt == max_retries:
+                # Retrying won't change a client error such as 404
+                if self._is_client_error(response):
+                    delay = None
+                else:
+                    delay = self._retry_delay(origin, url, attempt, max_retries, delay, response, self.config.retry_backoff_sync_cap)
+                if delay is None:
                     return {
                         'success': False,
                         'message': str(e),
-                        'error': 'request_error'
+                        'error': 'request_error',
+                        'status_code': response.status_code if response is not None else None
                     }
                     
             except Exception as e:
+                self._record_failure(origin, breaker)
                 logger.error(f"Unexpected error for {url}: {str(e)} (attempt {attempt + 1}/{max_retries + 1})")
-                if attempt == max_retries:
+                delay = self._retry_delay(origin, url, attempt, max_retries, delay, cap=self.config.retry_backoff_sync_cap)
+                if delay is None:
                     return {
                         'success': False,
                         'message': 'Unexpected error after multiple attempts',
                         'error': 'unexpected_error'
                     }
     
-    def get_v2(self, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3):
+    def _build_result(self, response, body=None):
+        """Build the result of a successful response, keeping its cache validators"""
+        if response.status_code == 304:
+            return {
+                'success': True,
+                'not_modified': True,
+                'status_code': response.status_code
+            }
+        
+        if body is None:
+            return self._page_result(response, response.text)
+        
+        result = self._page_result(response, self._decode(response, body.content))
+        # The page was cut short after the part the caller needs
+        result['partial'] = body.partial
+        if body.parser is not None:
+            body.parser.close(result['data'])
+        return result
+    
+    def _page_result(self, response, data):
+        return {
+            'success': True,
+            'data': data,
+            'status_code': response.status_code,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+    
+    def _read_body(self, response, read_limit, stream_parser):
+        """Read a streamed response in chunks and release the connection"""
+        try:
+            # Error pages are not read at all
+            if response.status_code >= 400:
+                return _StreamedBody(b'', False)
+            
+            chunks = response.iter_content(STREAM_CHUNK_SIZE)
+            parser = self._stream_parser(response, stream_parser)
+            if parser is not None:
+                chunks = self._feed(chunks, parser)
+            
+            if read_limit is None:
+                return _StreamedBody(b''.join(chunks), False, parser)
+            return _StreamedBody(*read_limit.read(chunks), parser)
+        finally:
+            response.close()
+    
+    async def _aread_body(self, response, read_limit, stream_parser):
+        """Async version of _read_body(); the stream context closes the response"""
+        if response.status_code >= 400:
+            return _StreamedBody(b'', False)
+    
+        chunks = response.aiter_bytes(STREAM_CHUNK_SIZE)
+        parser = self._stream_parser(response, stream_parser)
+        if parser is not None:
+            chunks = self._afeed(chunks, parser)
+        
+        if read_limit is None:
+            return _StreamedBody(b''.join([chunk async for chunk in chunks]), False, parser)
+        return _StreamedBody(*await read_limit.aread(chunks), parser)
+    
+    def _stream_parser(self, response, stream_parser):
+        """Start parsing a page that is about to be read, if the caller asked for it"""
+        if stream_parser is None or response.status_code == 304:
+            return None
+        # Without a declared encoding it is only guessed once the whole body is in
+        if not response.encoding:
+            return None
+        return stream_parser(response.encoding)
+    
+    def _feed(self, chunks, parser):
+        """Pass chunks on to the reader, parsing each one as it arrives"""
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield chunk
+    
+    async def _afeed(self, chunks, parser):
+        """Async version of _feed(), parsing in a worker thread to keep the event loop free"""
+        async for chunk in chunks:
+            await asyncio.to_thread(parser.feed, chunk)
+            yield chunk
+    
+    def _decode(self, response, content):
         """
-        Make GET request to the v2 anime website with retry logic
+        Decode a body read in chunks the way the client decodes a whole one
+        
+        Like requests' Response.text, the encoding from the headers is used
+        and guessed from the body when there is none; httpx responses always
+        have one, falling back to UTF-8.
+        """
+        encoding = response.encoding or chardet.detect(content)['encoding']
+        if encoding:
+            try:
+                return str(content, encoding, errors='replace')
+            except LookupError:
+                pass
+        return str(content, errors='replace')
+    
+    def _retry_delay(self, origin, url, attempt, max_retries, delay, response=None, cap=None):
+        """
+        Decide whether a failed attempt is retried and how long to back off first
+        
+        Backoff uses decorrelated jitter, stretched to any Retry-After the
+        origin sent. Retries are only made while the origin's retry budget
+        lasts, so a degraded origin isn't hit by a multiple of normal traffic,
+        and while the request's deadline leaves time for the retry to finish.
+        
+        Args:
+            origin (Origin): Origin the attempt was sent to
+            url (str): URL of the attempt
+            attempt (int): Number of the failed attempt, from 0
+            max_retries (int): Maximum number of retry attempts
+            delay (float): Backoff before the failed attempt in seconds
+            response: Response of the failed attempt, if any
+            cap (float): Longest backoff in seconds, RETRY_BACKOFF_CAP by default;
+                sync fetches pass the lower RETRY_BACKOFF_SYNC_CAP since they
+                hold a worker thread while they wait
+        
+        Returns:
+            float: Seconds to wait before retrying, or None to give up
+        """
+        if cap is None:
+            cap = self.config.retry_backoff_cap
+        
+        retry_after = self._retry_after(origin, url, response)
+        if attempt == max_retries:
+            return None
+        
+        if retry_after is not None and retry_after > min(cap, self.config.retry_after_max):
+            logger.warning(f"Not retrying {url}, upstream asked to wait {retry_after:.0f}s")
+            return None
+        
+        # Time left to back off in, keeping enough for the retry itself
+        window = self._retry_window(origin)
+        if window is not None and window <= (retry_after or 0):
+            logger.warning(f"Not retrying {url}, too little time left before the request deadline")
+            return None
+        
+        if not origin.retry_budget.withdraw():
+            origin.stats.incr('retry_budget_exhausted')
+            logger.warning(f"Retry budget of {origin.base_url} exhausted, not retrying: {url}")
+            return None
+        
+        origin.stats.incr('retries')
+        base = self.config.retry_backoff_base
+        delay = max(min(cap, random.uniform(base, max(delay, base) * 3)), retry_after or 0)
+        return delay if window is None else min(delay, window)
+    
+    def _retry_window(self, origin):
+        """Get the seconds a retry may back off before the deadline, or None without a deadline"""
+        remaining = request_deadline.remaining()
+        if remaining is None:
+            return None
+        return remaining - origin_health.expected_latency(origin.base_url)
+    
+    def _retry_after(self, origin, url, response):
+        """
+        Get how long a rate-limited or unavailable origin asked us to wait
+        
+        The wait also pauses the origin's scheduler, so other requests to it
+        hold back too.
+        
+        Returns:
+            float: Seconds from the Retry-After header, or None if there is none
+        """
+        if response is None or response.status_code not in (429, 503):
+            return None
+        
+        if response.status_code == 429:
+            origin.stats.incr('rate_limited')
+        
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        
+        seconds = max(0.0, seconds)
+        logger.warning(f"Upstream {origin.base_url} asked to wait {seconds:.0f}s: {url}")
+        upstream_scheduler.throttle(origin, min(seconds, self.config.retry_after_max))
+        return seconds
+    
+    def _is_client_error(self, response):
+        """Check whether an error response is a client error other than 429"""
+        return response is not None and response.status_code < 500 and response.status_code != 429
+    
+    def _record_success(self, origin, breaker, response, latency, body=None):
+        """Count a successful request towards the origin's circuit, health and stats"""
+        breaker.record_success()
+        origin_health.record_success(origin.base_url, latency)
+        origin.retry_budget.deposit()
+        origin.stats.incr('successes')
+        if response.status_code == 304:
+            origin.stats.incr('not_modified')
+        else:
+            origin.stats.incr('bytes_received', len(response.content if body is None else body.content))
+    
+    def _record_failure(self, origin, breaker):
+        """Count a failed request towards the origin's circuit, health and stats"""
+        breaker.record_failure()
+        origin_health.record_failure(origin.base_url)
+        origin.stats.incr('failures')
+    
+    def _record_request_error(self, origin, breaker, response):
+        """Count a failed request against the origin's circuit and health"""
+        # Client errors such as 404 mean the origin is up; only 5xx, 429 and
+        # connection-level errors count towards opening the circuit
+        if self._is_client_error(response):
+            breaker.record_success()
+            origin.stats.incr('failures')
+        else:
+            self._record_failure(origin, breaker)
+    
+    def _circuit_open_result(self, origin, url):
+        """Result returned without contacting an origin whose circuit is open"""
+        logger.warning(f"Circuit open for {origin.base_url}, failing fast: {url}")
+        return {
+            'success': False,
+            'message': f'Upstream {origin.base_url} is unavailable, circuit open',
+            'error': 'circuit_open'
+        }
+    
+    def _attempt_timeout(self, timeout):
+        """Get the (connect, read) timeouts of an attempt within the request's deadline"""
+        read_timeout = request_deadline.clamp(timeout)
+        return min(self.config.connect_timeout, read_timeout), read_timeout
+    
+    def _deadline_exceeded_result(self, url):
+        """Result returned when the request's latency budget has run out"""
+        logger.warning(f"Request deadline exceeded, giving up: {url}")
+        return {
+            'success': False,
+            'message': 'Request deadline exceeded',
+            'error': 'deadline_exceeded'
+        }
+    
+    def _queue_timeout_result(self, origin, url):
+        """Result returned when the request waited too long for an upstream slot"""
+        logger.warning(f"Upstream {origin.base_url} busy, gave up queueing: {url}")
+        return {
+            'success': False,
+            'message': f'Upstream {origin.base_url} is busy, too many requests queued',
+            'error': 'queue_timeout'
+        }
+    
+    async def aget(self, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3, read_limit=None, stream_parser=None):
+        """
+        Asynchronous counterpart of get() using a pooled keep-alive client
         
         Args:
             endpoint (str): API endpoint
@@ -126,94 +787,344 @@ class HTTPService:
             cache_key (str): Custom cache key
             timeout (int): Request timeout in seconds
             max_retries (int): Maximum number of retry attempts
+            read_limit (ReadLimit): Stop reading the page once this limit is reached
+            stream_parser (callable): Parse the page while it downloads, see DocumentCache.feed_parser()
             
         Returns:
             dict: Response data with success flag
         """
-        if timeout is None:
-            timeout = self.config.timeout
+        return await self.afetch('primary', endpoint, use_cache, cache_key, timeout, max_retries, read_limit, stream_parser)
+    
+    async def aget_v2(self, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3, read_limit=None, stream_parser=None):
+        """
+        Asynchronous counterpart of get_v2() using a pooled keep-alive client
+        
+        Args:
+            endpoint (str): API endpoint
+            use_cache (bool): Whether to use caching
+            cache_key (str): Custom cache key
+            timeout (int): Request timeout in seconds
+            max_retries (int): Maximum number of retry attempts
+            read_limit (ReadLimit): Stop reading the page once this limit is reached
+            stream_parser (callable): Parse the page while it downloads, see DocumentCache.feed_parser()
             
-        url = f"{self.config.base_url_v2}{endpoint}"
+        Returns:
+            dict: Response data with success flag
+        """
+        return await self.afetch('mirror', endpoint, use_cache, cache_key, timeout, max_retries, read_limit, stream_parser)
+    
+    async def afetch(self, origin, endpoint, use_cache=True, cache_key=None, timeout=None, max_retries=3, read_limit=None, stream_parser=None):
+        """
+        Asynchronous counterpart of fetch() using a pooled keep-alive client
+        
+        Args:
+            origin (str): Origin name: 'primary', 'mirror' or 'provider'
+            endpoint (str): API endpoint
+            use_cache (bool): Whether to use caching
+            cache_key (str): Custom cache key
+            timeout (int): Request timeout in seconds, defaults to the origin's
+            max_retries (int): Maximum number of retry attempts
+            read_limit (ReadLimit): Stop reading the page once this limit is reached
+            stream_parser (callable): Parse the page while it downloads, see DocumentCache.feed_parser()
+            
+        Returns:
+            dict: Response data with success flag
+        """
+        origin = origins.get(origin)
+        if timeout is None:
+            timeout = origin.timeout
         
         # Use caching if enabled
         if use_cache:
             if cache_key is None:
-                cache_key = f"anime_api_v2:{endpoint}"
+                cache_key = self._cache_key(origin, endpoint, read_limit)
             
-            cached_data = cache.get(cache_key)
+            cached_data = await aget_cached(cache_key)
             if cached_data:
-                logger.info(f"Cache hit for: {cache_key}")
+                # The background refresh runs on the sync client in a worker thread
+                self._revalidate_if_stale(cached_data, origin, endpoint, cache_key, timeout, max_retries, read_limit, stream_parser)
                 return cached_data
+            
+            origin.stats.incr('cache_misses')
+            # Concurrent misses for the same key share one upstream fetch
+            return await single_flight.ado(
+                cache_key,
+                lambda: self._afetch_and_cache(origin, endpoint, cache_key, timeout, max_retries, read_limit, stream_parser)
+            )
+        
+        return await self._afetch(origin, endpoint, timeout, max_retries, read_limit=read_limit, stream_parser=stream_parser)
+    
+    async def aget_many(self, endpoints, origin='primary', use_cache=True, timeout=None, max_retries=3):
+        """
+        Asynchronous counterpart of get_many()
+        
+        Like get_many(), it fetches at most as many misses at a time as the
+        origin's in-flight limit allows.
+        
+        Args:
+            endpoints (list): API endpoints
+            origin (str): Origin name: 'primary', 'mirror' or 'provider'
+            use_cache (bool): Whether to use caching
+            timeout (int): Request timeout in seconds, defaults to the origin's
+            max_retries (int): Maximum number of retry attempts
+        
+        Returns:
+            list: Response data with success flag for each endpoint, in input order
+        """
+        origin = origins.get(origin)
+        if timeout is None:
+            timeout = origin.timeout
+        
+        results = await self._aget_many_cached(origin, endpoints, timeout, max_retries) if use_cache else {}
+        misses = [endpoint for endpoint in dict.fromkeys(endpoints) if endpoint not in results]
+        
+        # Start only as many fetches as the origin takes at once; the rest
+        # would queue for a slot and time out there
+        semaphore = asyncio.Semaphore(max(1, origin.max_in_flight))
+        
+        async def fetch_one(endpoint):
+            async with semaphore:
+                return await self._afetch_one(origin, endpoint, use_cache, timeout, max_retries)
+        
+        fetched = await asyncio.gather(*(fetch_one(endpoint) for endpoint in misses))
+        results.update(zip(misses, fetched))
+        
+        return [results[endpoint] for endpoint in endpoints]
+    
+    async def _aget_many_cached(self, origin, endpoints, timeout, max_retries):
+        """Async version of _get_many_cached()"""
+        keys = {origin.cache_key(endpoint): endpoint for endpoint in endpoints}
+        cached = await aget_many_cached(list(keys))
+        
+        results = {}
+        for cache_key, cached_data in cached.items():
+            if cached_data:
+                endpoint = keys[cache_key]
+                self._revalidate_if_stale(cached_data, origin, endpoint, cache_key, timeout, max_retries)
+                results[endpoint] = cached_data
+        return results
+    
+    async def _afetch_one(self, origin, endpoint, use_cache, timeout, max_retries):
+        """Async version of _fetch_one()"""
+        try:
+            if not use_cache:
+                return await self._afetch(origin, endpoint, timeout, max_retries)
+            
+            cache_key = origin.cache_key(endpoint)
+            origin.stats.incr('cache_misses')
+            return await single_flight.ado(
+                cache_key,
+                lambda: self._afetch_and_cache(origin, endpoint, cache_key, timeout, max_retries)
+            )
+        except Exception as e:
+            logger.error(f"Bulk fetch failed for {origin.url(endpoint)}: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'error': 'unexpected_error'
+            }
+    
+    async def _afetch_and_cache(self, origin, endpoint, cache_key, timeout, max_retries, read_limit=None, stream_parser=None):
+        """Async version of _fetch_and_cache()"""
+        # Another worker may have refreshed the entry while we waited for the lock
+        cached_data = await aget_cached(cache_key)
+        if cached_data and not self._is_stale(cached_data):
+            logger.info(f"Cache hit for: {cache_key}")
+            return cached_data
+        
+        # Revalidate a stale copy instead of downloading the page again
+        conditional_headers = self._conditional_headers(cached_data)
+        result = await self._afetch(origin, endpoint, timeout, max_retries, conditional_headers, read_limit, stream_parser)
+        
+        result, cache_timeout = self._prepare_cache_entry(result, cached_data, origin, endpoint, cache_key)
+        if cache_timeout:
+            await cache.aset(cache_key, result, cache_timeout)
         
-        # Retry logic
+        return result
+    
+    async def _afetch(self, origin, endpoint, timeout, max_retries, conditional_headers=None, read_limit=None, stream_parser=None):
+        """Async version of _fetch()"""
+        mirrors = origins.mirrors_of(origin)
+        if not mirrors:
+            return await self._afetch_from(origin, endpoint, timeout, max_retries, conditional_headers, read_limit, stream_parser)
+        
+        candidates = self._rank_origins([origin] + mirrors)
+        
+        def launch():
+            candidate = candidates.pop(0)
+            task = asyncio.create_task(
+                self._afetch_from(candidate, endpoint, timeout, max_retries, conditional_headers, read_limit, stream_parser)
+            )
+            # Losing requests finish in the background; keep them referenced
+            self._hedge_tasks.add(task)
+            task.add_done_callback(self._hedge_tasks.discard)
+            return task
+        
+        first_origin = candidates[0]
+        pending = {launch()}
+        failures = []
+        
+        while pending:
+            # Hedge to the next origin once the first one is slower than usual
+            wait = origin_health.hedge_delay(first_origin.base_url) if candidates else None
+            done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"Hedging request to {candidates[0].base_url} after {wait:.2f}s: {endpoint}")
+                pending.add(launch())
+                continue
+            
+            for task in done:
+                result = task.result()
+                if result['success']:
+                    return result
+                failures.append(result)
+                # Fail over straight away instead of waiting for the hedge delay
+                if candidates:
+                    logger.info(f"Failing over to {candidates[0].base_url}: {endpoint}")
+                    pending.add(launch())
+        
+        return failures[0]
+    
+    async def _afetch_from(self, origin, endpoint, timeout, max_retries, conditional_headers=None, read_limit=None, stream_parser=None):
+        """Fetch an endpoint from one origin with retry logic using its pooled async client"""
+        url = origin.url(endpoint)
+        client = self._get_async_client(origin)
+        breaker = circuit_breakers.get(origin.base_url)
+        
+        delay = 0
         for attempt in range(max_retries + 1):
+            # Don't queue for a slot on an origin that would be refused anyway
+            if breaker.state == CircuitBreaker.OPEN:
+                return self._circuit_open_result(origin, url)
+            
+            # Stop once the request's deadline leaves no time for another attempt
+            remaining = request_deadline.remaining()
+            if remaining is not None and remaining <= delay:
+                return self._deadline_exceeded_result(url)
+            
+            allowed = False
             try:
-                # Add random delay to avoid rate limiting
+                # Back off without holding the event loop
                 if attempt > 0:
-                    delay = min(2 ** attempt + random.random(), 10)  # Exponential backoff
-                    time.sleep(delay)
+                    await asyncio.sleep(delay)
                     logger.info(f"Retry attempt {attempt} for: {url}")
                 
-                logger.info(f"Making request to: {url}")
-                
-                # Rotate user agent for each attempt
-                user_agents = [
-                    'Mozilla/5.0 (X11; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0',
-                    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0'
-                ]
-                
-                headers = self.session.headers.copy()
-                headers['User-Agent'] = random.choice(user_agents)
-                headers['Accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                headers['Accept-Language'] = 'en-US,en;q=0.5'
-                headers['Accept-Encoding'] = 'gzip, deflate'
-                headers['Connection'] = 'keep-alive'
-                headers['Upgrade-Insecure-Requests'] = '1'
+                async with upstream_scheduler.aslot(origin):
+                    # Waiting for the slot may have used up the rest of the budget
+                    if request_deadline.remaining() == 0:
+                        return self._deadline_exceeded_result(url)
+                    
+                    allowed = breaker.allow_request()
+                    if not allowed:
+                        return self._circuit_open_result(origin, url)
+                    
+                    logger.info(f"Making async request to: {url}")
+                    
+                    headers = self._build_headers(client.headers)
+                    if conditional_headers:
+                        headers.update(conditional_headers)
+                    
+                    started = time.monotonic()
+                    origin.stats.incr('requests')
+                    connect_timeout, read_timeout = self._attempt_timeout(timeout)
+                    request_timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+                    if read_limit is None and stream_parser is None:
+                        response = await client.get(url, timeout=request_timeout, headers=headers)
+                        body = None
+                    else:
+                        async with client.stream('GET', url, timeout=request_timeout, headers=headers) as response:
+                            body = await self._aread_body(response, read_limit, stream_parser)
                 
-                response = self.session.get(url, timeout=timeout, headers=headers)
-                response.raise_for_status()
+                # httpx treats every non-2xx status, including 304, as an error
+                if response.status_code != 304:
+                    response.raise_for_status()
+                self._record_success(origin, breaker, response, time.monotonic() - started, body)
                 
-                result = {
-                    'success': True,
-                    'data': response.text,
-                    'status_code': response.status_code
-                }
+                return self._build_result(response, body)
                 
-                # Cache the result if successful
-                if use_cache and result['success']:
-                    cache.set(cache_key, result, self.config.cache_timeout)
-                    logger.info(f"Cached result for: {cache_key}")
+            except asyncio.CancelledError:
+                # A cancelled trial request would otherwise keep the circuit half-open for good
+                if allowed:
+                    breaker.release_trial()
+                raise
                 
-                return result
+            except UpstreamQueueTimeout:
+                return self._queue_timeout_result(origin, url)
                 
-            except Timeout:
+            except httpx.TimeoutException:
+                self._record_failure(origin, breaker)
                 logger.error(f"Request timeout for: {url} (attempt {attempt + 1}/{max_retries + 1})")
-                if attempt == max_retries:
+                delay = self._retry_delay(origin, url, attempt, max_retries, delay)
+                if delay is None:
                     return {
                         'success': False,
                         'message': 'Request timeout after multiple attempts',
                         'error': 'timeout'
                     }
                     
-            except RequestException as e:
+            except httpx.HTTPError as e:
+                response = getattr(e, 'response', None)
+                self._record_request_error(origin, breaker, response)
                 logger.error(f"Request failed for {url}: {str(e)} (attempt {attempt + 1}/{max_retries + 1})")
-                if attempt == max_retries:
+                # Retrying won't change a client error such as 404
+                if self._is_client_error(response):
+                    delay = None
+                else:
+                    delay = self._retry_delay(origin, url, attempt, max_retries, delay, response)
+                if delay is None:
                     return {
                         'success': False,
                         'message': str(e),
-                        'error': 'request_error'
+                        'error': 'request_error',
+                        'status_code': response.status_code if response is not None else None
                     }
                     
             except Exception as e:
+                self._record_failure(origin, breaker)
                 logger.error(f"Unexpected error for {url}: {str(e)} (attempt {attempt + 1}/{max_retries + 1})")
-                if attempt == max_retries:
+                delay = self._retry_delay(origin, url, attempt, max_retries, delay)
+                if delay is None:
                     return {
                         'success': False,
                         'message': 'Unexpected error after multiple attempts',
                         'error': 'unexpected_error'
                     }
+    
+    def _get_async_client(self, origin):
+        """
+        Get the pooled keep-alive client for an origin on the running event loop
+        
+        Clients live as long as their loop, which is the whole process under
+        ASGI. That's why ASYNC_VIEWS is refused under WSGI, where every request
+        runs on a new loop.
+        """
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.setdefault(loop, {})
+        
+        client = clients.get(origin.name)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=origin.max_connections,
+                max_keepalive_connections=origin.max_keepalive_connections,
+                keepalive_expiry=self.config.async_keepalive_expiry
+            )
+            client = httpx.AsyncClient(
+                headers=self.config.headers,
+                limits=limits,
+                transport=CachedDNSTransport(limits),
+                follow_redirects=True
+            )
+            clients[origin.name] = client
+            logger.info(f"Opened async connection pool for: {origin.base_url}")
+        
+        return client
+    
+    async def aclose(self):
+        """Close the async connection pools owned by the running event loop"""
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
 
 # Global HTTP service instance
 http_service = HTTPService()
\ No newline at end of file
@@ -0,0 +1,142 @@
+from collections import deque
+import math
+import threading
+from .config import config
+from .circuit_breaker import CircuitBreaker, circuit_breakers
+
+# Latency samples kept per origin for percentile estimates
+LATENCY_WINDOW = 100
+
+# Samples needed before the observed p95 is trusted as hedge delay
+MIN_LATENCY_SAMPLES = 10
+
+# Hedge delay used until enough samples have been observed, in seconds
+DEFAULT_HEDGE_DELAY = 1.0
+
+# Request duration assumed until enough samples have been observed, in seconds
+DEFAULT_LATENCY = 1.0
+
+class _OriginStats:
+    """Recent latency and success rate of one origin"""
+    
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.success_rate = 1.0
+
+class OriginHealth:
+    """
+    Tracks recent latency and health of upstream origins
+    
+    Used by multi-origin fetching to decide which mirror to try first and how
+    long to wait for it before hedging the request to another mirror.
+    """
+    
+    # Weight of the newest result in the success rate moving average
+    SUCCESS_RATE_ALPHA = 0.2
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._stats = {}
+    
+    def record_success(self, origin, latency):
+        """Record a successful request and how long it took in seconds"""
+        with self._lock:
+            stats = self._get_stats(origin)
+            stats.latencies.append(latency)
+            stats.success_rate += self.SUCCESS_RATE_ALPHA * (1 - stats.success_rate)
+    
+    def record_failure(self, origin):
+        """Record a failed request"""
+        with self._lock:
+            stats = self._get_stats(origin)
+            stats.success_rate -= self.SUCCESS_RATE_ALPHA * stats.success_rate
+    
+    def percentile(self, origin, percent):
+        """
+        Get a latency percentile of an origin
+        
+        Args:
+            origin (str): Origin base URL
+            percent (float): Percentile between 0 and 100
+        
+        Returns:
+            float: Latency in seconds, or None without enough samples
+        """
+        with self._lock:
+            stats = self._stats.get(origin)
+            if stats is None or len(stats.latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            latencies = sorted(stats.latencies)
+        
+        index = min(len(latencies) - 1, math.ceil(percent / 100 * len(latencies)) - 1)
+        return latencies[max(index, 0)]
+    
+    def hedge_delay(self, origin):
+        """
+        Get how long to wait for an origin before hedging to a mirror
+        
+        Uses HEDGE_DELAY when set, otherwise the origin's observed p95 latency.
+        """
+        if self.config.hedge_delay > 0:
+            return self.config.hedge_delay
+        
+        p95 = self.percentile(origin, 95)
+        return DEFAULT_HEDGE_DELAY if p95 is None else p95
+    
+    def expected_latency(self, origin):
+        """Get how long a request to an origin usually takes: its median latency in seconds"""
+        p50 = self.percentile(origin, 50)
+        return DEFAULT_LATENCY if p50 is None else p50
+    
+    def rank(self, origins):
+        """
+        Order origins from healthiest to least healthy
+        
+        Origins whose circuit is open go last, preceded by origins failing most
+        of their recent requests. The rest are ordered by median latency scaled
+        by their recent success rate; origins without enough samples keep their
+        given order after the measured ones.
+        
+        Args:
+            origins (list): Origin base URLs, preferred origin first
+        
+        Returns:
+            list: The origins in the order they should be tried
+        """
+        def score(item):
+            position, origin = item
+            circuit_open = circuit_breakers.get(origin).state == CircuitBreaker.OPEN
+            with self._lock:
+                stats = self._stats.get(origin)
+                success_rate = stats.success_rate if stats else 1.0
+            unhealthy = success_rate < 0.5
+            median = self.percentile(origin, 50)
+            if median is None:
+                return (circuit_open, unhealthy, math.inf, position)
+            return (circuit_open, unhealthy, median / max(success_rate, 0.05), position)
+        
+        return [origin for _, origin in sorted(enumerate(origins), key=score)]
+    
+    def snapshot(self):
+        """Get the recent latency and success rate of every known origin"""
+        with self._lock:
+            origins = list(self._stats)
+        
+        return {
+            origin: {
+                'p50': self.percentile(origin, 50),
+                'p95': self.percentile(origin, 95),
+                'success_rate': round(self._stats[origin].success_rate, 3)
+            }
+            for origin in origins
+        }
+    
+    def _get_stats(self, origin):
+        stats = self._stats.get(origin)
+        if stats is None:
+            stats = self._stats[origin] = _OriginStats()
+        return stats
+
+# Global origin health instance
+origin_health = OriginHealth()
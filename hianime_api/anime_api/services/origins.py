@@ -0,0 +1,167 @@
+import re
+import threading
+from .circuit_breaker import circuit_breakers
+from .config import config
+from .origin_health import origin_health
+from .retry_budget import RetryBudget
+from .upstream_scheduler import upstream_scheduler
+
+# Upstream request counters kept per origin
+STAT_NAMES = (
+    'cache_hits',
+    'stale_hits',
+    'cache_misses',
+    'requests',
+    'successes',
+    'failures',
+    'not_modified',
+    'bytes_received',
+    # Sync connection pool (see SessionPool)
+    'connections_opened',
+    'connections_reused',
+    'connections_discarded',
+    'pool_exhausted',
+    # Retries (see RetryBudget)
+    'retries',
+    'retry_budget_exhausted',
+    'rate_limited',
+)
+
+class OriginStats:
+    """Thread-safe counters of one origin's traffic"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(STAT_NAMES, 0)
+    
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+    
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+class Origin:
+    """
+    An upstream site the API fetches pages from, with its own settings
+    
+    Options not given fall back to the global settings, so an origin only
+    needs to list what differs (see UPSTREAM_ORIGIN_OPTIONS).
+    """
+    
+    def __init__(self, name, base_url, cache_prefix, mirror_group=None, **options):
+        self.name = name
+        self.base_url = base_url
+        self.cache_prefix = cache_prefix
+        # Origins in the same group serve the same pages and can stand in for each other
+        self.mirror_group = mirror_group
+        self.timeout = options.get('timeout', config.timeout)
+        self.cache_timeout = options.get('cache_timeout', config.cache_timeout)
+        self.ttl_policy = options.get('ttl_policy', config.cache_ttl_policy)
+        self.max_connections = options.get('max_connections', config.async_max_connections)
+        self.max_keepalive_connections = options.get(
+            'max_keepalive_connections', config.async_max_keepalive_connections
+        )
+        self.pool_maxsize = options.get('pool_maxsize', config.http_pool_maxsize)
+        self.pool_block = options.get('pool_block', config.http_pool_block)
+        self.rate_limit = options.get('rate_limit', config.upstream_rate_limit)
+        self.burst = options.get('burst', config.upstream_burst)
+        self.max_in_flight = options.get('max_in_flight', config.upstream_max_in_flight)
+        self.retry_budget = RetryBudget(
+            options.get('retry_budget_ratio', config.retry_budget_ratio),
+            options.get('retry_budget_max', config.retry_budget_max)
+        )
+        self.stats = OriginStats()
+    
+    def __repr__(self):
+        return f"Origin({self.name!r}, {self.base_url!r})"
+    
+    def url(self, endpoint):
+        """Get the absolute URL of an endpoint on this origin"""
+        return f"{self.base_url}{endpoint}"
+    
+    def cache_key(self, endpoint):
+        """Get the default cache key of an endpoint on this origin"""
+        return f"{self.cache_prefix}:{endpoint}"
+    
+    def cache_timeout_for(self, endpoint):
+        """
+        Get the cache lifetime of an endpoint from the origin's TTL policy
+        
+        Args:
+            endpoint (str): Upstream endpoint, e.g. '/home'
+        
+        Returns:
+            int: Cache timeout in seconds
+        """
+        for pattern, timeout in self.ttl_policy:
+            if re.search(pattern, endpoint):
+                return timeout
+        return self.cache_timeout
+
+class OriginRegistry:
+    """
+    Registry of the upstream origins
+    
+    'primary' is ANIME_API_BASE_URL, 'mirror' is ANIME_API_BASE_URL_V2 and
+    'provider' is ANIME_API_PROVIDERS. The primary and the mirror serve the
+    same site, so multi-origin fetching may send a request for one to the
+    other. Origins are built on first use, once settings are loaded.
+    """
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._origins = None
+    
+    def get(self, name):
+        """Get an origin by name"""
+        try:
+            return self._get_origins()[name]
+        except KeyError:
+            raise ValueError(f"Unknown upstream origin: {name}")
+    
+    def all(self):
+        """Get every origin"""
+        return list(self._get_origins().values())
+    
+    def mirrors_of(self, origin):
+        """Get the other origins serving the same pages, if multi-origin fetching is on"""
+        if not self.config.multi_origin_fetch or origin.mirror_group is None:
+            return []
+        
+        return [
+            other for other in self._get_origins().values()
+            if other is not origin and other.mirror_group == origin.mirror_group
+        ]
+    
+    def stats(self):
+        """Get traffic counters, health and scheduling state of every origin"""
+        health = origin_health.snapshot()
+        return {
+            origin.name: {
+                'circuit': circuit_breakers.get(origin.base_url).state,
+                'health': health.get(origin.base_url),
+                'scheduler': upstream_scheduler.state(origin),
+                'retry_budget': round(origin.retry_budget.tokens, 1),
+                **origin.stats.snapshot()
+            }
+            for origin in self.all()
+        }
+    
+    def _get_origins(self):
+        with self._lock:
+            if self._origins is None:
+                options = self.config.origin_options
+                self._origins = {
+                    origin.name: origin for origin in [
+                        Origin('primary', self.config.base_url, 'anime_api', 'site', **options.get('primary', {})),
+                        Origin('mirror', self.config.base_url_v2, 'anime_api_v2', 'site', **options.get('mirror', {})),
+                        Origin('provider', self.config.providers_url, 'anime_api_provider', **options.get('provider', {})),
+                    ]
+                }
+            return self._origins
+
+# Global origin registry instance
+origins = OriginRegistry()
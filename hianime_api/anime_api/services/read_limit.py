@@ -0,0 +1,156 @@
+import re
+
+# Bytes read from a streamed upstream response at a time
+STREAM_CHUNK_SIZE = 16384
+
+# Markup tokens as an HTML parser would see them. Comments, scripts and
+# styles are single tokens, so tags inside them don't count; one that hasn't
+# been closed yet runs to the end of what has arrived.
+TOKEN_PATTERN = re.compile(
+    rb'<!--.*?(?:-->|\Z)'
+    rb'|<(?P<raw>script|style)\b[^>]*>(?P<text>.*?)(?P<end></(?P=raw)\s*>|\Z)'
+    rb'|<(?P<close>/?)(?P<tag>[a-zA-Z][\w:-]*)(?P<attrs>[^>]*)>',
+    re.IGNORECASE | re.DOTALL
+)
+CLASS_PATTERN = re.compile(rb'''(?:^|\s)class\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.IGNORECASE)
+
+# Elements that never have a closing tag
+VOID_TAGS = frozenset((
+    b'area', b'base', b'br', b'col', b'embed', b'hr', b'img', b'input',
+    b'link', b'meta', b'source', b'track', b'wbr'
+))
+
+class ReadLimit:
+    """
+    Point at which a streamed upstream read may stop
+    
+    Extractors that only need the start of a page declare one of these. The
+    body is read in chunks and the connection released as soon as the stop
+    condition is met or max_bytes have been read, whichever is first. When
+    neither happens the whole page is read, so a missing marker never loses
+    data.
+    
+    Pages read this way are cached under their own key (the page key plus
+    the limit's name), apart from the full page.
+    """
+    
+    def __init__(self, name, until=None, max_bytes=None):
+        """
+        Args:
+            name (str): Short name distinguishing the partial page in the cache
+            until (bytes, re.Pattern or callable): Stop once this marker or bytes
+                pattern is found, or once this function returns True for the
+                body read so far (see page_read())
+            max_bytes (int): Stop once at least this many bytes have arrived
+        """
+        self.name = name
+        if isinstance(until, bytes):
+            until = re.compile(re.escape(until))
+        if isinstance(until, re.Pattern):
+            until = until.search
+        self.until = until
+        self.max_bytes = max_bytes
+    
+    def __repr__(self):
+        return f"ReadLimit({self.name!r})"
+    
+    @property
+    def cache_suffix(self):
+        return f"until:{self.name}"
+    
+    def read(self, chunks):
+        """
+        Read chunks until the limit is reached
+        
+        Args:
+            chunks: Iterable of decoded body chunks as bytes
+        
+        Returns:
+            tuple: (body bytes, whether the read stopped before the end)
+        """
+        body = bytearray()
+        for chunk in chunks:
+            body += chunk
+            if self._reached(body):
+                return bytes(body), True
+        return bytes(body), False
+    
+    async def aread(self, chunks):
+        """Async version of read() taking an async iterable of chunks"""
+        body = bytearray()
+        async for chunk in chunks:
+            body += chunk
+            if self._reached(body):
+                return bytes(body), True
+        return bytes(body), False
+    
+    def _reached(self, body):
+        if self.max_bytes is not None and len(body) >= self.max_bytes:
+            return True
+        return self.until is not None and bool(self.until(body))
+    
+def page_read(classes=(), tags=(), script=None):
+    """
+    Build a stop condition met once the given parts of a page have arrived
+    
+    The body is tokenized the way an HTML parser would, so markers inside
+    scripts, styles, comments or attribute values are not mistaken for the
+    elements themselves.
+    
+    Args:
+        classes (tuple): Class names whose first element must have been read
+            up to its closing tag
+        tags (tuple): Tag names whose first opening tag must have arrived
+        script (re.Pattern): Bytes pattern an inline script must match; the
+            first matching script must have been read up to its closing tag
+    
+    Returns:
+        callable: Function taking the body read so far, for ReadLimit(until=...)
+    """
+    classes = frozenset(name.encode() for name in classes)
+    tags = frozenset(name.encode() for name in tags)
+    
+    def reached(body):
+        pending_classes = set(classes)
+        pending_tags = set(tags)
+        script_read = script is None
+        # [tag name, depth] of the elements being read to their closing tag
+        open_elements = []
+        
+        for token in TOKEN_PATTERN.finditer(body):
+            if token.group('raw') is not None:
+                if not script_read and token.group('end') and script.search(token.group('text')):
+                    script_read = True
+            elif token.group('tag') is not None:
+                name = token.group('tag').lower()
+                if token.group('close'):
+                    for element in open_elements:
+                        if element[0] == name:
+                            element[1] -= 1
+                    open_elements = [element for element in open_elements if element[1] > 0]
+                else:
+                    pending_tags.discard(name)
+                    has_content = name not in VOID_TAGS and not token.group('attrs').rstrip().endswith(b'/')
+                    if has_content:
+                        for element in open_elements:
+                            if element[0] == name:
+                                element[1] += 1
+                    
+                    found = pending_classes.intersection(_classes(token.group('attrs')))
+                    if found:
+                        pending_classes -= found
+                        if has_content:
+                            open_elements.append([name, 1])
+            
+            if script_read and not pending_classes and not pending_tags and not open_elements:
+                return True
+        return False
+    
+    return reached
+
+def _classes(attrs):
+    """Get the class names set by a start tag's attributes"""
+    match = CLASS_PATTERN.search(attrs)
+    if not match:
+        return ()
+    return next(value for value in match.groups() if value is not None).split()
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+import contextvars
+import time
+
+# Monotonic time by which the current request must be answered
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+class RequestDeadline:
+    """
+    Latency budget of the API request being served
+    
+    Views open a scope with their budget; upstream fetches made inside it
+    derive their timeouts, retries and backoff from the time that is left.
+    The deadline follows the request into hedging threads and asyncio tasks
+    but not into background refreshes, which are not waited on.
+    """
+    
+    @contextmanager
+    def scope(self, seconds):
+        """
+        Bound the enclosed code by a deadline seconds from now
+        
+        A scope never extends an enclosing deadline.
+        
+        Args:
+            seconds (float): Latency budget in seconds, None for no deadline
+        """
+        deadline = _deadline.get()
+        if seconds is not None:
+            new_deadline = time.monotonic() + seconds
+            deadline = new_deadline if deadline is None else min(deadline, new_deadline)
+        
+        token = _deadline.set(deadline)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+    
+    def remaining(self):
+        """Get the seconds left before the deadline, or None without a deadline"""
+        deadline = _deadline.get()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+    
+    def clamp(self, timeout):
+        """Limit a timeout in seconds to the time left before the deadline"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return min(timeout, remaining)
+
+# Global request deadline instance
+request_deadline = RequestDeadline()
@@ -0,0 +1,42 @@
+import threading
+
+class RetryBudget:
+    """
+    Token bucket limiting an origin's retries to a share of its successes
+    
+    Every successful request deposits ratio tokens and every retry withdraws
+    one, so over time retries stay below ratio times the successful
+    requests. The bucket holds at most max_tokens and starts full, which
+    lets a few retries through before any request has succeeded. When an
+    origin degrades, successes dry up and so do retries, instead of every
+    failing request multiplying the load on it.
+    """
+    
+    def __init__(self, ratio, max_tokens):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._tokens = float(max_tokens)
+    
+    @property
+    def tokens(self):
+        with self._lock:
+            return self._tokens
+    
+    def deposit(self):
+        """Credit the budget for a successful request"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+    
+    def withdraw(self):
+        """
+        Take a token for a retry
+        
+        Returns:
+            bool: Whether the retry is within budget
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
@@ -0,0 +1,140 @@
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager
+import logging
+import requests
+import threading
+from .config import config
+from .dns_cache import dns_cache
+from .origins import origins
+
+logger = logging.getLogger(__name__)
+
+class _CachedDNSConnectionMixin:
+    """Opens the connection's socket to the host's address from the DNS cache"""
+    
+    def _new_conn(self):
+        # The host name is also used for TLS, so it is only swapped for the connect
+        dns_host = self._dns_host
+        self._dns_host = dns_cache.address(dns_host, self.port)
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+
+class _CachedDNSHTTPConnection(_CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+class _CachedDNSHTTPSConnection(_CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+class _CountingPoolMixin:
+    """Counts how a connection pool's connections are used in its origin's stats"""
+    
+    stats = None
+    
+    def _new_conn(self):
+        self.stats.incr('connections_opened')
+        return super()._new_conn()
+    
+    def _get_conn(self, timeout=None):
+        # Every pooled connection is checked out, so a new one is opened
+        if self.pool is not None and self.pool.empty():
+            self.stats.incr('pool_exhausted')
+        
+        conn = super()._get_conn(timeout)
+        if getattr(conn, 'sock', None) is not None:
+            self.stats.incr('connections_reused')
+        return conn
+    
+    def _put_conn(self, conn):
+        # A full pool closes the connection instead of keeping it for reuse
+        if conn is not None and self.pool is not None and self.pool.full():
+            self.stats.incr('connections_discarded')
+        super()._put_conn(conn)
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    ConnectionCls = _CachedDNSHTTPConnection
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = _CachedDNSHTTPSConnection
+
+class _CountingPoolManager(PoolManager):
+    """PoolManager whose pools report to one origin's stats"""
+    
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+    
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.stats = self.stats
+        return pool
+
+class _OriginAdapter(HTTPAdapter):
+    """HTTPAdapter with a connection pool sized for one origin"""
+    
+    def __init__(self, origin):
+        self._stats = origin.stats
+        super().__init__(
+            pool_connections=1,
+            pool_maxsize=origin.pool_maxsize,
+            pool_block=origin.pool_block
+        )
+    
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _CountingPoolManager(
+            self._stats,
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            **pool_kwargs
+        )
+
+class SessionPool:
+    """
+    The requests session shared by all threads making sync upstream requests
+    
+    requests' default adapter keeps at most 10 connections per host, so
+    threaded workers serving more concurrent requests than that keep opening
+    and dropping connections, paying a new TLS handshake each time. This
+    session mounts an adapter per origin instead, keeping up to the origin's
+    pool_maxsize (HTTP_POOL_MAXSIZE) connections alive. With pool_block
+    (HTTP_POOL_BLOCK) set, threads wait for a free connection rather than
+    opening extra ones.
+    
+    How connections are opened, reused and discarded is counted in each
+    origin's stats. New connections are opened to addresses from the DNS
+    cache.
+    """
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._session = None
+    
+    def get(self):
+        """Get the shared session, creating it on first use"""
+        with self._lock:
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
+    
+    def _create_session(self):
+        session = requests.Session()
+        session.headers.update(self.config.headers)
+        for origin in origins.all():
+            session.mount(origin.base_url, _OriginAdapter(origin))
+            logger.info(f"Mounted {origin.pool_maxsize} connection pool for: {origin.base_url}")
+        return session
+
+# Global session pool instance
+session_pool = SessionPool()
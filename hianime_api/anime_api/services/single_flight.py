@@ -0,0 +1,185 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+import asyncio
+import logging
+import threading
+import weakref
+from .config import config
+from .request_deadline import request_deadline
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """An in-flight fetch that other threads can wait on"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.failed = False
+
+class SingleFlight:
+    """
+    Coalesce concurrent fetches of the same cache key into a single upstream request
+    
+    Inside a process, callers that miss the cache while a fetch for the same key
+    is running wait for that fetch and share its result. When the cache backend
+    supports locks (django-redis), the leader of each process also takes a
+    short-lived lock in Redis so that only one worker across all nodes fetches
+    an expired page; the others wait for the lock and then re-read the cache.
+    """
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._calls = {}
+        # asyncio tasks belong to the loop that created them
+        self._async_calls = weakref.WeakKeyDictionary()
+    
+    def do(self, key, fn):
+        """
+        Run fn once for all concurrent callers using the same key
+        
+        Args:
+            key (str): Cache key identifying the fetch
+            fn (callable): Function performing the fetch; it should re-check the
+                cache first since another worker may have filled it
+        
+        Returns:
+            The result of fn, shared by every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+        
+        if not is_leader:
+            logger.info(f"Waiting for in-flight fetch of: {key}")
+            if not call.event.wait(request_deadline.clamp(self.config.single_flight_wait_timeout)):
+                logger.warning(f"Timed out waiting for in-flight fetch of: {key}")
+                return fn()
+            if call.failed:
+                return fn()
+            return call.result
+        
+        try:
+            call.result = self._run_locked(key, fn)
+            return call.result
+        except Exception:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+    
+    async def ado(self, key, fn):
+        """
+        Async version of do()
+        
+        The fetch runs in a task of its own, so a leader that is cancelled
+        (e.g. its client disconnected) leaves it running for the callers
+        still waiting on it.
+        
+        Args:
+            key (str): Cache key identifying the fetch
+            fn (callable): Coroutine function performing the fetch
+        
+        Returns:
+            The result of fn, shared by every caller
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        
+        task = calls.get(key)
+        if task is not None:
+            logger.info(f"Waiting for in-flight fetch of: {key}")
+            try:
+                return await asyncio.wait_for(
+                    asyncio.shield(task),
+                    request_deadline.clamp(self.config.single_flight_wait_timeout)
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out waiting for in-flight fetch of: {key}")
+            except Exception:
+                # The leader failed; fetch ourselves, like do()
+                pass
+            return await fn()
+        
+        task = calls[key] = loop.create_task(self._arun_locked(key, fn))
+        task.add_done_callback(lambda task: self._forget(calls, key, task))
+        return await asyncio.shield(task)
+    
+    def _forget(self, calls, key, task):
+        """Drop a finished async fetch, marking its exception as retrieved"""
+        if calls.get(key) is task:
+            del calls[key]
+        # Nobody may be left waiting on it, e.g. after the leader was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    def _get_distributed_lock(self, key):
+        """Get a Redis lock for key, or None when the cache backend has no locks"""
+        if not self.config.single_flight_distributed or not hasattr(cache, 'lock'):
+            return None
+        # Async callers acquire and release from different threads, so the lock
+        # token must not be thread-local
+        return cache.lock(
+            f"single_flight:{key}",
+            timeout=self.config.single_flight_lock_timeout,
+            thread_local=False
+        )
+    
+    def _acquire(self, lock, key):
+        """Acquire a distributed lock, waiting for another worker's fetch if needed"""
+        # Never wait past the request's deadline
+        wait = request_deadline.clamp(self.config.single_flight_wait_timeout)
+        if wait <= 0:
+            logger.warning(f"Request deadline exceeded, not waiting for fetch lock of: {key}")
+            return False
+        
+        try:
+            acquired = lock.acquire(blocking=True, blocking_timeout=wait)
+        except Exception as e:
+            logger.error(f"Failed to acquire fetch lock for {key}: {str(e)}")
+            return False
+        
+        if not acquired:
+            logger.warning(f"Timed out waiting for fetch lock of: {key}")
+        return acquired
+    
+    def _release(self, lock, key):
+        """Release a distributed lock; it may already have expired"""
+        try:
+            lock.release()
+        except Exception as e:
+            logger.warning(f"Failed to release fetch lock for {key}: {str(e)}")
+    
+    def _run_locked(self, key, fn):
+        """Run fn while holding the distributed lock for key, if any"""
+        lock = self._get_distributed_lock(key)
+        if lock is None:
+            return fn()
+        
+        acquired = self._acquire(lock, key)
+        try:
+            return fn()
+        finally:
+            if acquired:
+                self._release(lock, key)
+    
+    async def _arun_locked(self, key, fn):
+        """Async version of _run_locked()"""
+        lock = self._get_distributed_lock(key)
+        if lock is None:
+            return await fn()
+        
+        acquired = await sync_to_async(self._acquire, thread_sensitive=False)(lock, key)
+        try:
+            return await fn()
+        finally:
+            if acquired:
+                await sync_to_async(self._release, thread_sensitive=False)(lock, key)
+
+# Global single-flight instance
+single_flight = SingleFlight()
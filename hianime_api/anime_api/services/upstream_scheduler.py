@@ -0,0 +1,267 @@
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from .config import config
+from .request_deadline import request_deadline
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, lower is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Priority of upstream requests made in the current context
+_priority = contextvars.ContextVar('upstream_priority', default=INTERACTIVE)
+
+class UpstreamQueueTimeout(Exception):
+    """Raised when no upstream slot became available within the queue timeout"""
+
+class _Waiter:
+    """A request queued for a slot, woken from whichever thread grants it"""
+    
+    def __init__(self, priority, seq, loop=None):
+        self.priority = priority
+        self.seq = seq
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+    
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+    
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+    
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+class _OriginLimiter:
+    """Token bucket and in-flight cap for a single origin"""
+    
+    def __init__(self, name, rate, burst, max_in_flight):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.lock = threading.Lock()
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.waiters = []
+        # Monotonic time before which no slots are granted, set by Retry-After
+        self.paused_until = 0
+    
+    def grant(self):
+        """
+        Hand out slots to queued requests in priority order; call with lock held
+        
+        Returns:
+            float: Seconds until the next token, or None if nobody is waiting on one
+        """
+        now = time.monotonic()
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        
+        if now < self.paused_until:
+            return self.paused_until - now if self.waiters else None
+        
+        while self.waiters and self.in_flight < self.max_in_flight:
+            if self.rate > 0 and self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            
+            waiter = heapq.heappop(self.waiters)
+            waiter.granted = True
+            self.in_flight += 1
+            if self.rate > 0:
+                self.tokens -= 1
+            waiter.wake()
+        
+        return None
+    
+    def cancel(self, waiter):
+        """Remove a waiter that gave up; call with lock held"""
+        if waiter in self.waiters:
+            self.waiters.remove(waiter)
+            heapq.heapify(self.waiters)
+
+class UpstreamScheduler:
+    """
+    Central admission control for upstream requests
+    
+    Each origin gets a token bucket (its rate_limit requests per second,
+    bursting up to burst) and at most max_in_flight concurrent requests; these
+    default to UPSTREAM_RATE_LIMIT, UPSTREAM_BURST and UPSTREAM_MAX_IN_FLIGHT.
+    Requests beyond that queue by priority, so user requests go ahead of
+    background refreshes and warm-up jobs, and give up after
+    UPSTREAM_QUEUE_TIMEOUT seconds or at the request's deadline.
+    
+    The bucket lives in this process, but its rate and burst are configured
+    for the whole deployment, so each of the UPSTREAM_PROCESSES processes
+    gets an equal share of them.
+    """
+    
+    def __init__(self):
+        self.config = config
+        self._lock = threading.Lock()
+        self._limiters = {}
+        self._seq = itertools.count()
+    
+    @contextmanager
+    def background(self):
+        """Run the enclosed upstream requests at background priority"""
+        token = _priority.set(BACKGROUND)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+    
+    @contextmanager
+    def slot(self, origin):
+        """
+        Hold an upstream slot for origin while the enclosed request runs
+        
+        Args:
+            origin (Origin): Origin the request is sent to
+        
+        Raises:
+            UpstreamQueueTimeout: If no slot became available in time
+        """
+        limiter = self._get_limiter(origin)
+        self._acquire(limiter)
+        try:
+            yield
+        finally:
+            self._release(limiter)
+    
+    @asynccontextmanager
+    async def aslot(self, origin):
+        """Async version of slot()"""
+        limiter = self._get_limiter(origin)
+        await self._aacquire(limiter)
+        try:
+            yield
+        finally:
+            self._release(limiter)
+    
+    def throttle(self, origin, seconds):
+        """
+        Hold back requests to origin for a while, e.g. as asked by Retry-After
+        
+        Args:
+            origin (Origin): Origin that asked to slow down
+            seconds (float): How long to grant it no new slots
+        """
+        limiter = self._get_limiter(origin)
+        with limiter.lock:
+            limiter.paused_until = max(limiter.paused_until, time.monotonic() + seconds)
+    
+    def state(self, origin):
+        """Get the in-flight and queued request counts of an origin and how long it is paused"""
+        limiter = self._get_limiter(origin)
+        with limiter.lock:
+            return {
+                'in_flight': limiter.in_flight,
+                'queued': len(limiter.waiters),
+                'paused_for': round(max(0.0, limiter.paused_until - time.monotonic()), 1)
+            }
+    
+    def _get_limiter(self, origin):
+        with self._lock:
+            limiter = self._limiters.get(origin.name)
+            if limiter is None:
+                processes = max(1, self.config.upstream_processes)
+                limiter = self._limiters[origin.name] = _OriginLimiter(
+                    origin.base_url,
+                    origin.rate_limit / processes,
+                    max(1, origin.burst / processes),
+                    origin.max_in_flight
+                )
+            return limiter
+    
+    def _enqueue(self, limiter, loop=None):
+        """Queue a waiter and try to grant it straight away; call with lock held"""
+        waiter = _Waiter(_priority.get(), next(self._seq), loop)
+        heapq.heappush(limiter.waiters, waiter)
+        return waiter, limiter.grant()
+    
+    def _acquire(self, limiter):
+        deadline = time.monotonic() + request_deadline.clamp(self.config.upstream_queue_timeout)
+        
+        with limiter.lock:
+            waiter, retry_in = self._enqueue(limiter)
+        
+        while not waiter.granted:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with limiter.lock:
+                    if not waiter.granted:
+                        limiter.cancel(waiter)
+                        self._raise_timeout(limiter)
+                break
+            
+            # Wake up for the next token even if no slot is released meanwhile
+            waiter.event.wait(min(remaining, retry_in) if retry_in else remaining)
+            with limiter.lock:
+                retry_in = limiter.grant()
+    
+    async def _aacquire(self, limiter):
+        deadline = time.monotonic() + request_deadline.clamp(self.config.upstream_queue_timeout)
+        
+        with limiter.lock:
+            waiter, retry_in = self._enqueue(limiter, asyncio.get_running_loop())
+        
+        while not waiter.granted:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with limiter.lock:
+                    if not waiter.granted:
+                        limiter.cancel(waiter)
+                        self._raise_timeout(limiter)
+                break
+            
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(waiter.future),
+                    min(remaining, retry_in) if retry_in else remaining
+                )
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Hand back a slot granted while we were being cancelled
+                with limiter.lock:
+                    if waiter.granted:
+                        self._release_locked(limiter)
+                    else:
+                        limiter.cancel(waiter)
+                raise
+            
+            with limiter.lock:
+                retry_in = limiter.grant()
+    
+    def _release(self, limiter):
+        with limiter.lock:
+            self._release_locked(limiter)
+    
+    def _release_locked(self, limiter):
+        limiter.in_flight -= 1
+        limiter.grant()
+    
+    def _raise_timeout(self, limiter):
+        logger.warning(f"Upstream queue timeout for {limiter.name} ({len(limiter.waiters)} queued)")
+        raise UpstreamQueueTimeout(f"No upstream slot for {limiter.name} in time")
+
+# Global upstream scheduler instance
+upstream_scheduler = UpstreamScheduler()
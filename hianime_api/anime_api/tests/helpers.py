@@ -0,0 +1,32 @@
+from pathlib import Path
+from unittest import mock
+import io
+import requests
+import time
+
+# Saved upstream pages the extractors are checked against
+TEST_PAGES = Path(__file__).resolve().parent.parent / 'test_pages'
+
+def wait_until(condition, timeout=2):
+    """Poll until condition() holds, failing the test if it never does"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting for condition')
+        time.sleep(0.005)
+
+def make_response(status_code=200, body=b'', headers=None, url='https://upstream.test/'):
+    """Build a requests response whose body is read from memory, streamed or not"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.raw = io.BytesIO(body)
+    response.url = url
+    return response
+
+def fake_session(*responses):
+    """Build a session answering successive GETs with the given responses or exceptions"""
+    session = mock.Mock(headers={})
+    session.get.side_effect = list(responses)
+    return session
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django_redis.exceptions import CompressorError
+from unittest import mock, skipUnless
+import pickle
+
+from ..services.cache_compressor import (
+    CacheCompressor,
+    aget_cached,
+    compression_stats,
+    get_cached,
+    zstandard
+)
+
+class CacheCompressorTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.compressor = CacheCompressor({})
+        self.page = pickle.dumps({'data': '<div class="film">film</div>' * 200})
+    
+    def test_large_values_round_trip(self):
+        compressed = self.compressor.compress(self.page)
+        
+        self.assertLess(len(compressed), len(self.page))
+        self.assertEqual(self.compressor.decompress(compressed), self.page)
+    
+    def test_small_values_are_stored_as_they_are(self):
+        value = pickle.dumps('short')
+        self.assertEqual(self.compressor.compress(value), value)
+    
+    def test_undecodable_value_raises(self):
+        with self.assertRaises(CompressorError):
+            self.compressor.decompress(b'not compressed at all')
+    
+    @skipUnless(zstandard, 'zstandard is not installed')
+    def test_frames_of_another_dictionary_are_refused(self):
+        dictionary = zstandard.train_dictionary(1024, [pickle.dumps({'data': f'<div>{i}</div>' * 50}) for i in range(200)])
+        other = zstandard.ZstdCompressor(dict_data=dictionary).compress(self.page)
+        
+        with self.assertRaises(CompressorError):
+            self.compressor.decompress(other)
+
+class GetCachedTests(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_readable_entry_is_returned(self):
+        cache.set('key', 'page')
+        self.assertEqual(get_cached('key'), 'page')
+    
+    def test_unreadable_entry_is_a_miss_and_deleted(self):
+        cache.set('key', 'page')
+        unreadable = compression_stats.snapshot()['unreadable']
+        
+        with mock.patch.object(cache, 'get', side_effect=pickle.UnpicklingError('bad pickle')):
+            self.assertEqual(get_cached('key', 'default'), 'default')
+        
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(compression_stats.snapshot()['unreadable'], unreadable + 1)
+    
+    async def test_async_unreadable_entry_is_a_miss_and_deleted(self):
+        await cache.aset('key', 'page')
+        
+        with mock.patch.object(cache, 'aget', side_effect=CompressorError('other dictionary')):
+            self.assertIsNone(await aget_cached('key'))
+        
+        self.assertIsNone(await cache.aget('key'))
@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+
+class CacheTTLPolicyTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.origin = Origin('test', 'https://ttl.test', 'test', cache_timeout=3600)
+    
+    def test_endpoints_get_their_policy_ttl(self):
+        self.assertEqual(self.origin.cache_timeout_for('/home'), 300)
+        self.assertEqual(self.origin.cache_timeout_for('/search/suggestion?keyword=one'), 600)
+        self.assertEqual(self.origin.cache_timeout_for('/search?keyword=one&page=1'), 900)
+        self.assertEqual(self.origin.cache_timeout_for('/genre/action?page=1'), 21600)
+    
+    def test_episode_pages_match_before_anything_else(self):
+        self.assertEqual(self.origin.cache_timeout_for('/one-piece-100?ep=1000'), 300)
+    
+    def test_other_endpoints_use_the_origin_cache_timeout(self):
+        self.assertEqual(self.origin.cache_timeout_for('/one-piece-100'), 3600)
+    
+    def test_origin_can_have_its_own_policy(self):
+        origin = Origin('test', 'https://ttl.test', 'test', cache_timeout=60, ttl_policy=[(r'^/home$', 30)])
+        
+        self.assertEqual(origin.cache_timeout_for('/home'), 30)
+        self.assertEqual(origin.cache_timeout_for('/genre/action?page=1'), 60)
+
+class CacheTTLJitterTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://ttl.test', 'test', cache_timeout=1000, ttl_policy=[])
+    
+    @override_settings(CACHE_TTL_JITTER=0.1)
+    def test_ttl_is_spread_within_the_jitter(self):
+        ttls = {self.service._cache_ttl(self.origin, '/page') for _ in range(200)}
+        
+        self.assertGreater(len(ttls), 1)
+        self.assertTrue(all(900 <= ttl <= 1100 for ttl in ttls))
+    
+    @override_settings(CACHE_TTL_JITTER=0)
+    def test_no_jitter_keeps_the_ttl(self):
+        self.assertEqual(self.service._cache_ttl(self.origin, '/page'), 1000)
+    
+    @override_settings(CACHE_STALE_TIMEOUT=600)
+    def test_entries_outlive_their_ttl_by_the_stale_window(self):
+        self.assertEqual(self.service._cache_entry_timeout(1000), 1600)
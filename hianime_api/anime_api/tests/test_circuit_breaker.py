@@ -0,0 +1,108 @@
+from django.test import SimpleTestCase
+from unittest import mock
+import asyncio
+
+from ..services.circuit_breaker import CircuitBreaker
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+
+class CircuitBreakerTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('anime_api.services.circuit_breaker.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('https://upstream.test', failure_threshold=3, recovery_timeout=30)
+    
+    def open_circuit(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+    
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+    
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+    
+    def test_half_open_trial_success_closes_the_circuit(self):
+        self.open_circuit()
+        self.now += 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        
+        # Only one trial request at a time
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+    
+    def test_half_open_trial_failure_reopens_the_circuit(self):
+        self.open_circuit()
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+    
+    def test_released_trial_lets_another_request_through(self):
+        self.open_circuit()
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        
+        self.breaker.release_trial()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+    
+    def test_open_circuit_fails_fast_without_contacting_the_origin(self):
+        self.open_circuit()
+        
+        service = HTTPService()
+        origin = Origin('test', 'https://upstream.test', 'test', rate_limit=0)
+        with mock.patch('anime_api.services.http_service.session_pool.get') as get_session, \
+                mock.patch('anime_api.services.http_service.circuit_breakers.get', return_value=self.breaker):
+            result = service._fetch_from(origin, '/home', 5, 3)
+        
+        self.assertEqual(result['error'], 'circuit_open')
+        get_session.assert_not_called()
+    
+    async def test_cancelled_trial_request_is_released(self):
+        self.open_circuit()
+        self.now += 30
+        
+        service = HTTPService()
+        origin = Origin('test', 'https://upstream.test', 'test', rate_limit=0)
+        client = mock.Mock(headers={})
+        started = asyncio.Event()
+        
+        async def hang(*args, **kwargs):
+            started.set()
+            await asyncio.Event().wait()
+        
+        client.get = hang
+        with mock.patch.object(service, '_get_async_client', return_value=client), \
+                mock.patch('anime_api.services.http_service.circuit_breakers.get', return_value=self.breaker):
+            task = asyncio.create_task(service._afetch_from(origin, '/home', 5, 0))
+            await started.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from unittest import mock
+import httpx
+import time
+
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+from .helpers import fake_session, make_response
+
+class ConditionalGetTests(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://conditional.test', 'test', rate_limit=0)
+    
+    def stale_entry(self):
+        return {
+            'success': True,
+            'data': '<html>cached</html>',
+            'status_code': 200,
+            'etag': '"v1"',
+            'last_modified': 'Wed, 01 Oct 2025 10:00:00 GMT',
+            'cache_key': 'test:/home',
+            'page_version': 1.0,
+            'fresh_until': time.time() - 10
+        }
+    
+    def fetch_and_cache(self, session):
+        with mock.patch('anime_api.services.http_service.session_pool.get', return_value=session):
+            return self.service._fetch_and_cache(self.origin, '/home', 'test:/home', 5, 0)
+    
+    def test_not_modified_page_extends_the_cached_entry(self):
+        cache.set('test:/home', self.stale_entry(), 300)
+        session = fake_session(make_response(304))
+        
+        result = self.fetch_and_cache(session)
+        
+        headers = session.get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], 'Wed, 01 Oct 2025 10:00:00 GMT')
+        
+        entry = cache.get('test:/home')
+        self.assertEqual(result, entry)
+        self.assertEqual(entry['data'], '<html>cached</html>')
+        # Extractions of the page stay valid
+        self.assertEqual(entry['page_version'], 1.0)
+        self.assertGreater(entry['fresh_until'], time.time())
+        self.assertEqual(self.origin.stats.snapshot()['not_modified'], 1)
+    
+    def test_changed_page_replaces_the_cached_entry(self):
+        cache.set('test:/home', self.stale_entry(), 300)
+        session = fake_session(make_response(200, b'<html>new</html>', {'ETag': '"v2"', 'Content-Type': 'text/html; charset=utf-8'}))
+        
+        self.fetch_and_cache(session)
+        
+        entry = cache.get('test:/home')
+        self.assertEqual(entry['data'], '<html>new</html>')
+        self.assertEqual(entry['etag'], '"v2"')
+        self.assertNotEqual(entry['page_version'], 1.0)
+    
+    def test_first_fetch_sends_no_validators(self):
+        session = fake_session(make_response(200, b'<html>new</html>'))
+        
+        self.fetch_and_cache(session)
+        
+        headers = session.get.call_args.kwargs['headers']
+        self.assertNotIn('If-None-Match', headers)
+        self.assertNotIn('If-Modified-Since', headers)
+    
+    async def test_async_not_modified_page_extends_the_cached_entry(self):
+        await cache.aset('test:/home', self.stale_entry(), 300)
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(304)
+        
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with mock.patch.object(self.service, '_get_async_client', return_value=client):
+            result = await self.service._afetch_and_cache(self.origin, '/home', 'test:/home', 5, 0)
+        await client.aclose()
+        
+        self.assertEqual(requests[0].headers['If-None-Match'], '"v1"')
+        self.assertEqual(result['data'], '<html>cached</html>')
+        self.assertEqual(result['page_version'], 1.0)
+        self.assertGreater(result['fresh_until'], time.time())
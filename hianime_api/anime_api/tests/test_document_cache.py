@@ -0,0 +1,66 @@
+from bs4 import BeautifulSoup
+from django.test import SimpleTestCase, override_settings
+from unittest import mock
+
+from ..extractors import anime_details_extractor, document_cache, episodes_extractor
+from ..extractors.document_cache import DocumentCache, subtrees
+from .helpers import TEST_PAGES
+
+PAGE = '<html><body><div class="menu">menu</div><div class="film"><a>film</a></div></body></html>'
+
+class DocumentCacheTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.document_cache = DocumentCache()
+    
+    def test_same_page_is_parsed_once(self):
+        self.assertIs(self.document_cache.parse(PAGE), self.document_cache.parse(PAGE))
+    
+    def test_different_pages_are_parsed_separately(self):
+        other = PAGE.replace('film', 'show')
+        self.assertIsNot(self.document_cache.parse(PAGE), self.document_cache.parse(other))
+    
+    def test_documents_expire(self):
+        with mock.patch('anime_api.extractors.document_cache.time.monotonic', return_value=1000.0):
+            soup = self.document_cache.parse(PAGE)
+        with mock.patch('anime_api.extractors.document_cache.time.monotonic', return_value=1000.0 + 31):
+            self.assertIsNot(self.document_cache.parse(PAGE), soup)
+    
+    @override_settings(DOCUMENT_CACHE_SIZE=2)
+    def test_least_recently_used_document_is_dropped(self):
+        pages = [PAGE.replace('film', f'film-{i}') for i in range(3)]
+        soups = [self.document_cache.parse(page) for page in pages]
+        
+        self.assertIs(self.document_cache.parse(pages[2]), soups[2])
+        self.assertIsNot(self.document_cache.parse(pages[0]), soups[0])
+    
+    @override_settings(DOCUMENT_CACHE_SIZE=0)
+    def test_disabled_cache_parses_every_time(self):
+        self.assertIsNot(self.document_cache.parse(PAGE), self.document_cache.parse(PAGE))
+    
+    def test_partial_documents_hold_only_their_subtrees(self):
+        parse_only = subtrees('film')
+        soup = self.document_cache.parse(PAGE, parse_only)
+        
+        self.assertIsNotNone(soup.select_one('.film a'))
+        self.assertIsNone(soup.select_one('.menu'))
+        self.assertIs(self.document_cache.parse(PAGE, parse_only), soup)
+    
+    def test_full_document_serves_partial_requests(self):
+        soup = self.document_cache.parse(PAGE)
+        self.assertIs(self.document_cache.parse(PAGE, subtrees('film')), soup)
+    
+    def test_page_without_the_subtrees_is_parsed_whole(self):
+        soup = self.document_cache.parse(PAGE, subtrees('missing'))
+        self.assertIsNotNone(soup.select_one('.menu'))
+    
+    def test_details_and_episodes_share_one_parse(self):
+        html = (TEST_PAGES / 'details.html').read_text()
+        document_cache.clear()
+        self.addCleanup(document_cache.clear)
+        
+        with mock.patch('anime_api.extractors.document_cache.BeautifulSoup', wraps=BeautifulSoup) as parse:
+            anime_details_extractor.extract(html)
+            episodes_extractor.extract(html)
+        
+        parse.assert_called_once()
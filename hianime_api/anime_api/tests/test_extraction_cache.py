@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from unittest import mock
+import time
+
+from ..services.extraction_cache import ExtractionCache
+
+class FakeExtractor:
+    VERSION = 1
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def extract(self, html, *args):
+        self.calls += 1
+        return {'html': html, 'args': list(args)}
+
+class ExtractionCacheTests(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.extraction_cache = ExtractionCache()
+        self.extractor = FakeExtractor()
+    
+    def page(self, data='<html>page</html>', page_version=1.0):
+        return {
+            'success': True,
+            'data': data,
+            'cache_key': 'test:/home',
+            'page_version': page_version,
+            'fresh_until': time.time() + 60
+        }
+    
+    def test_reuses_the_extraction_of_the_same_page(self):
+        first = self.extraction_cache.extract(self.page(), self.extractor)
+        second = self.extraction_cache.extract(self.page(), self.extractor)
+        
+        self.assertEqual(first, second)
+        self.assertEqual(self.extractor.calls, 1)
+    
+    def test_refetched_page_is_extracted_again(self):
+        self.extraction_cache.extract(self.page(), self.extractor)
+        result = self.extraction_cache.extract(self.page('<html>new</html>', page_version=2.0), self.extractor)
+        
+        self.assertEqual(result['html'], '<html>new</html>')
+        self.assertEqual(self.extractor.calls, 2)
+    
+    def test_new_extractor_version_is_extracted_again(self):
+        self.extraction_cache.extract(self.page(), self.extractor)
+        with mock.patch.object(FakeExtractor, 'VERSION', 2):
+            self.extraction_cache.extract(self.page(), self.extractor)
+        
+        self.assertEqual(self.extractor.calls, 2)
+    
+    def test_arguments_are_part_of_the_key(self):
+        self.extraction_cache.extract(self.page(), self.extractor, args=('HD-1',))
+        result = self.extraction_cache.extract(self.page(), self.extractor, args=('HD-2',))
+        
+        self.assertEqual(result['args'], ['HD-2'])
+        self.assertEqual(self.extractor.calls, 2)
+    
+    def test_uncached_results_are_always_extracted(self):
+        result = {'success': True, 'data': '<html>page</html>'}
+        self.extraction_cache.extract(result, self.extractor)
+        self.extraction_cache.extract(result, self.extractor)
+        
+        self.assertEqual(self.extractor.calls, 2)
+    
+    def test_extraction_lives_as_long_as_its_page(self):
+        with mock.patch('anime_api.services.extraction_cache.cache.set') as cache_set:
+            self.extraction_cache.extract(self.page(), self.extractor)
+        
+        timeout = cache_set.call_args.args[2]
+        stale_timeout = self.extraction_cache.config.cache_stale_timeout
+        self.assertAlmostEqual(timeout, 60 + stale_timeout, delta=1)
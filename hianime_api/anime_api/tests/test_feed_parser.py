@@ -0,0 +1,76 @@
+from bs4 import BeautifulSoup
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from unittest import mock
+
+from ..extractors.document_cache import DocumentCache, FeedParser
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+from .helpers import TEST_PAGES, fake_session, make_response
+
+PARSERS = ('lxml', 'html.parser')
+
+# Odd sizes so chunks split tags, entities and multi-byte characters
+CHUNK_SIZES = (1, 7, 64, 4096)
+
+UNICODE_PAGE = '<html><body><p class="t">Épisode « spécial » &amp; 日本語</p><br><p>end</body></html>'
+
+class FeedParserTests(SimpleTestCase):
+    """FeedParser drives bs4's tree builders directly, so it is held to a one-shot parse of every page"""
+    
+    def pages(self):
+        pages = [(path.name, path.read_text(encoding='utf-8')) for path in sorted(TEST_PAGES.glob('*.html'))]
+        return pages + [('unicode', UNICODE_PAGE)]
+    
+    def feed(self, document_cache, html, chunk_size, encoding='utf-8'):
+        content = html.encode(encoding)
+        parser = FeedParser(document_cache, encoding)
+        for start in range(0, len(content), chunk_size):
+            parser.feed(content[start:start + chunk_size])
+        parser.close(html)
+        return document_cache._get(html)
+    
+    def test_fed_document_matches_a_one_shot_parse(self):
+        for parser_name in PARSERS:
+            with override_settings(HTML_PARSER=parser_name):
+                for name, html in self.pages():
+                    expected = BeautifulSoup(html, parser_name).decode()
+                    for chunk_size in CHUNK_SIZES:
+                        with self.subTest(parser=parser_name, page=name, chunk_size=chunk_size):
+                            soup = self.feed(DocumentCache(), html, chunk_size)
+                            
+                            self.assertIsNotNone(soup)
+                            self.assertEqual(soup.decode(), expected)
+    
+    def test_declared_encoding_is_used_to_decode_chunks(self):
+        html = '<html><body><p>Café déjà vu</p></body></html>'
+        
+        soup = self.feed(DocumentCache(), html, 3, encoding='latin-1')
+        
+        self.assertEqual(soup.p.get_text(), 'Café déjà vu')
+    
+    def test_failed_parse_leaves_the_page_to_the_extractor(self):
+        document_cache = DocumentCache()
+        parser = FeedParser(document_cache, 'utf-8')
+        parser._parser = mock.Mock(**{'feed.side_effect': ValueError('broken')})
+        
+        with self.assertLogs('anime_api.extractors.document_cache', 'WARNING'):
+            parser.feed(b'<html>')
+        parser.close('<html>')
+        
+        self.assertIsNone(document_cache._get('<html>'))
+    
+    @override_settings(STREAM_PARSE=True)
+    def test_page_streamed_through_http_service_is_parsed_like_a_full_read(self):
+        cache.clear()
+        document_cache = DocumentCache()
+        page = (TEST_PAGES / 'details.html').read_bytes()
+        session = fake_session(make_response(200, page, {'Content-Type': 'text/html; charset=utf-8'}))
+        origin = Origin('test', 'https://feed.test', 'test', rate_limit=0)
+        
+        with mock.patch('anime_api.services.http_service.session_pool.get', return_value=session):
+            result = HTTPService()._fetch_from(origin, '/details', 5, 0, stream_parser=document_cache.feed_parser)
+        
+        soup = document_cache._get(result['data'])
+        self.assertIsNotNone(soup)
+        self.assertEqual(soup.decode(), BeautifulSoup(result['data'], document_cache.parser).decode())
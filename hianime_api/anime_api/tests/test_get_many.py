@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from unittest import mock
+import asyncio
+import time
+
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+
+def page(endpoint):
+    return {'success': True, 'data': f'<html>{endpoint}</html>', 'fresh_until': time.time() + 60}
+
+class GetManyTests(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://bulk.test', 'test', rate_limit=0, max_in_flight=2)
+        patcher = mock.patch('anime_api.services.http_service.origins.get', return_value=self.origin)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def corrupt(self, key):
+        """Store an entry that fails to unpickle, like one from another compressor dictionary"""
+        cache._cache[cache.make_and_validate_key(key)] = b'not a pickle'
+        cache._expire_info[cache.make_and_validate_key(key)] = time.time() + 60
+    
+    def fetch_and_cache(self, origin, endpoint, *args):
+        return page(endpoint)
+    
+    def test_cached_pages_are_read_and_misses_fetched_in_input_order(self):
+        cache.set('test:/a', page('/a'), 60)
+        
+        with mock.patch.object(self.service, '_fetch_and_cache', side_effect=self.fetch_and_cache) as fetch:
+            results = self.service.get_many(['/a', '/b', '/c'], origin='test')
+        
+        self.assertEqual([result['data'] for result in results], ['<html>/a</html>', '<html>/b</html>', '<html>/c</html>'])
+        self.assertEqual(sorted(call.args[1] for call in fetch.call_args_list), ['/b', '/c'])
+    
+    def test_failing_endpoint_only_fails_its_own_result(self):
+        def fetch_and_cache(origin, endpoint, *args):
+            if endpoint == '/b':
+                raise RuntimeError('upstream broke')
+            return page(endpoint)
+        
+        with mock.patch.object(self.service, '_fetch_and_cache', side_effect=fetch_and_cache), \
+                self.assertLogs('anime_api.services.http_service', 'ERROR'):
+            results = self.service.get_many(['/a', '/b'], origin='test')
+        
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(results[1]['error'], 'unexpected_error')
+    
+    def test_corrupt_entry_only_misses_its_own_key(self):
+        cache.set('test:/a', page('/a'), 60)
+        self.corrupt('test:/b')
+        
+        with mock.patch.object(self.service, '_fetch_and_cache', side_effect=self.fetch_and_cache) as fetch, \
+                self.assertLogs('anime_api.services.cache_compressor', 'WARNING'):
+            results = self.service.get_many(['/a', '/b'], origin='test')
+        
+        self.assertEqual([result['data'] for result in results], ['<html>/a</html>', '<html>/b</html>'])
+        self.assertEqual([call.args[1] for call in fetch.call_args_list], ['/b'])
+        # The corrupt entry was deleted
+        self.assertIsNone(cache.get('test:/b'))
+    
+    async def test_async_corrupt_entry_only_misses_its_own_key(self):
+        await cache.aset('test:/a', page('/a'), 60)
+        self.corrupt('test:/b')
+        
+        async def afetch_and_cache(origin, endpoint, *args):
+            return page(endpoint)
+        
+        with mock.patch.object(self.service, '_afetch_and_cache', side_effect=afetch_and_cache) as fetch, \
+                self.assertLogs('anime_api.services.cache_compressor', 'WARNING'):
+            results = await self.service.aget_many(['/a', '/b'], origin='test')
+        
+        self.assertEqual([result['data'] for result in results], ['<html>/a</html>', '<html>/b</html>'])
+        self.assertEqual([call.args[1] for call in fetch.call_args_list], ['/b'])
+    
+    async def test_async_misses_are_fetched_at_most_max_in_flight_at_a_time(self):
+        running = 0
+        peak = 0
+        
+        async def afetch_and_cache(origin, endpoint, *args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return page(endpoint)
+        
+        with mock.patch.object(self.service, '_afetch_and_cache', side_effect=afetch_and_cache):
+            results = await self.service.aget_many([f'/{i}' for i in range(6)], origin='test')
+        
+        self.assertEqual(len(results), 6)
+        self.assertEqual(peak, 2)
@@ -0,0 +1,115 @@
+from django.test import SimpleTestCase
+from unittest import mock
+import asyncio
+import threading
+
+from ..services.circuit_breaker import CircuitBreaker
+from ..services.http_service import HTTPService
+from ..services.origin_health import OriginHealth
+from ..services.origins import Origin
+
+def page(origin):
+    return {'success': True, 'data': f'<html>{origin.name}</html>', 'status_code': 200}
+
+def failure(origin):
+    return {'success': False, 'message': f'{origin.name} broke', 'error': 'request_error', 'status_code': 502}
+
+class MultiOriginFetchTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.service = HTTPService()
+        self.primary = Origin('primary', 'https://primary.test', 'primary', 'site', rate_limit=0)
+        self.mirror = Origin('mirror', 'https://mirror.test', 'mirror', 'site', rate_limit=0)
+        patchers = [
+            mock.patch('anime_api.services.http_service.origins.mirrors_of', return_value=[self.mirror]),
+            # Keep the preferred origin first
+            mock.patch('anime_api.services.http_service.origin_health.rank', side_effect=lambda urls: urls),
+            mock.patch('anime_api.services.http_service.origin_health.hedge_delay', return_value=0.05)
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def test_fails_over_to_the_mirror(self):
+        responses = {self.primary: failure(self.primary), self.mirror: page(self.mirror)}
+        
+        with mock.patch.object(self.service, '_fetch_from', side_effect=lambda origin, *args: responses[origin]) as fetch_from:
+            result = self.service._fetch(self.primary, '/home', 5, 0)
+        
+        self.assertEqual(result['data'], '<html>mirror</html>')
+        self.assertEqual(fetch_from.call_count, 2)
+    
+    def test_hedges_a_slow_request_to_the_mirror(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        
+        def fetch_from(origin, *args):
+            if origin is self.primary:
+                release.wait(2)
+            return page(origin)
+        
+        with mock.patch.object(self.service, '_fetch_from', side_effect=fetch_from):
+            result = self.service._fetch(self.primary, '/home', 5, 0)
+        
+        self.assertEqual(result['data'], '<html>mirror</html>')
+    
+    def test_returns_the_first_failure_when_every_origin_fails(self):
+        with mock.patch.object(self.service, '_fetch_from', side_effect=lambda origin, *args: failure(origin)):
+            result = self.service._fetch(self.primary, '/home', 5, 0)
+        
+        self.assertEqual(result['message'], 'primary broke')
+    
+    def test_fetches_from_one_origin_without_mirrors(self):
+        with mock.patch('anime_api.services.http_service.origins.mirrors_of', return_value=[]), \
+                mock.patch.object(self.service, '_fetch_from', side_effect=lambda origin, *args: failure(origin)) as fetch_from:
+            self.service._fetch(self.primary, '/home', 5, 0)
+        
+        fetch_from.assert_called_once()
+    
+    async def test_async_fails_over_to_the_mirror(self):
+        responses = {self.primary: failure(self.primary), self.mirror: page(self.mirror)}
+        
+        async def afetch_from(origin, *args):
+            return responses[origin]
+        
+        with mock.patch.object(self.service, '_afetch_from', side_effect=afetch_from):
+            result = await self.service._afetch(self.primary, '/home', 5, 0)
+        
+        self.assertEqual(result['data'], '<html>mirror</html>')
+    
+    async def test_async_hedges_a_slow_request_to_the_mirror(self):
+        release = asyncio.Event()
+        
+        async def afetch_from(origin, *args):
+            if origin is self.primary:
+                await release.wait()
+            return page(origin)
+        
+        with mock.patch.object(self.service, '_afetch_from', side_effect=afetch_from):
+            result = await self.service._afetch(self.primary, '/home', 5, 0)
+        
+        self.assertEqual(result['data'], '<html>mirror</html>')
+        # The losing request is left to finish in the background
+        self.assertEqual(len(self.service._hedge_tasks), 1)
+        release.set()
+        await asyncio.gather(*self.service._hedge_tasks)
+
+class OriginRankingTests(SimpleTestCase):
+    
+    def test_open_circuit_goes_last(self):
+        health = OriginHealth()
+        breakers = {url: CircuitBreaker(url, failure_threshold=1, recovery_timeout=30) for url in ('https://down.test', 'https://up.test')}
+        breakers['https://down.test'].record_failure()
+        
+        with mock.patch('anime_api.services.origin_health.circuit_breakers.get', side_effect=breakers.get):
+            order = health.rank(['https://down.test', 'https://up.test'])
+        
+        self.assertEqual(order, ['https://up.test', 'https://down.test'])
+    
+    def test_faster_origin_goes_first(self):
+        health = OriginHealth()
+        for _ in range(10):
+            health.record_success('https://slow.test', 2.0)
+            health.record_success('https://fast.test', 0.2)
+        
+        self.assertEqual(health.rank(['https://slow.test', 'https://fast.test']), ['https://fast.test', 'https://slow.test'])
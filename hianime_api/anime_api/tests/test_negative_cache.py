@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from unittest import mock
+
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+
+NOT_FOUND = {'success': False, 'message': '404 Not Found', 'error': 'request_error', 'status_code': 404}
+TIMEOUT = {'success': False, 'message': 'Request timeout after multiple attempts', 'error': 'timeout'}
+CIRCUIT_OPEN = {'success': False, 'message': 'Upstream is unavailable, circuit open', 'error': 'circuit_open'}
+
+@override_settings(NEGATIVE_CACHE_NOT_FOUND_TIMEOUT=120, NEGATIVE_CACHE_ERROR_TIMEOUT=15)
+class NegativeCacheTests(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://negative.test', 'test', rate_limit=0)
+        patcher = mock.patch('anime_api.services.http_service.origins.get', return_value=self.origin)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def fetch_twice(self, result):
+        with mock.patch.object(self.service, '_fetch', return_value=result) as fetch, \
+                mock.patch('anime_api.services.http_service.cache.set', wraps=cache.set) as cache_set:
+            first = self.service.fetch('test', '/missing')
+            second = self.service.fetch('test', '/missing')
+        return first, second, fetch, cache_set
+    
+    def test_missing_page_is_cached(self):
+        first, second, fetch, cache_set = self.fetch_twice(NOT_FOUND)
+        
+        fetch.assert_called_once()
+        self.assertFalse(second['success'])
+        self.assertEqual(second['status_code'], 404)
+        self.assertEqual(cache_set.call_args.args[2], 120)
+    
+    def test_upstream_errors_are_cached_briefly(self):
+        first, second, fetch, cache_set = self.fetch_twice(TIMEOUT)
+        
+        fetch.assert_called_once()
+        self.assertEqual(cache_set.call_args.args[2], 15)
+    
+    def test_local_failures_are_not_cached(self):
+        first, second, fetch, cache_set = self.fetch_twice(CIRCUIT_OPEN)
+        
+        self.assertEqual(fetch.call_count, 2)
+        cache_set.assert_not_called()
+    
+    @override_settings(NEGATIVE_CACHE_NOT_FOUND_TIMEOUT=0)
+    def test_disabled_negative_cache_stores_nothing(self):
+        first, second, fetch, cache_set = self.fetch_twice(NOT_FOUND)
+        
+        self.assertEqual(fetch.call_count, 2)
+    
+    def test_failure_never_replaces_a_stale_copy(self):
+        stale = {'success': True, 'data': '<html>cached</html>', 'fresh_until': 0, 'page_version': 1.0}
+        cache.set('test:/missing', stale, 300)
+        
+        with mock.patch.object(self.service, '_fetch', return_value=NOT_FOUND):
+            result = self.service._fetch_and_cache(self.origin, '/missing', 'test:/missing', 5, 0)
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(cache.get('test:/missing'), stale)
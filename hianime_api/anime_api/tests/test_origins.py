@@ -0,0 +1,83 @@
+from django.test import SimpleTestCase, override_settings
+from unittest import mock
+
+from ..services.http_service import HTTPService
+from ..services.origins import OriginRegistry
+
+@override_settings(
+    ANIME_API_BASE_URL='https://primary.test',
+    ANIME_API_BASE_URL_V2='https://mirror.test',
+    ANIME_API_PROVIDERS='https://provider.test'
+)
+class OriginRegistryTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.origins = OriginRegistry()
+    
+    def test_origins_are_built_from_settings(self):
+        self.assertEqual(self.origins.get('primary').base_url, 'https://primary.test')
+        self.assertEqual(self.origins.get('mirror').base_url, 'https://mirror.test')
+        self.assertEqual(self.origins.get('provider').base_url, 'https://provider.test')
+        self.assertEqual(self.origins.get('mirror').cache_key('/home'), 'anime_api_v2:/home')
+    
+    def test_unknown_origin_raises(self):
+        with self.assertRaises(ValueError):
+            self.origins.get('elsewhere')
+    
+    @override_settings(UPSTREAM_ORIGIN_OPTIONS={'provider': {'timeout': 3, 'cache_timeout': 60}})
+    def test_origin_options_override_the_global_settings(self):
+        self.assertEqual(self.origins.get('provider').timeout, 3)
+        self.assertEqual(self.origins.get('provider').cache_timeout, 60)
+        self.assertEqual(self.origins.get('primary').timeout, self.origins.config.timeout)
+    
+    @override_settings(MULTI_ORIGIN_FETCH=True)
+    def test_primary_and_mirror_stand_in_for_each_other(self):
+        primary, mirror, provider = (self.origins.get(name) for name in ('primary', 'mirror', 'provider'))
+        
+        self.assertEqual(self.origins.mirrors_of(primary), [mirror])
+        self.assertEqual(self.origins.mirrors_of(mirror), [primary])
+        self.assertEqual(self.origins.mirrors_of(provider), [])
+    
+    @override_settings(MULTI_ORIGIN_FETCH=False)
+    def test_no_mirrors_without_multi_origin_fetching(self):
+        self.assertEqual(self.origins.mirrors_of(self.origins.get('primary')), [])
+    
+    def test_stats_leave_out_the_origin_urls(self):
+        stats = self.origins.stats()
+        
+        self.assertEqual(set(stats), {'primary', 'mirror', 'provider'})
+        self.assertNotIn('base_url', stats['primary'])
+        self.assertIn('circuit', stats['primary'])
+
+class OriginRoutingTests(SimpleTestCase):
+    
+    def test_get_and_get_v2_go_through_the_same_pipeline(self):
+        service = HTTPService()
+        
+        with mock.patch.object(service, 'fetch') as fetch:
+            service.get('/home')
+            service.get_v2('/home')
+        
+        self.assertEqual([call.args[:2] for call in fetch.call_args_list], [('primary', '/home'), ('mirror', '/home')])
+
+@override_settings(STATS_TOKEN='secret')
+class StatsEndpointTests(SimpleTestCase):
+    
+    def test_anonymous_clients_are_refused(self):
+        response = self.client.get('/api/v1/stats/')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_wrong_token_is_refused(self):
+        response = self.client.get('/api/v1/stats/', HTTP_X_STATS_TOKEN='guess')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_stats_token_is_allowed(self):
+        response = self.client.get('/api/v1/stats/', HTTP_X_STATS_TOKEN='secret')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('origins', response.json()['data'])
+    
+    @override_settings(STATS_TOKEN='')
+    def test_empty_token_allows_no_one_but_staff(self):
+        response = self.client.get('/api/v1/stats/', HTTP_X_STATS_TOKEN='')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,15 @@
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from io import StringIO
+
+from .helpers import TEST_PAGES
+
+class CompareParsersTests(SimpleTestCase):
+    """The default HTML_PARSER must give the same extractor output as html.parser"""
+    
+    def test_parsers_agree_on_test_pages(self):
+        # Raises CommandError on any extractor output that differs
+        stdout = StringIO()
+        call_command('compare_parsers', str(TEST_PAGES), '--runs', '1', stdout=stdout, stderr=StringIO())
+        pages = len(list(TEST_PAGES.glob('*.html')))
+        self.assertIn(f"identical output on {pages} pages", stdout.getvalue())
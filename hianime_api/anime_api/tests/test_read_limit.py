@@ -0,0 +1,184 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from unittest import mock
+import re
+
+from ..extractors.streaming_extractor import ServersExtractor, StreamingExtractor
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+from ..services.read_limit import ReadLimit, page_read
+from .helpers import TEST_PAGES, fake_session, make_response
+
+SOURCES_SCRIPT = b'<script>var streaming = {"sources": [{"file": "https://cdn/x.m3u8", "type": "hls"}]};</script>'
+FILLER = b'<div>' + b'filler ' * 200 + b'</div>'
+
+def chunked(body, size=64):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+class ReadLimitTests(SimpleTestCase):
+    
+    def read(self, read_limit, body):
+        return read_limit.read(chunked(body))
+    
+    def test_bytes_marker_stops_the_read(self):
+        body, partial = self.read(ReadLimit('marker', until=b'<!-- end -->'), b'<p>a</p><!-- end -->' + FILLER)
+        
+        self.assertTrue(partial)
+        self.assertLess(len(body), 128)
+    
+    def test_missing_marker_reads_the_whole_page(self):
+        page = b'<p>a</p>' + FILLER
+        
+        self.assertEqual(self.read(ReadLimit('marker', until=b'<!-- end -->'), page), (page, False))
+    
+    def test_class_element_must_be_read_to_its_closing_tag(self):
+        reached = page_read(classes=('list',))
+        
+        self.assertFalse(reached(b'<div class="list"><div>a</div>'))
+        self.assertTrue(reached(b'<div class="list"><div>a</div></div>'))
+    
+    def test_markup_inside_scripts_and_comments_does_not_count(self):
+        reached = page_read(classes=('list',), tags=('iframe',))
+        
+        self.assertFalse(reached(b'<script>x = "<div class=list></div><iframe>";</script>'))
+        self.assertFalse(reached(b'<!-- <div class="list"></div><iframe> -->'))
+        # An unterminated script hides everything after it
+        self.assertFalse(reached(b'<script>x = 1;<div class="list"></div><iframe>'))
+    
+    def test_script_must_have_been_read_to_its_end(self):
+        reached = page_read(script=re.compile(rb'var\s+sources\s*='))
+        
+        self.assertFalse(reached(b'<script>var sources = [1,'))
+        self.assertTrue(reached(b'<script>var sources = [1];</script>'))
+
+class StreamingReadLimitTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.extractor = StreamingExtractor()
+    
+    def read(self, page):
+        body, partial = self.extractor.READ_LIMIT.read(chunked(page))
+        return body.decode(), partial
+    
+    def test_iframe_after_the_sources_script_is_still_read(self):
+        page = b'<html><body>' + SOURCES_SCRIPT + FILLER + b'<iframe src="https://embed/late"></iframe>' + FILLER + b'</body></html>'
+        
+        html, partial = self.read(page)
+        
+        self.assertTrue(partial)
+        result = self.extractor.extract(html, 'hd-1')
+        self.assertEqual(result, self.extractor.extract(page.decode(), 'hd-1'))
+        self.assertEqual(result['streamingLink']['iframe'], 'https://embed/late')
+        self.assertEqual(result['streamingLink']['link']['file'], 'https://cdn/x.m3u8')
+    
+    def test_sources_script_after_the_iframe_is_still_read(self):
+        page = b'<html><body><iframe src="https://embed/early"></iframe>' + FILLER + SOURCES_SCRIPT + FILLER + b'</body></html>'
+        
+        html, partial = self.read(page)
+        
+        self.assertTrue(partial)
+        self.assertEqual(self.extractor.extract(html, 'hd-1'), self.extractor.extract(page.decode(), 'hd-1'))
+    
+    def test_page_without_an_iframe_is_read_in_full(self):
+        page = b'<html><body>' + SOURCES_SCRIPT + FILLER + b'</body></html>'
+        
+        self.assertEqual(self.read(page), (page.decode(), False))
+    
+    def test_saved_page_gives_the_same_result_as_the_full_page(self):
+        page = (TEST_PAGES / 'streaming.html').read_bytes()
+        
+        html, partial = self.read(page)
+        
+        self.assertTrue(partial)
+        self.assertEqual(self.extractor.extract(html, 'hd-1'), self.extractor.extract(page.decode(), 'hd-1'))
+
+class ServersReadLimitTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.extractor = ServersExtractor()
+        self.blocks = (TEST_PAGES / 'servers.html').read_bytes().split(b'<body>', 1)[1].split(b'<div class="clearfix">', 1)[0]
+    
+    def read(self, page):
+        body, partial = self.extractor.READ_LIMIT.read(chunked(page))
+        return body.decode(), partial
+    
+    def assert_same_servers(self, page):
+        html, partial = self.read(page)
+        
+        self.assertTrue(partial)
+        result = self.extractor.extract(html)
+        self.assertEqual(result, self.extractor.extract(page.decode()))
+        self.assertEqual(result['episode'], 12)
+        self.assertEqual(len(result['dub']), 3)
+    
+    def test_saved_page_gives_the_same_result_as_the_full_page(self):
+        self.assert_same_servers((TEST_PAGES / 'servers.html').read_bytes())
+    
+    def test_marker_inside_a_script_does_not_stop_the_read(self):
+        decoy = b'<script>var html = \'<div class="servers-dub"><div></div></div></div>\';</script>'
+        
+        self.assert_same_servers(b'<html><body>' + decoy + FILLER + self.blocks + FILLER + b'</body></html>')
+    
+    def test_episode_title_after_the_server_lists_is_still_read(self):
+        detail, servers = self.blocks.split(b'<div class="server-sub">', 1)
+        
+        self.assert_same_servers(b'<html><body><div class="server-sub">' + servers + FILLER + detail + FILLER + b'</body></html>')
+
+class PartialReadTests(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://partial.test', 'test', rate_limit=0)
+    
+    def fetch(self, session, read_limit):
+        with mock.patch('anime_api.services.http_service.session_pool.get', return_value=session):
+            return self.service._fetch_from(self.origin, '/watch', 5, 0, read_limit=read_limit)
+    
+    def test_partial_pages_are_cached_apart_from_the_full_page(self):
+        full_key = self.service._cache_key(self.origin, '/watch')
+        servers_key = self.service._cache_key(self.origin, '/watch', ServersExtractor.READ_LIMIT)
+        streaming_key = self.service._cache_key(self.origin, '/watch', StreamingExtractor.READ_LIMIT)
+        
+        self.assertEqual(servers_key, f"{full_key}:until:server-blocks")
+        self.assertEqual(streaming_key, f"{full_key}:until:sources-iframe")
+    
+    def test_read_body_stops_at_the_limit_and_releases_the_connection(self):
+        response = make_response(200, b'<p>a</p><!-- end -->' + FILLER * 20)
+        
+        with mock.patch.object(response, 'close') as close:
+            body = self.service._read_body(response, ReadLimit('marker', until=b'<!-- end -->'), None)
+        
+        self.assertTrue(body.partial)
+        self.assertLess(len(body.content), len(FILLER) * 20)
+        close.assert_called_once()
+    
+    def test_error_pages_are_not_read(self):
+        body = self.service._read_body(make_response(500, FILLER), StreamingExtractor.READ_LIMIT, None)
+        
+        self.assertEqual((body.content, body.partial), (b'', False))
+    
+    def test_partial_page_is_decoded_like_a_full_read(self):
+        page = '<html><body><p>Épisode spécial, « Café » à la française, déjà vu</p></body></html>'.encode('cp1252')
+        # No charset, so requests guesses it from the body
+        headers = {'Content-Type': 'application/xhtml+xml'}
+        
+        result = self.fetch(fake_session(make_response(200, page, headers)), ReadLimit('marker', until=b'<!-- end -->'))
+        
+        self.assertEqual(result['data'], make_response(200, page, headers).text)
+        self.assertNotIn('\ufffd', result['data'])
+    
+    def test_declared_charset_is_used_for_partial_pages(self):
+        page = '<html><body><p>Café</p></body></html>'.encode('latin-1')
+        headers = {'Content-Type': 'text/html; charset=latin-1'}
+        
+        result = self.fetch(fake_session(make_response(200, page, headers)), ReadLimit('marker', until=b'<!-- end -->'))
+        
+        self.assertIn('Café', result['data'])
+    
+    def test_pages_without_a_declared_encoding_are_not_parsed_while_streaming(self):
+        stream_parser = mock.Mock()
+        
+        self.assertIsNone(self.service._stream_parser(make_response(200, b'', {'Content-Type': 'application/xhtml+xml'}), stream_parser))
+        self.assertIsNotNone(self.service._stream_parser(make_response(200, b'', {'Content-Type': 'text/html; charset=utf-8'}), stream_parser))
+        stream_parser.assert_called_once_with('utf-8')
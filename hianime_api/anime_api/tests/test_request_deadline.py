@@ -0,0 +1,108 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from unittest import mock
+import threading
+
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+from ..services.request_deadline import request_deadline
+from ..services.single_flight import SingleFlight
+from ..views import HomepageAPIView
+from .helpers import fake_session, make_response
+
+class RequestDeadlineTests(SimpleTestCase):
+    
+    def test_no_deadline_outside_a_scope(self):
+        self.assertIsNone(request_deadline.remaining())
+        self.assertEqual(request_deadline.clamp(10), 10)
+    
+    def test_scope_bounds_timeouts(self):
+        with request_deadline.scope(2):
+            self.assertLessEqual(request_deadline.remaining(), 2)
+            self.assertLessEqual(request_deadline.clamp(10), 2)
+            self.assertEqual(request_deadline.clamp(1), 1)
+        self.assertIsNone(request_deadline.remaining())
+    
+    def test_nested_scope_never_extends_the_deadline(self):
+        with request_deadline.scope(1):
+            with request_deadline.scope(60):
+                self.assertLessEqual(request_deadline.remaining(), 1)
+    
+    def test_view_runs_within_its_latency_budget(self):
+        remaining = []
+        
+        def get(*args, **kwargs):
+            remaining.append(request_deadline.remaining())
+            return {'success': False, 'message': 'upstream broke', 'error': 'request_error'}
+        
+        with override_settings(REQUEST_LATENCY_BUDGET=3), \
+                mock.patch('anime_api.views.homepage_view.http_service.get', side_effect=get):
+            response = HomepageAPIView.as_view()(RequestFactory().get('/api/v1/home/'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(remaining[0], 0)
+        self.assertLessEqual(remaining[0], 3)
+
+class DeadlinePropagationTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://deadline.test', 'test', rate_limit=0)
+    
+    def test_attempt_timeouts_are_clamped_to_the_deadline(self):
+        session = fake_session(make_response(200, b'<html>page</html>'))
+        
+        with mock.patch('anime_api.services.http_service.session_pool.get', return_value=session):
+            with request_deadline.scope(0.5):
+                self.service._fetch_from(self.origin, '/home', 10, 0)
+        
+        connect_timeout, read_timeout = session.get.call_args.kwargs['timeout']
+        self.assertLessEqual(read_timeout, 0.5)
+        self.assertLessEqual(connect_timeout, 0.5)
+    
+    def test_spent_deadline_makes_no_request(self):
+        session = fake_session()
+        
+        with mock.patch('anime_api.services.http_service.session_pool.get', return_value=session):
+            with request_deadline.scope(0):
+                result = self.service._fetch_from(self.origin, '/home', 10, 3)
+        
+        self.assertEqual(result['error'], 'deadline_exceeded')
+        session.get.assert_not_called()
+    
+    def test_deadline_follows_the_request_into_hedging_threads(self):
+        mirror = Origin('mirror', 'https://deadline-mirror.test', 'mirror', rate_limit=0)
+        seen = []
+        
+        def fetch_from(origin, *args):
+            seen.append((threading.current_thread().name, request_deadline.remaining()))
+            return {'success': True, 'data': 'page'}
+        
+        with mock.patch('anime_api.services.http_service.origins.mirrors_of', return_value=[mirror]), \
+                mock.patch.object(self.service, '_fetch_from', side_effect=fetch_from):
+            with request_deadline.scope(5):
+                self.service._fetch(self.origin, '/home', 10, 0)
+        
+        thread_name, remaining = seen[0]
+        self.assertEqual(thread_name, 'hedged-fetch')
+        self.assertIsNotNone(remaining)
+        self.assertLessEqual(remaining, 5)
+
+class SingleFlightDeadlineTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.single_flight = SingleFlight()
+    
+    def test_lock_wait_is_bounded_by_the_request_deadline(self):
+        lock = mock.Mock()
+        lock.acquire.return_value = False
+        
+        with mock.patch.object(self.single_flight, '_get_distributed_lock', return_value=lock):
+            with request_deadline.scope(0.5):
+                self.single_flight.do('key', lambda: 'page')
+            
+            self.assertLessEqual(lock.acquire.call_args.kwargs['blocking_timeout'], 0.5)
+            
+            lock.reset_mock()
+            with request_deadline.scope(0):
+                self.assertEqual(self.single_flight.do('key', lambda: 'page'), 'page')
+            lock.acquire.assert_not_called()
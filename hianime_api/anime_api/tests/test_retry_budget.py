@@ -0,0 +1,162 @@
+from django.test import SimpleTestCase, override_settings
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from requests.exceptions import Timeout
+from unittest import mock
+
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+from ..services.request_deadline import request_deadline
+from ..services.retry_budget import RetryBudget
+from .helpers import fake_session, make_response
+
+class RetryBudgetTests(SimpleTestCase):
+    
+    def test_budget_starts_full_and_runs_out(self):
+        budget = RetryBudget(0.5, 2)
+        
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+    
+    def test_successes_earn_retries_up_to_the_maximum(self):
+        budget = RetryBudget(0.5, 2)
+        budget.withdraw()
+        budget.withdraw()
+        
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+        
+        for _ in range(10):
+            budget.deposit()
+        self.assertEqual(budget.tokens, 2)
+
+@override_settings(RETRY_BACKOFF_BASE=0.5, RETRY_BACKOFF_CAP=10, RETRY_BACKOFF_SYNC_CAP=2, RETRY_AFTER_MAX=10)
+class RetryDelayTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://retry.test', 'test', retry_budget_max=1000)
+        throttle = mock.patch('anime_api.services.http_service.upstream_scheduler.throttle')
+        self.throttle = throttle.start()
+        self.addCleanup(throttle.stop)
+    
+    def retry_delay(self, delay=0, response=None, cap=None, attempt=0):
+        return self.service._retry_delay(self.origin, 'https://retry.test/home', attempt, 3, delay, response, cap)
+    
+    def test_decorrelated_jitter_stays_within_its_bounds(self):
+        for previous in (0, 0.5, 1, 2, 5):
+            for _ in range(200):
+                delay = self.retry_delay(previous)
+                self.assertGreaterEqual(delay, 0.5)
+                self.assertLessEqual(delay, min(10, max(previous, 0.5) * 3))
+    
+    def test_sync_cap_bounds_the_backoff(self):
+        for _ in range(200):
+            self.assertLessEqual(self.retry_delay(5, cap=2), 2)
+    
+    def test_last_attempt_is_not_retried(self):
+        self.assertIsNone(self.retry_delay(attempt=3))
+    
+    def test_retry_after_in_seconds_stretches_the_backoff(self):
+        with self.assertLogs('anime_api.services.http_service', 'WARNING'):
+            delay = self.retry_delay(response=make_response(503, headers={'Retry-After': '4'}))
+        
+        self.assertGreaterEqual(delay, 4)
+        self.assertLessEqual(delay, 10)
+        self.throttle.assert_called_once_with(self.origin, 4.0)
+    
+    def test_retry_after_as_an_http_date_is_parsed(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=6)
+        response = make_response(429, headers={'Retry-After': format_datetime(retry_at, usegmt=True)})
+        
+        with self.assertLogs('anime_api.services.http_service', 'WARNING'):
+            delay = self.retry_delay(response=response)
+        
+        self.assertGreater(delay, 4)
+        self.assertLessEqual(delay, 10)
+        self.assertEqual(self.origin.stats.snapshot()['rate_limited'], 1)
+    
+    def test_unparsable_retry_after_is_ignored(self):
+        delay = self.retry_delay(response=make_response(503, headers={'Retry-After': 'soon'}))
+        
+        self.assertLessEqual(delay, 1.5)
+        self.throttle.assert_not_called()
+    
+    def test_retry_after_beyond_the_cap_gives_up(self):
+        with self.assertLogs('anime_api.services.http_service', 'WARNING'):
+            self.assertIsNone(self.retry_delay(response=make_response(503, headers={'Retry-After': '30'})))
+            # The sync cap is lower
+            self.assertIsNone(self.retry_delay(response=make_response(503, headers={'Retry-After': '5'}), cap=2))
+    
+    def test_backoff_ends_before_the_request_deadline(self):
+        with mock.patch('anime_api.services.http_service.origin_health.expected_latency', return_value=0.5), \
+                request_deadline.scope(1.5):
+            for _ in range(50):
+                self.assertLessEqual(self.retry_delay(5), 1)
+    
+    def test_no_retry_without_time_for_it(self):
+        with mock.patch('anime_api.services.http_service.origin_health.expected_latency', return_value=2), \
+                request_deadline.scope(1), \
+                self.assertLogs('anime_api.services.http_service', 'WARNING'):
+            self.assertIsNone(self.retry_delay())
+
+class RetryExhaustionTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.service = HTTPService()
+    
+    def fetch(self, origin, session, max_retries=3):
+        with mock.patch('anime_api.services.http_service.session_pool.get', return_value=session), \
+                mock.patch('anime_api.services.http_service.time.sleep') as sleep, \
+                self.assertLogs('anime_api.services.http_service', 'WARNING'):
+            result = self.service._fetch_from(origin, '/home', 5, max_retries)
+        return result, sleep
+    
+    def test_exhausted_budget_stops_retrying(self):
+        origin = Origin('test', 'https://exhausted.test', 'test', retry_budget_max=1)
+        session = fake_session(*[Timeout('slow')] * 4)
+        
+        result, sleep = self.fetch(origin, session)
+        
+        self.assertEqual(result['error'], 'timeout')
+        # One retry, then the budget is empty
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(sleep.call_count, 1)
+        stats = origin.stats.snapshot()
+        self.assertEqual(stats['retries'], 1)
+        self.assertEqual(stats['retry_budget_exhausted'], 1)
+    
+    def test_retries_stop_after_max_retries(self):
+        origin = Origin('test', 'https://retries.test', 'test', retry_budget_max=1000)
+        session = fake_session(*[Timeout('slow')] * 3)
+        
+        result, sleep = self.fetch(origin, session, max_retries=2)
+        
+        self.assertEqual(result['error'], 'timeout')
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(origin.stats.snapshot()['retries'], 2)
+    
+    @override_settings(RETRY_BACKOFF_SYNC_CAP=2)
+    def test_sync_backoff_is_capped(self):
+        origin = Origin('test', 'https://capped.test', 'test', retry_budget_max=1000)
+        session = fake_session(*[Timeout('slow')] * 4)
+        
+        result, sleep = self.fetch(origin, session)
+        
+        self.assertEqual(sleep.call_count, 3)
+        for call in sleep.call_args_list:
+            self.assertLessEqual(call.args[0], 2)
+    
+    def test_success_refills_the_budget(self):
+        origin = Origin('test', 'https://refill.test', 'test', retry_budget_ratio=0.5, retry_budget_max=1)
+        origin.retry_budget.withdraw()
+        session = fake_session(make_response(200, b'<html></html>'), make_response(200, b'<html></html>'))
+        
+        with mock.patch('anime_api.services.http_service.session_pool.get', return_value=session):
+            self.service._fetch_from(origin, '/home', 5, 0)
+            self.service._fetch_from(origin, '/home', 5, 0)
+        
+        self.assertEqual(origin.retry_budget.tokens, 1)
@@ -0,0 +1,97 @@
+from django.test import SimpleTestCase
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import requests
+import threading
+
+from ..services.origins import Origin
+from ..services.session_pool import SessionPool, _OriginAdapter
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Set by a test to hold responses until that many requests are being served
+    barrier = None
+    
+    def do_GET(self):
+        if self.barrier is not None:
+            self.barrier.wait(2)
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class SessionPoolTests(SimpleTestCase):
+    
+    def setUp(self):
+        _KeepAliveHandler.barrier = None
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+    
+    def origin(self, **options):
+        return Origin('local', f"http://127.0.0.1:{self.server.server_port}", 'local', **options)
+    
+    def session(self, origin):
+        session = requests.Session()
+        session.mount(origin.base_url, _OriginAdapter(origin))
+        self.addCleanup(session.close)
+        return session
+    
+    def test_each_origin_gets_an_adapter_sized_for_it(self):
+        primary = Origin('primary', 'https://primary.test', 'primary', pool_maxsize=4)
+        mirror = Origin('mirror', 'https://mirror.test', 'mirror', pool_maxsize=16, pool_block=True)
+        
+        with mock.patch('anime_api.services.session_pool.origins.all', return_value=[primary, mirror]):
+            session = SessionPool().get()
+        
+        for origin in (primary, mirror):
+            adapter = session.get_adapter(origin.url('/home'))
+            self.assertIsInstance(adapter, _OriginAdapter)
+            self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], origin.pool_maxsize)
+            self.assertEqual(adapter.poolmanager.connection_pool_kw['block'], origin.pool_block)
+    
+    def test_one_session_is_shared_between_threads(self):
+        pool = SessionPool()
+        sessions = []
+        
+        threads = [threading.Thread(target=lambda: sessions.append(pool.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(2)
+        
+        self.assertEqual(len(sessions), 8)
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+    
+    def test_kept_alive_connection_is_reused_and_counted(self):
+        origin = self.origin(pool_maxsize=2)
+        session = self.session(origin)
+        
+        for _ in range(3):
+            session.get(origin.url('/home'), timeout=2).raise_for_status()
+        
+        stats = origin.stats.snapshot()
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['connections_reused'], 2)
+    
+    def test_connections_beyond_the_pool_size_are_counted_and_discarded(self):
+        origin = self.origin(pool_maxsize=1)
+        session = self.session(origin)
+        _KeepAliveHandler.barrier = threading.Barrier(2)
+        
+        threads = [threading.Thread(target=session.get, args=(origin.url('/home'),), kwargs={'timeout': 2}) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(3)
+        
+        stats = origin.stats.snapshot()
+        self.assertEqual(stats['connections_opened'], 2)
+        self.assertEqual(stats['pool_exhausted'], 1)
+        self.assertEqual(stats['connections_discarded'], 1)
@@ -0,0 +1,154 @@
+from django.test import SimpleTestCase
+from unittest import mock
+import asyncio
+import threading
+import time
+
+from ..services.single_flight import SingleFlight
+from .helpers import wait_until
+
+class SingleFlightTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.single_flight = SingleFlight()
+    
+    def test_followers_share_the_leaders_result(self):
+        calls = []
+        release = threading.Event()
+        
+        def fetch():
+            calls.append(threading.current_thread().name)
+            release.wait(2)
+            return {'success': True, 'data': 'page'}
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.single_flight.do('key', fetch)))
+            for _ in range(5)
+        ]
+        threads[0].start()
+        wait_until(lambda: calls)
+        for thread in threads[1:]:
+            thread.start()
+        # Followers are waiting on the leader's call
+        wait_until(lambda: all(thread.is_alive() for thread in threads[1:]))
+        release.set()
+        for thread in threads:
+            thread.join(2)
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+    
+    def test_follower_fetches_itself_when_the_leader_fails(self):
+        leader_started = threading.Event()
+        release = threading.Event()
+        
+        def failing_fetch():
+            leader_started.set()
+            release.wait(2)
+            raise RuntimeError('upstream broke')
+        
+        errors = []
+        def lead():
+            try:
+                self.single_flight.do('key', failing_fetch)
+            except RuntimeError as e:
+                errors.append(e)
+        
+        leader = threading.Thread(target=lead)
+        leader.start()
+        leader_started.wait(2)
+        
+        results = []
+        follower = threading.Thread(target=lambda: results.append(self.single_flight.do('key', lambda: 'own fetch')))
+        follower.start()
+        # Let the follower start waiting on the leader's call
+        time.sleep(0.05)
+        release.set()
+        leader.join(2)
+        follower.join(2)
+        
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, ['own fetch'])
+    
+    async def test_async_followers_share_the_leaders_result(self):
+        calls = 0
+        release = asyncio.Event()
+        
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return 'page'
+        
+        tasks = [asyncio.create_task(self.single_flight.ado('key', fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        
+        self.assertEqual(await asyncio.gather(*tasks), ['page'] * 3)
+        self.assertEqual(calls, 1)
+    
+    async def test_cancelled_leader_leaves_the_fetch_to_its_followers(self):
+        calls = 0
+        release = asyncio.Event()
+        
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return 'page'
+        
+        leader = asyncio.create_task(self.single_flight.ado('key', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.single_flight.ado('key', fetch))
+        await asyncio.sleep(0)
+        
+        # The leader's client goes away while the fetch is running
+        leader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        release.set()
+        
+        self.assertEqual(await follower, 'page')
+        self.assertEqual(calls, 1)
+    
+    async def test_async_follower_fetches_itself_when_the_leader_fails(self):
+        release = asyncio.Event()
+        
+        async def failing_fetch():
+            await release.wait()
+            raise RuntimeError('upstream broke')
+        
+        async def own_fetch():
+            return 'own fetch'
+        
+        leader = asyncio.create_task(self.single_flight.ado('key', failing_fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.single_flight.ado('key', own_fetch))
+        await asyncio.sleep(0)
+        release.set()
+        
+        with self.assertRaises(RuntimeError):
+            await leader
+        self.assertEqual(await follower, 'own fetch')
+    
+    def test_fetches_without_the_lock_when_it_times_out(self):
+        lock = mock.Mock()
+        lock.acquire.return_value = False
+        
+        with mock.patch.object(self.single_flight, '_get_distributed_lock', return_value=lock):
+            result = self.single_flight.do('key', lambda: 'page')
+        
+        self.assertEqual(result, 'page')
+        lock.acquire.assert_called_once()
+        lock.release.assert_not_called()
+    
+    def test_releases_the_lock_after_fetching(self):
+        lock = mock.Mock()
+        lock.acquire.return_value = True
+        
+        with mock.patch.object(self.single_flight, '_get_distributed_lock', return_value=lock):
+            self.single_flight.do('key', lambda: 'page')
+        
+        lock.release.assert_called_once()
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from unittest import mock
+import threading
+import time
+
+from ..services.http_service import HTTPService
+from ..services.origins import Origin
+
+class StaleWhileRevalidateTests(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.service = HTTPService()
+        self.origin = Origin('test', 'https://upstream.test', 'test', rate_limit=0)
+        patcher = mock.patch('anime_api.services.http_service.origins.get', return_value=self.origin)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.shutdown_refreshes)
+    
+    def shutdown_refreshes(self):
+        if self.service._refresh_executor is not None:
+            self.service._refresh_executor.shutdown(wait=True)
+    
+    def stale_entry(self):
+        return {
+            'success': True,
+            'data': '<html>cached</html>',
+            'status_code': 200,
+            'etag': None,
+            'last_modified': None,
+            'cache_key': 'test:/home',
+            'page_version': 1.0,
+            'fresh_until': time.time() - 10
+        }
+    
+    def test_serves_stale_entry_while_refreshing_it(self):
+        cache.set('test:/home', self.stale_entry(), 300)
+        release = threading.Event()
+        page = {'success': True, 'data': '<html>new</html>', 'status_code': 200, 'etag': None, 'last_modified': None}
+        
+        def slow_fetch(*args, **kwargs):
+            release.wait(2)
+            return page
+        
+        with mock.patch.object(self.service, '_fetch', side_effect=slow_fetch) as fetch:
+            # Answered from the stale copy before the refresh has finished
+            result = self.service.fetch('test', '/home', cache_key='test:/home')
+            self.assertEqual(result['data'], '<html>cached</html>')
+            release.set()
+            self.shutdown_refreshes()
+        
+        fetch.assert_called_once()
+        self.assertEqual(self.origin.stats.snapshot()['stale_hits'], 1)
+    
+    def test_refetched_page_replaces_stale_entry(self):
+        cache.set('test:/home', self.stale_entry(), 300)
+        page = {'success': True, 'data': '<html>new</html>', 'status_code': 200, 'etag': '"v2"', 'last_modified': None}
+        
+        with mock.patch.object(self.service, '_fetch', return_value=page):
+            self.service.fetch('test', '/home', cache_key='test:/home')
+            self.shutdown_refreshes()
+        
+        entry = cache.get('test:/home')
+        self.assertEqual(entry['data'], '<html>new</html>')
+        self.assertNotEqual(entry['page_version'], 1.0)
+        self.assertGreater(entry['fresh_until'], time.time())
+    
+    def test_stale_key_is_refreshed_once_at_a_time(self):
+        cache.set('test:/home', self.stale_entry(), 300)
+        release = threading.Event()
+        page = {'success': True, 'data': '<html>new</html>', 'status_code': 200, 'etag': None, 'last_modified': None}
+        
+        def slow_fetch(*args, **kwargs):
+            release.wait(2)
+            return page
+        
+        with mock.patch.object(self.service, '_fetch', side_effect=slow_fetch) as fetch:
+            for _ in range(3):
+                self.service.fetch('test', '/home', cache_key='test:/home')
+            release.set()
+            self.shutdown_refreshes()
+        
+        fetch.assert_called_once()
+        self.assertEqual(self.origin.stats.snapshot()['stale_hits'], 3)
+    
+    def test_failed_refresh_keeps_the_stale_entry(self):
+        cache.set('test:/home', self.stale_entry(), 300)
+        failure = {'success': False, 'message': 'upstream broke', 'error': 'request_error', 'status_code': 502}
+        
+        with mock.patch.object(self.service, '_fetch', return_value=failure):
+            self.service.fetch('test', '/home', cache_key='test:/home')
+            self.shutdown_refreshes()
+        
+        self.assertEqual(cache.get('test:/home')['data'], '<html>cached</html>')
+    
+    def test_fresh_entry_is_not_refreshed(self):
+        entry = dict(self.stale_entry(), fresh_until=time.time() + 60)
+        cache.set('test:/home', entry, 300)
+        
+        with mock.patch.object(self.service, '_fetch') as fetch:
+            self.service.fetch('test', '/home', cache_key='test:/home')
+        
+        fetch.assert_not_called()
+        self.assertIsNone(self.service._refresh_executor)
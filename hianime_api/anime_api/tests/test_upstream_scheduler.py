@@ -0,0 +1,102 @@
+from django.test import SimpleTestCase, override_settings
+import asyncio
+import threading
+
+from ..services.origins import Origin
+from ..services.upstream_scheduler import UpstreamQueueTimeout, UpstreamScheduler
+from .helpers import wait_until
+
+class UpstreamSchedulerTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.scheduler = UpstreamScheduler()
+        self.origin = Origin('test', 'https://upstream.test', 'test', rate_limit=0, max_in_flight=1)
+    
+    def queued(self):
+        return self.scheduler.state(self.origin)['queued']
+    
+    def test_interactive_requests_go_before_background_ones(self):
+        order = []
+        
+        def request(name, background):
+            if background:
+                with self.scheduler.background(), self.scheduler.slot(self.origin):
+                    order.append(name)
+            else:
+                with self.scheduler.slot(self.origin):
+                    order.append(name)
+        
+        threads = []
+        with self.scheduler.slot(self.origin):
+            # Queue in arrival order: background, background, interactive, interactive
+            for name, background in [('bg-1', True), ('bg-2', True), ('user-1', False), ('user-2', False)]:
+                thread = threading.Thread(target=request, args=(name, background))
+                thread.start()
+                threads.append(thread)
+                wait_until(lambda: self.queued() == len(threads))
+        
+        for thread in threads:
+            thread.join(2)
+        
+        self.assertEqual(order, ['user-1', 'user-2', 'bg-1', 'bg-2'])
+    
+    async def test_async_waiters_are_served_by_priority(self):
+        order = []
+        
+        async def request(name, background):
+            if background:
+                with self.scheduler.background():
+                    async with self.scheduler.aslot(self.origin):
+                        order.append(name)
+            else:
+                async with self.scheduler.aslot(self.origin):
+                    order.append(name)
+        
+        async with self.scheduler.aslot(self.origin):
+            tasks = []
+            for name, background in [('bg', True), ('user', False)]:
+                tasks.append(asyncio.create_task(request(name, background)))
+                await asyncio.sleep(0)
+            self.assertEqual(self.queued(), 2)
+        
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ['user', 'bg'])
+    
+    @override_settings(UPSTREAM_QUEUE_TIMEOUT=0.05)
+    def test_gives_up_queueing_after_the_queue_timeout(self):
+        with self.scheduler.slot(self.origin):
+            with self.assertRaises(UpstreamQueueTimeout):
+                with self.scheduler.slot(self.origin):
+                    pass
+        
+        self.assertEqual(self.queued(), 0)
+    
+    @override_settings(UPSTREAM_QUEUE_TIMEOUT=0.05)
+    def test_burst_is_spent_before_requests_wait_for_tokens(self):
+        origin = Origin('limited', 'https://limited.test', 'limited', rate_limit=1, burst=2, max_in_flight=10)
+        
+        for _ in range(2):
+            with self.scheduler.slot(origin):
+                pass
+        with self.assertRaises(UpstreamQueueTimeout):
+            with self.scheduler.slot(origin):
+                pass
+    
+    @override_settings(UPSTREAM_PROCESSES=4)
+    def test_rate_and_burst_are_shared_between_processes(self):
+        origin = Origin('shared', 'https://shared.test', 'shared', rate_limit=8, burst=6, max_in_flight=10)
+        limiter = self.scheduler._get_limiter(origin)
+        
+        self.assertEqual(limiter.rate, 2)
+        self.assertEqual(limiter.burst, 1.5)
+        # The in-flight cap is per process
+        self.assertEqual(limiter.max_in_flight, 10)
+    
+    @override_settings(UPSTREAM_QUEUE_TIMEOUT=0.05)
+    def test_throttled_origin_grants_no_slots(self):
+        self.scheduler.throttle(self.origin, 30)
+        
+        with self.assertRaises(UpstreamQueueTimeout):
+            with self.scheduler.slot(self.origin):
+                pass
+        self.assertGreater(self.scheduler.state(self.origin)['paused_for'], 0)
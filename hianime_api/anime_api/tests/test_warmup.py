@@ -0,0 +1,164 @@
+from django.test import SimpleTestCase, override_settings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import httpx
+import requests
+import socket
+import threading
+
+from ..extractors import anime_details_extractor, episodes_extractor, homepage_extractor, search_extractor
+from ..services.dns_cache import CachedDNSTransport, DNSCache
+from ..services.origins import Origin
+from ..services.session_pool import _OriginAdapter
+from ..warmup import WarmUp
+
+def lookup_result(address, port):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port))]
+
+class _HostEchoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = self.headers['Host'].encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class PrimePagesTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.warm_up = WarmUp()
+    
+    def page(self, endpoint):
+        return self.warm_up._page(endpoint)
+    
+    def test_endpoints_are_matched_to_the_views_that_fetch_them(self):
+        self.assertEqual(self.page('/home'), ('/home', [(homepage_extractor, 'extract')]))
+        self.assertEqual(self.page('/most-popular'), ('/most-popular?page=1', [(search_extractor, 'extract_search_results')]))
+        self.assertEqual(self.page('/tv?page=3'), ('/tv?page=3', [(search_extractor, 'extract_search_results')]))
+        self.assertEqual(self.page('/az-list/all'), ('/az-list/all?page=1', [(search_extractor, 'extract_search_results')]))
+        self.assertEqual(
+            self.page('/search?keyword=naruto'),
+            ('/search?keyword=naruto&page=1', [(search_extractor, 'extract_search_results')])
+        )
+        self.assertEqual(
+            self.page('/search/suggestion?keyword=one'),
+            ('/search/suggestion?keyword=one', [(search_extractor, 'extract_suggestions')])
+        )
+        self.assertEqual(
+            self.page('/one-piece-100'),
+            ('/one-piece-100', [(anime_details_extractor, 'extract'), (episodes_extractor, 'extract')])
+        )
+    
+    def test_endpoints_no_view_fetches_are_rejected(self):
+        for endpoint in ('/az-list', '/az-list/zz', '/most-popular/extra', '/search', '/search/suggestion', '/watch/one-piece-100?ep=1'):
+            with self.subTest(endpoint=endpoint):
+                self.assertIsNone(self.page(endpoint))
+    
+    @override_settings(WARMUP_PRIME_ENDPOINTS=['/home', '/watch/x?ep=1', '/one-piece-100'])
+    def test_pages_are_extracted_like_their_views_do_and_unknown_ones_skipped(self):
+        results = [{'success': True, 'data': '<html>home</html>'}, {'success': True, 'data': '<html>anime</html>'}]
+        
+        with mock.patch('anime_api.warmup.http_service.get_many', return_value=results) as get_many, \
+                mock.patch('anime_api.warmup.extraction_cache.extract') as extract, \
+                self.assertLogs('anime_api.warmup', 'WARNING') as logs:
+            self.warm_up.prime_pages()
+        
+        get_many.assert_called_once_with(['/home', '/one-piece-100'])
+        self.assertEqual(extract.call_args_list, [
+            mock.call(results[0], homepage_extractor, 'extract'),
+            mock.call(results[1], anime_details_extractor, 'extract'),
+            mock.call(results[1], episodes_extractor, 'extract')
+        ])
+        self.assertIn('/watch/x?ep=1', logs.output[0])
+    
+    @override_settings(WARMUP_PRIME_ENDPOINTS=['/most-popular'])
+    def test_failed_fetches_are_not_extracted(self):
+        with mock.patch('anime_api.warmup.http_service.get_many', return_value=[{'success': False, 'message': 'down'}]), \
+                mock.patch('anime_api.warmup.extraction_cache.extract') as extract, \
+                self.assertLogs('anime_api.warmup', 'WARNING'):
+            self.warm_up.prime_pages()
+        
+        extract.assert_not_called()
+
+class DNSCacheTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.dns_cache = DNSCache()
+    
+    def test_lookups_are_cached_for_the_ttl(self):
+        with mock.patch('anime_api.services.dns_cache.socket.getaddrinfo', return_value=lookup_result('10.0.0.1', 443)) as getaddrinfo:
+            self.assertEqual(self.dns_cache.resolve('https://upstream.test'), '10.0.0.1')
+            self.assertEqual(self.dns_cache.address('upstream.test', 443), '10.0.0.1')
+        
+        getaddrinfo.assert_called_once_with('upstream.test', 443, 0, socket.SOCK_STREAM)
+    
+    def test_failed_lookup_uses_the_last_known_address(self):
+        with mock.patch('anime_api.services.dns_cache.socket.getaddrinfo', return_value=lookup_result('10.0.0.1', 443)):
+            self.dns_cache.address('upstream.test', 443)
+        
+        with mock.patch('anime_api.services.dns_cache.time.monotonic', return_value=10 ** 9), \
+                mock.patch('anime_api.services.dns_cache.socket.getaddrinfo', side_effect=socket.gaierror('down')), \
+                self.assertLogs('anime_api.services.dns_cache', 'WARNING'):
+            self.assertEqual(self.dns_cache.address('upstream.test', 443), '10.0.0.1')
+            # Without one the host is connected to as usual, reporting the error
+            self.assertEqual(self.dns_cache.address('other.test', 443), 'other.test')
+    
+    @override_settings(DNS_CACHE_TTL=0)
+    def test_disabled_cache_leaves_hosts_alone(self):
+        with mock.patch('anime_api.services.dns_cache.socket.getaddrinfo') as getaddrinfo:
+            self.assertEqual(self.dns_cache.address('upstream.test', 443), 'upstream.test')
+        
+        getaddrinfo.assert_not_called()
+    
+    def test_warm_up_leaves_the_process_resolver_alone(self):
+        getaddrinfo = socket.getaddrinfo
+        origin = Origin('test', 'https://upstream.test', 'test')
+        
+        with mock.patch('anime_api.warmup.origins.all', return_value=[origin]), \
+                mock.patch('anime_api.warmup.dns_cache', self.dns_cache), \
+                mock.patch.object(self.dns_cache, 'address', return_value='10.0.0.1') as address:
+            WarmUp().resolve_hosts()
+        
+        address.assert_called_once_with('upstream.test', 443)
+        self.assertIs(socket.getaddrinfo, getaddrinfo)
+
+class CachedDNSConnectionTests(SimpleTestCase):
+    """Upstream clients connect to the cached address but still send the host name"""
+    
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _HostEchoHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        
+        self.port = self.server.server_port
+        self.url = f"http://upstream.test:{self.port}/home"
+        # upstream.test doesn't resolve, so only a cached address reaches the server
+        self.dns_cache = DNSCache()
+        self.dns_cache._store('upstream.test', self.port, lookup_result('127.0.0.1', self.port))
+    
+    def test_session_pool_connections_use_the_cached_address(self):
+        origin = Origin('test', f"http://upstream.test:{self.port}", 'test')
+        session = requests.Session()
+        session.mount(origin.base_url, _OriginAdapter(origin))
+        self.addCleanup(session.close)
+        
+        with mock.patch('anime_api.services.session_pool.dns_cache', self.dns_cache):
+            response = session.get(self.url, timeout=2)
+        
+        self.assertEqual(response.text, f"upstream.test:{self.port}")
+    
+    async def test_async_transport_connections_use_the_cached_address(self):
+        limits = httpx.Limits(max_connections=2, max_keepalive_connections=2)
+        
+        with mock.patch('anime_api.services.dns_cache.dns_cache', self.dns_cache):
+            async with httpx.AsyncClient(transport=CachedDNSTransport(limits)) as client:
+                response = await client.get(self.url, timeout=2)
+        
+        self.assertEqual(response.text, f"upstream.test:{self.port}")
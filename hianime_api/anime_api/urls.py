@@ -11,7 +11,8 @@ from .views import (
     StreamingAPIView,
     AnimeListAPIView,
     GenresAPIView,
-    DocumentationAPIView
+    DocumentationAPIView,
+    StatsAPIView
 )
 
 urlpatterns = [
@@ -32,4 +33,5 @@ urlpatterns = [
     path('servers/', ServersAPIView.as_view(), name='servers'),
     path('stream/', StreamingAPIView.as_view(), name='stream'),
     path('genres/', GenresAPIView.as_view(), name='genres'),
+    path('stats/', StatsAPIView.as_view(), name='stats'),
 ]
\ No newline at end of file
@@ -5,6 +5,7 @@ from .episodes_view import EpisodesAPIView
 from .streaming_view import ServersAPIView, StreamingAPIView
 from .anime_list_view import AnimeListAPIView, GenresAPIView
 from .documentation_view import DocumentationAPIView
+from .stats_view import StatsAPIView
 from .root import RootAPIView
 
 __all__ = [
@@ -18,5 +19,6 @@ __all__ = [
     'AnimeListAPIView',
     'GenresAPIView',
     'DocumentationAPIView',
+    'StatsAPIView',
     'RootAPIView'
 ]
\ No newline at end of file
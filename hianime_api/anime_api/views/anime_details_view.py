@@ -1,4 +1,3 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django_ratelimit.decorators import ratelimit
@@ -8,11 +7,13 @@ import logging
 
 from ..services import http_service
 from ..services.fallback_service import fallback_service
-from ..extractors import anime_details_extractor
+from ..services.extraction_cache import extraction_cache
+from ..extractors import document_cache, anime_details_extractor
+from .base import AnimeAPIView
 
 logger = logging.getLogger(__name__)
 
-class AnimeDetailsAPIView(APIView):
+class AnimeDetailsAPIView(AnimeAPIView):
     """API endpoint for fetching anime details"""
     
     @extend_schema(
@@ -27,43 +28,63 @@ class AnimeDetailsAPIView(APIView):
         """
         try:
             # Make request to anime details page
-            result = http_service.get(f'/{anime_id}')
+            result = http_service.get(f'/{anime_id}', stream_parser=document_cache.feed_parser)
+            return self._build_response(result, anime_id)
             
-            if not result['success']:
-                logger.warning(f"External API failed, using fallback anime details for {anime_id}: {result['message']}")
-                # Use fallback data when external API fails
-                fallback_data = fallback_service.get_anime_details(anime_id)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to external API unavailability'
-                }, status=status.HTTP_200_OK)
-            
-            # Extract data from HTML
-            extracted_data = anime_details_extractor.extract(result['data'])
+        except Exception as e:
+            return self._handle_unexpected_error(e, anime_id)
+    
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    async def aget(self, request, anime_id):
+        """
+        Async variant of get(), used when ASYNC_VIEWS is enabled
+        """
+        try:
+            # Make request to anime details page
+            result = await http_service.aget(f'/{anime_id}', stream_parser=document_cache.feed_parser)
+            return await self.abuild_response(result, anime_id)
             
+        except Exception as e:
+            return self._handle_unexpected_error(e, anime_id)
+    
+    def _build_response(self, result, anime_id):
+        """Build the API response from an upstream fetch result"""
+        if not result['success']:
+            logger.warning(f"External API failed, using fallback anime details for {anime_id}: {result['message']}")
+            # Use fallback data when external API fails
+            fallback_data = fallback_service.get_anime_details(anime_id)
             return Response({
                 'success': True,
-                'data': extracted_data,
-                'source': 'external'
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to external API unavailability'
             }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Unexpected error in anime details view for {anime_id}: {str(e)}")
-            # Use fallback data when there's an exception
-            try:
-                fallback_data = fallback_service.get_anime_details(anime_id)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to unexpected error'
-                }, status=status.HTTP_200_OK)
-            except Exception as fallback_error:
-                logger.error(f"Fallback data also failed for {anime_id}: {str(fallback_error)}")
-                return Response({
-                    'success': False,
-                    'message': 'An unexpected error occurred',
-                    'error': 'unexpected_error'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        
+        # Extract data from HTML
+        extracted_data = extraction_cache.extract(result, anime_details_extractor)
+        
+        return Response({
+            'success': True,
+            'data': extracted_data,
+            'source': 'external'
+        }, status=status.HTTP_200_OK)
+    
+    def _handle_unexpected_error(self, e, anime_id):
+        """Serve fallback data after an unexpected error"""
+        logger.error(f"Unexpected error in anime details view for {anime_id}: {str(e)}")
+        # Use fallback data when there's an exception
+        try:
+            fallback_data = fallback_service.get_anime_details(anime_id)
+            return Response({
+                'success': True,
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to unexpected error'
+            }, status=status.HTTP_200_OK)
+        except Exception as fallback_error:
+            logger.error(f"Fallback data also failed for {anime_id}: {str(fallback_error)}")
+            return Response({
+                'success': False,
+                'message': 'An unexpected error occurred',
+                'error': 'unexpected_error'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
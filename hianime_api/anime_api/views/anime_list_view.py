@@ -1,4 +1,3 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django_ratelimit.decorators import ratelimit
@@ -9,11 +8,13 @@ import logging
 
 from ..services import http_service
 from ..services.fallback_service import fallback_service
-from ..extractors import search_extractor
+from ..services.extraction_cache import extraction_cache
+from ..extractors import document_cache, search_extractor, homepage_extractor
+from .base import AnimeAPIView
 
 logger = logging.getLogger(__name__)
 
-class AnimeListAPIView(APIView):
+class AnimeListAPIView(AnimeAPIView):
     """API endpoint for fetching anime lists"""
     
     VALID_QUERIES = {
@@ -71,81 +72,113 @@ class AnimeListAPIView(APIView):
         Get anime lists by category and query type
         """
         try:
-            page = request.query_params.get('page', '1')
-            
-            # Validate query
-            if query not in self.VALID_QUERIES:
-                return Response({
-                    'success': False,
-                    'message': f'Invalid query type: {query}',
-                    'error': 'invalid_query'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            query_config = self.VALID_QUERIES[query]
-            
-            # Check if category is required
-            if query_config['has_category'] and not category:
-                return Response({
-                    'success': False,
-                    'message': f'Category is required for query type: {query}',
-                    'error': 'missing_category'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Validate category if provided
-            if category and query_config['has_category']:
-                valid_categories = query_config['category'].split(',')
-                if category not in valid_categories:
-                    return Response({
-                        'success': False,
-                        'message': f'Invalid category for query type {query}. Valid categories: {query_config["category"]}',
-                        'error': 'invalid_category'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-            
-            try:
-                page = int(page)
-                if page < 1:
-                    page = 1
-            except ValueError:
-                return Response({
-                    'success': False,
-                    'message': 'Page parameter must be a valid number',
-                    'error': 'invalid_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Construct endpoint URL
-            if query_config['has_category']:
-                endpoint = f'/{query}/{category}?page={page}'
-            else:
-                endpoint = f'/{query}?page={page}'
+            endpoint, error = self._build_endpoint(request, query, category)
+            if error:
+                return error
             
             # Make request to list page
-            result = http_service.get(endpoint)
+            result = http_service.get(endpoint, stream_parser=document_cache.feed_parser)
+            return self._build_response(result, query)
             
-            if not result['success']:
-                logger.error(f"Failed to fetch anime list for {query}: {result['message']}")
-                return Response({
-                    'success': False,
-                    'message': result['message'],
-                    'error': result.get('error', 'unknown_error')
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            # Extract data from HTML
-            extracted_data = search_extractor.extract_search_results(result['data'])
+        except Exception as e:
+            return self._handle_unexpected_error(e, query)
+    
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    async def aget(self, request, query, category=None):
+        """
+        Async variant of get(), used when ASYNC_VIEWS is enabled
+        """
+        try:
+            endpoint, error = self._build_endpoint(request, query, category)
+            if error:
+                return error
             
-            return Response({
-                'success': True,
-                'data': extracted_data
-            }, status=status.HTTP_200_OK)
+            # Make request to list page
+            result = await http_service.aget(endpoint, stream_parser=document_cache.feed_parser)
+            return await self.abuild_response(result, query)
             
         except Exception as e:
-            logger.error(f"Unexpected error in anime list view for {query}: {str(e)}")
+            return self._handle_unexpected_error(e, query)
+    
+    def _build_endpoint(self, request, query, category):
+        """Validate the query, category and page, returning (endpoint, error_response)"""
+        page = request.query_params.get('page', '1')
+        
+        # Validate query
+        if query not in self.VALID_QUERIES:
+            return None, Response({
+                'success': False,
+                'message': f'Invalid query type: {query}',
+                'error': 'invalid_query'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        query_config = self.VALID_QUERIES[query]
+        
+        # Check if category is required
+        if query_config['has_category'] and not category:
+            return None, Response({
+                'success': False,
+                'message': f'Category is required for query type: {query}',
+                'error': 'missing_category'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Validate category if provided
+        if category and query_config['has_category']:
+            valid_categories = query_config['category'].split(',')
+            if category not in valid_categories:
+                return None, Response({
+                    'success': False,
+                    'message': f'Invalid category for query type {query}. Valid categories: {query_config["category"]}',
+                    'error': 'invalid_category'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            page = int(page)
+            if page < 1:
+                page = 1
+        except ValueError:
+            return None, Response({
+                'success': False,
+                'message': 'Page parameter must be a valid number',
+                'error': 'invalid_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Construct endpoint URL
+        if query_config['has_category']:
+            endpoint = f'/{query}/{category}?page={page}'
+        else:
+            endpoint = f'/{query}?page={page}'
+        
+        return endpoint, None
+    
+    def _build_response(self, result, query):
+        """Build the API response from an upstream fetch result"""
+        if not result['success']:
+            logger.error(f"Failed to fetch anime list for {query}: {result['message']}")
             return Response({
                 'success': False,
-                'message': 'An unexpected error occurred',
-                'error': 'unexpected_error'
+                'message': result['message'],
+                'error': result.get('error', 'unknown_error')
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        # Extract data from HTML
+        extracted_data = extraction_cache.extract(result, search_extractor, 'extract_search_results')
+        
+        return Response({
+            'success': True,
+            'data': extracted_data
+        }, status=status.HTTP_200_OK)
+    
+    def _handle_unexpected_error(self, e, query):
+        """Report an unexpected error"""
+        logger.error(f"Unexpected error in anime list view for {query}: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'An unexpected error occurred',
+            'error': 'unexpected_error'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class GenresAPIView(APIView):
+class GenresAPIView(AnimeAPIView):
     """API endpoint for fetching all genres"""
     
     @extend_schema(
@@ -160,45 +193,63 @@ class GenresAPIView(APIView):
         """
         try:
             # Make request to homepage to extract genres
-            result = http_service.get('/home')
-            
-            if not result['success']:
-                logger.warning(f"External API failed, using fallback genres data: {result['message']}")
-                # Use fallback data when external API fails
-                fallback_data = fallback_service.get_genres_data()
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to external API unavailability'
-                }, status=status.HTTP_200_OK)
+            result = http_service.get('/home', stream_parser=document_cache.feed_parser)
+            return self._build_response(result)
             
-            # Extract genres from homepage data
-            from ..extractors.homepage_extractor import HomepageExtractor
-            temp_extractor = HomepageExtractor()
-            homepage_data = temp_extractor.extract(result['data'])
+        except Exception as e:
+            return self._handle_unexpected_error(e)
+    
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    async def aget(self, request):
+        """
+        Async variant of get(), used when ASYNC_VIEWS is enabled
+        """
+        try:
+            # Make request to homepage to extract genres
+            result = await http_service.aget('/home', stream_parser=document_cache.feed_parser)
+            return await self.abuild_response(result)
             
+        except Exception as e:
+            return self._handle_unexpected_error(e)
+    
+    def _build_response(self, result):
+        """Build the API response from an upstream fetch result"""
+        if not result['success']:
+            logger.warning(f"External API failed, using fallback genres data: {result['message']}")
+            # Use fallback data when external API fails
+            fallback_data = fallback_service.get_genres_data()
             return Response({
                 'success': True,
-                'data': homepage_data.get('genres', []),
-                'source': 'external'
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to external API unavailability'
             }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Unexpected error in genres view: {str(e)}")
-            # Use fallback data when there's an exception
-            try:
-                fallback_data = fallback_service.get_genres_data()
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to unexpected error'
-                }, status=status.HTTP_200_OK)
-            except Exception as fallback_error:
-                logger.error(f"Fallback data also failed: {str(fallback_error)}")
-                return Response({
-                    'success': False,
-                    'message': 'An unexpected error occurred',
-                    'error': 'unexpected_error'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        
+        # Extract genres from homepage data, sharing the homepage extraction
+        homepage_data = extraction_cache.extract(result, homepage_extractor)
+        
+        return Response({
+            'success': True,
+            'data': homepage_data.get('genres', []),
+            'source': 'external'
+        }, status=status.HTTP_200_OK)
+    
+    def _handle_unexpected_error(self, e):
+        """Serve fallback data after an unexpected error"""
+        logger.error(f"Unexpected error in genres view: {str(e)}")
+        # Use fallback data when there's an exception
+        try:
+            fallback_data = fallback_service.get_genres_data()
+            return Response({
+                'success': True,
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to unexpected error'
+            }, status=status.HTTP_200_OK)
+        except Exception as fallback_error:
+            logger.error(f"Fallback data also failed: {str(fallback_error)}")
+            return Response({
+                'success': False,
+                'message': 'An unexpected error occurred',
+                'error': 'unexpected_error'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
@@ -0,0 +1,91 @@
+from rest_framework.views import APIView
+from asgiref.sync import sync_to_async
+from django.utils.functional import classproperty
+import inspect
+
+from ..services import config
+from ..services.request_deadline import request_deadline
+
+class AnimeAPIView(APIView):
+    """
+    APIView that can serve requests natively async
+    
+    When ``ASYNC_VIEWS`` is enabled the view is exposed to Django as a
+    coroutine and requests are routed to ``a<method>`` handlers (e.g. ``aget``)
+    so upstream fetches run on the event loop instead of holding a worker.
+    Blocking work, such as rate limit checks and extraction, is handed to
+    worker threads. Otherwise the regular synchronous handlers are used.
+    
+    Each request is bounded by ``latency_budget`` seconds (REQUEST_LATENCY_BUDGET
+    by default). Upstream fetches give up when it runs out and the view serves
+    stale or fallback data instead.
+    """
+    
+    # Seconds the view may spend answering a request, None for the default
+    latency_budget = None
+    
+    @classproperty
+    def view_is_async(cls):
+        return config.async_views
+    
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.adispatch(request, *args, **kwargs)
+        
+        with request_deadline.scope(self.get_latency_budget()):
+            return super().dispatch(request, *args, **kwargs)
+    
+    def get_latency_budget(self):
+        """Get the latency budget of a request in seconds"""
+        if self.latency_budget is not None:
+            return self.latency_budget
+        return config.request_latency_budget
+    
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        Async version of APIView.dispatch
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        
+        with request_deadline.scope(self.get_latency_budget()):
+            try:
+                # Authentication and permission checks may touch the database
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+                
+                method = request.method.lower()
+                if method in self.http_method_names:
+                    handler = getattr(self, f'a{method}', None)
+                    if handler is None:
+                        handler = sync_to_async(getattr(self, method, self.http_method_not_allowed))
+                else:
+                    handler = self.http_method_not_allowed
+                
+                # Decorators such as ratelimit check the cache when the handler
+                # is called, before its coroutine starts, so call it off the loop
+                response = await sync_to_async(
+                    lambda: handler(request, *args, **kwargs),
+                    thread_sensitive=False
+                )()
+                if inspect.isawaitable(response):
+                    response = await response
+            
+            except Exception as exc:
+                response = self.handle_exception(exc)
+        
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+    
+    async def abuild_response(self, *args, **kwargs):
+        """
+        Run the view's _build_response() in a worker thread
+        
+        Building the response reads and writes the extraction cache and may
+        parse the page, all of which block, so it must not run on the event
+        loop. It skips the single thread-sensitive executor, so the pages of
+        concurrent requests aren't parsed one at a time.
+        """
+        return await sync_to_async(self._build_response, thread_sensitive=False)(*args, **kwargs)
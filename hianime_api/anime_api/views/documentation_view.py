@@ -80,6 +80,11 @@ class DocumentationAPIView(APIView):
                     "path": "/genres",
                     "method": "GET",
                     "description": "Get list of all available anime genres"
+                },
+                {
+                    "path": "/stats",
+                    "method": "GET",
+                    "description": "Get per-origin upstream traffic, health and scheduling statistics"
                 }
             ],
             "valid_queries": {
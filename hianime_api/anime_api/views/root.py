@@ -36,7 +36,8 @@ class RootAPIView(APIView):
                 "GET /api/v1/episodes/{id}/ - Anime episodes",
                 "GET /api/v1/servers/ - Episode servers",
                 "GET /api/v1/stream/ - Streaming links",
-                "GET /api/v1/genres/ - All genres"
+                "GET /api/v1/genres/ - All genres",
+                "GET /api/v1/stats/ - Upstream statistics"
             ],
             "notes": [
                 "This API is just an unofficial API for hianime.bz and is in no other way officially related to the same.",
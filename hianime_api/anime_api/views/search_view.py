@@ -1,4 +1,3 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django_ratelimit.decorators import ratelimit
@@ -9,11 +8,13 @@ import logging
 
 from ..services import http_service
 from ..services.fallback_service import fallback_service
-from ..extractors import search_extractor
+from ..services.extraction_cache import extraction_cache
+from ..extractors import document_cache, search_extractor
+from .base import AnimeAPIView
 
 logger = logging.getLogger(__name__)
 
-class SearchAPIView(APIView):
+class SearchAPIView(AnimeAPIView):
     """API endpoint for searching anime"""
     
     @extend_schema(
@@ -44,70 +45,105 @@ class SearchAPIView(APIView):
         Search for anime by keyword
         """
         try:
-            keyword = request.query_params.get('keyword', '').strip()
-            page = request.query_params.get('page', '1')
-            
-            if not keyword:
-                return Response({
-                    'success': False,
-                    'message': 'Keyword parameter is required',
-                    'error': 'missing_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            try:
-                page = int(page)
-                if page < 1:
-                    page = 1
-            except ValueError:
-                return Response({
-                    'success': False,
-                    'message': 'Page parameter must be a valid number',
-                    'error': 'invalid_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            params, error = self._parse_params(request)
+            if error:
+                return error
+            keyword, page = params
             
             # Make request to search page
-            result = http_service.get(f'/search?keyword={keyword}&page={page}')
+            result = http_service.get(f'/search?keyword={keyword}&page={page}', stream_parser=document_cache.feed_parser)
+            return self._build_response(result, keyword)
             
-            if not result['success']:
-                logger.warning(f"External API failed, using fallback search data for '{keyword}': {result['message']}")
-                # Use fallback data when external API fails
-                fallback_data = fallback_service.get_search_results(keyword)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to external API unavailability'
-                }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    async def aget(self, request):
+        """
+        Async variant of get(), used when ASYNC_VIEWS is enabled
+        """
+        try:
+            params, error = self._parse_params(request)
+            if error:
+                return error
+            keyword, page = params
             
-            # Extract data from HTML
-            extracted_data = search_extractor.extract_search_results(result['data'])
+            # Make request to search page
+            result = await http_service.aget(f'/search?keyword={keyword}&page={page}', stream_parser=document_cache.feed_parser)
+            return await self.abuild_response(result, keyword)
             
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    def _parse_params(self, request):
+        """Validate query parameters, returning ((keyword, page), error_response)"""
+        keyword = request.query_params.get('keyword', '').strip()
+        page = request.query_params.get('page', '1')
+        
+        if not keyword:
+            return None, Response({
+                'success': False,
+                'message': 'Keyword parameter is required',
+                'error': 'missing_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            page = int(page)
+            if page < 1:
+                page = 1
+        except ValueError:
+            return None, Response({
+                'success': False,
+                'message': 'Page parameter must be a valid number',
+                'error': 'invalid_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return (keyword, page), None
+    
+    def _build_response(self, result, keyword):
+        """Build the API response from an upstream fetch result"""
+        if not result['success']:
+            logger.warning(f"External API failed, using fallback search data for '{keyword}': {result['message']}")
+            # Use fallback data when external API fails
+            fallback_data = fallback_service.get_search_results(keyword)
             return Response({
                 'success': True,
-                'data': extracted_data,
-                'source': 'external'
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to external API unavailability'
             }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Unexpected error in search view: {str(e)}")
-            # Use fallback data when there's an exception
-            try:
-                fallback_data = fallback_service.get_search_results(keyword)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to unexpected error'
-                }, status=status.HTTP_200_OK)
-            except Exception as fallback_error:
-                logger.error(f"Fallback data also failed for '{keyword}': {str(fallback_error)}")
-                return Response({
-                    'success': False,
-                    'message': 'An unexpected error occurred',
-                    'error': 'unexpected_error'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        # Extract data from HTML
+        extracted_data = extraction_cache.extract(result, search_extractor, 'extract_search_results')
+        
+        return Response({
+            'success': True,
+            'data': extracted_data,
+            'source': 'external'
+        }, status=status.HTTP_200_OK)
+    
+    def _handle_unexpected_error(self, e, request):
+        """Serve fallback data after an unexpected error"""
+        logger.error(f"Unexpected error in search view: {str(e)}")
+        keyword = request.query_params.get('keyword', '').strip()
+        # Use fallback data when there's an exception
+        try:
+            fallback_data = fallback_service.get_search_results(keyword)
+            return Response({
+                'success': True,
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to unexpected error'
+            }, status=status.HTTP_200_OK)
+        except Exception as fallback_error:
+            logger.error(f"Fallback data also failed for '{keyword}': {str(fallback_error)}")
+            return Response({
+                'success': False,
+                'message': 'An unexpected error occurred',
+                'error': 'unexpected_error'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class SuggestionAPIView(APIView):
+class SuggestionAPIView(AnimeAPIView):
     """API endpoint for getting search suggestions"""
     
     @extend_schema(
@@ -130,53 +166,86 @@ class SuggestionAPIView(APIView):
         Get search suggestions for a keyword
         """
         try:
-            keyword = request.query_params.get('keyword', '').strip()
-            
-            if not keyword:
-                return Response({
-                    'success': False,
-                    'message': 'Keyword parameter is required',
-                    'error': 'missing_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            keyword, error = self._parse_params(request)
+            if error:
+                return error
             
             # Make request to get suggestions
-            result = http_service.get(f'/search/suggestion?keyword={keyword}')
+            result = http_service.get(f'/search/suggestion?keyword={keyword}', stream_parser=document_cache.feed_parser)
+            return self._build_response(result, keyword)
             
-            if not result['success']:
-                logger.warning(f"External API failed, using fallback suggestions data for '{keyword}': {result['message']}")
-                # Use fallback data when external API fails
-                fallback_data = fallback_service.get_suggestions_data(keyword)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to external API unavailability'
-                }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    async def aget(self, request):
+        """
+        Async variant of get(), used when ASYNC_VIEWS is enabled
+        """
+        try:
+            keyword, error = self._parse_params(request)
+            if error:
+                return error
             
-            # Extract data from HTML
-            extracted_data = search_extractor.extract_suggestions(result['data'])
+            # Make request to get suggestions
+            result = await http_service.aget(f'/search/suggestion?keyword={keyword}', stream_parser=document_cache.feed_parser)
+            return await self.abuild_response(result, keyword)
             
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    def _parse_params(self, request):
+        """Validate query parameters, returning (keyword, error_response)"""
+        keyword = request.query_params.get('keyword', '').strip()
+        
+        if not keyword:
+            return None, Response({
+                'success': False,
+                'message': 'Keyword parameter is required',
+                'error': 'missing_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return keyword, None
+    
+    def _build_response(self, result, keyword):
+        """Build the API response from an upstream fetch result"""
+        if not result['success']:
+            logger.warning(f"External API failed, using fallback suggestions data for '{keyword}': {result['message']}")
+            # Use fallback data when external API fails
+            fallback_data = fallback_service.get_suggestions_data(keyword)
             return Response({
                 'success': True,
-                'data': extracted_data,
-                'source': 'external'
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to external API unavailability'
             }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Unexpected error in suggestion view: {str(e)}")
-            # Use fallback data when there's an exception
-            try:
-                fallback_data = fallback_service.get_suggestions_data(keyword)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to unexpected error'
-                }, status=status.HTTP_200_OK)
-            except Exception as fallback_error:
-                logger.error(f"Fallback data also failed for '{keyword}': {str(fallback_error)}")
-                return Response({
-                    'success': False,
-                    'message': 'An unexpected error occurred',
-                    'error': 'unexpected_error'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        
+        # Extract data from HTML
+        extracted_data = extraction_cache.extract(result, search_extractor, 'extract_suggestions')
+        
+        return Response({
+            'success': True,
+            'data': extracted_data,
+            'source': 'external'
+        }, status=status.HTTP_200_OK)
+    
+    def _handle_unexpected_error(self, e, request):
+        """Serve fallback data after an unexpected error"""
+        logger.error(f"Unexpected error in suggestion view: {str(e)}")
+        keyword = request.query_params.get('keyword', '').strip()
+        # Use fallback data when there's an exception
+        try:
+            fallback_data = fallback_service.get_suggestions_data(keyword)
+            return Response({
+                'success': True,
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to unexpected error'
+            }, status=status.HTTP_200_OK)
+        except Exception as fallback_error:
+            logger.error(f"Fallback data also failed for '{keyword}': {str(fallback_error)}")
+            return Response({
+                'success': False,
+                'message': 'An unexpected error occurred',
+                'error': 'unexpected_error'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
@@ -0,0 +1,46 @@
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import BasePermission
+from django_ratelimit.decorators import ratelimit
+from django.utils.decorators import method_decorator
+from drf_spectacular.utils import extend_schema
+import hmac
+
+from ..services import config
+from ..services.origins import origins
+from ..services.cache_compressor import compression_stats
+from .base import AnimeAPIView
+
+class IsStaffOrStatsToken(BasePermission):
+    """Allow staff users, and clients sending STATS_TOKEN in the X-Stats-Token header"""
+    
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        
+        token = config.stats_token
+        sent = request.headers.get('X-Stats-Token', '')
+        return bool(token) and hmac.compare_digest(sent.encode(), token.encode())
+
+class StatsAPIView(AnimeAPIView):
+    """API endpoint for upstream and cache statistics, for operators only"""
+    
+    permission_classes = [IsStaffOrStatsToken]
+    
+    @extend_schema(
+        summary="Upstream Statistics",
+        description="Get per-origin traffic, health and scheduling statistics of this process (staff or X-Stats-Token only)",
+        responses={200: dict}
+    )
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    def get(self, request):
+        """
+        Get per-origin traffic, health and scheduling statistics of this process
+        """
+        return Response({
+            'success': True,
+            'data': {
+                'origins': origins.stats(),
+                'cache_compression': compression_stats.snapshot()
+            }
+        }, status=status.HTTP_200_OK)
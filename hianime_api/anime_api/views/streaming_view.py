@@ -1,4 +1,3 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django_ratelimit.decorators import ratelimit
@@ -9,11 +8,13 @@ import logging
 
 from ..services import http_service
 from ..services.fallback_service import fallback_service
-from ..extractors import servers_extractor, streaming_extractor
+from ..services.extraction_cache import extraction_cache
+from ..extractors import document_cache, servers_extractor, streaming_extractor
+from .base import AnimeAPIView
 
 logger = logging.getLogger(__name__)
 
-class ServersAPIView(APIView):
+class ServersAPIView(AnimeAPIView):
     """API endpoint for fetching episode servers"""
     
     @extend_schema(
@@ -36,58 +37,99 @@ class ServersAPIView(APIView):
         Get available servers for a specific episode
         """
         try:
-            episode_id = request.query_params.get('id', '').strip()
+            episode_id, error = self._parse_params(request)
+            if error:
+                return error
             
-            if not episode_id:
-                return Response({
-                    'success': False,
-                    'message': 'ID parameter is required',
-                    'error': 'missing_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            # Make request to episode page, reading only up to the server list
+            result = http_service.get(
+                f'/{episode_id}',
+                read_limit=servers_extractor.READ_LIMIT,
+                stream_parser=document_cache.feed_parser
+            )
+            return self._build_response(result, episode_id)
             
-            # Make request to episode page
-            result = http_service.get(f'/{episode_id}')
-            
-            if not result['success']:
-                logger.warning(f"External API failed, using fallback servers data for {episode_id}: {result['message']}")
-                # Use fallback data when external API fails
-                fallback_data = fallback_service.get_servers_data(episode_id)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to external API unavailability'
-                }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    async def aget(self, request):
+        """
+        Async variant of get(), used when ASYNC_VIEWS is enabled
+        """
+        try:
+            episode_id, error = self._parse_params(request)
+            if error:
+                return error
             
-            # Extract data from HTML
-            extracted_data = servers_extractor.extract(result['data'])
+            # Make request to episode page, reading only up to the server list
+            result = await http_service.aget(
+                f'/{episode_id}',
+                read_limit=servers_extractor.READ_LIMIT,
+                stream_parser=document_cache.feed_parser
+            )
+            return await self.abuild_response(result, episode_id)
             
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    def _parse_params(self, request):
+        """Validate query parameters, returning (episode_id, error_response)"""
+        episode_id = request.query_params.get('id', '').strip()
+        
+        if not episode_id:
+            return None, Response({
+                'success': False,
+                'message': 'ID parameter is required',
+                'error': 'missing_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return episode_id, None
+    
+    def _build_response(self, result, episode_id):
+        """Build the API response from an upstream fetch result"""
+        if not result['success']:
+            logger.warning(f"External API failed, using fallback servers data for {episode_id}: {result['message']}")
+            # Use fallback data when external API fails
+            fallback_data = fallback_service.get_servers_data(episode_id)
             return Response({
                 'success': True,
-                'data': extracted_data,
-                'source': 'external'
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to external API unavailability'
             }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Unexpected error in servers view: {str(e)}")
-            # Use fallback data when there's an exception
-            try:
-                fallback_data = fallback_service.get_servers_data(episode_id)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to unexpected error'
-                }, status=status.HTTP_200_OK)
-            except Exception as fallback_error:
-                logger.error(f"Fallback data also failed for {episode_id}: {str(fallback_error)}")
-                return Response({
-                    'success': False,
-                    'message': 'An unexpected error occurred',
-                    'error': 'unexpected_error'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        # Extract data from HTML
+        extracted_data = extraction_cache.extract(result, servers_extractor)
+        
+        return Response({
+            'success': True,
+            'data': extracted_data,
+            'source': 'external'
+        }, status=status.HTTP_200_OK)
+    
+    def _handle_unexpected_error(self, e, request):
+        """Serve fallback data after an unexpected error"""
+        logger.error(f"Unexpected error in servers view: {str(e)}")
+        episode_id = request.query_params.get('id', '').strip()
+        # Use fallback data when there's an exception
+        try:
+            fallback_data = fallback_service.get_servers_data(episode_id)
+            return Response({
+                'success': True,
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to unexpected error'
+            }, status=status.HTTP_200_OK)
+        except Exception as fallback_error:
+            logger.error(f"Fallback data also failed for {episode_id}: {str(fallback_error)}")
+            return Response({
+                'success': False,
+                'message': 'An unexpected error occurred',
+                'error': 'unexpected_error'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class StreamingAPIView(APIView):
+class StreamingAPIView(AnimeAPIView):
     """API endpoint for fetching streaming links"""
     
     @extend_schema(
@@ -124,69 +166,114 @@ class StreamingAPIView(APIView):
         Get streaming links for a specific episode from a specific server
         """
         try:
-            episode_id = request.query_params.get('id', '').strip()
-            server = request.query_params.get('server', '').strip()
-            stream_type = request.query_params.get('type', '').strip().lower()
-            
-            if not episode_id:
-                return Response({
-                    'success': False,
-                    'message': 'ID parameter is required',
-                    'error': 'missing_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            params, error = self._parse_params(request)
+            if error:
+                return error
+            episode_id, server, stream_type = params
             
-            if not server:
-                return Response({
-                    'success': False,
-                    'message': 'Server parameter is required',
-                    'error': 'missing_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            # Make request to streaming page, reading only up to the sources
+            result = http_service.get(
+                f'/{episode_id}',
+                read_limit=streaming_extractor.READ_LIMIT,
+                stream_parser=document_cache.feed_parser
+            )
+            return self._build_response(result, episode_id, server, stream_type)
             
-            if stream_type not in ['sub', 'dub']:
-                return Response({
-                    'success': False,
-                    'message': 'Type parameter must be either "sub" or "dub"',
-                    'error': 'invalid_parameter'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Make request to streaming page
-            result = http_service.get(f'/{episode_id}')
-            
-            if not result['success']:
-                logger.warning(f"External API failed, using fallback streaming data for {episode_id}: {result['message']}")
-                # Use fallback data when external API fails
-                fallback_data = fallback_service.get_streaming_data(episode_id, server, stream_type)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to external API unavailability'
-                }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    @method_decorator(ratelimit(key='ip', rate='100/h'))
+    async def aget(self, request):
+        """
+        Async variant of get(), used when ASYNC_VIEWS is enabled
+        """
+        try:
+            params, error = self._parse_params(request)
+            if error:
+                return error
+            episode_id, server, stream_type = params
             
-            # Extract data from HTML
-            extracted_data = streaming_extractor.extract(result['data'], server)
+            # Make request to streaming page, reading only up to the sources
+            result = await http_service.aget(
+                f'/{episode_id}',
+                read_limit=streaming_extractor.READ_LIMIT,
+                stream_parser=document_cache.feed_parser
+            )
+            return await self.abuild_response(result, episode_id, server, stream_type)
             
+        except Exception as e:
+            return self._handle_unexpected_error(e, request)
+    
+    def _parse_params(self, request):
+        """Validate query parameters, returning ((episode_id, server, stream_type), error_response)"""
+        episode_id = request.query_params.get('id', '').strip()
+        server = request.query_params.get('server', '').strip()
+        stream_type = request.query_params.get('type', '').strip().lower()
+        
+        if not episode_id:
+            return None, Response({
+                'success': False,
+                'message': 'ID parameter is required',
+                'error': 'missing_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not server:
+            return None, Response({
+                'success': False,
+                'message': 'Server parameter is required',
+                'error': 'missing_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if stream_type not in ['sub', 'dub']:
+            return None, Response({
+                'success': False,
+                'message': 'Type parameter must be either "sub" or "dub"',
+                'error': 'invalid_parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return (episode_id, server, stream_type), None
+    
+    def _build_response(self, result, episode_id, server, stream_type):
+        """Build the API response from an upstream fetch result"""
+        if not result['success']:
+            logger.warning(f"External API failed, using fallback streaming data for {episode_id}: {result['message']}")
+            # Use fallback data when external API fails
+            fallback_data = fallback_service.get_streaming_data(episode_id, server, stream_type)
             return Response({
                 'success': True,
-                'data': extracted_data,
-                'source': 'external'
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to external API unavailability'
             }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Unexpected error in streaming view: {str(e)}")
-            # Use fallback data when there's an exception
-            try:
-                fallback_data = fallback_service.get_streaming_data(episode_id, server, stream_type)
-                return Response({
-                    'success': True,
-                    'data': fallback_data,
-                    'source': 'fallback',
-                    'message': 'Using fallback data due to unexpected error'
-                }, status=status.HTTP_200_OK)
-            except Exception as fallback_error:
-                logger.error(f"Fallback data also failed for {episode_id}: {str(fallback_error)}")
-                return Response({
-                    'success': False,
-                    'message': 'An unexpected error occurred',
-                    'error': 'unexpected_error'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        
+        # Extract data from HTML
+        extracted_data = extraction_cache.extract(result, streaming_extractor, args=(server,))
+        
+        return Response({
+            'success': True,
+            'data': extracted_data,
+            'source': 'external'
+        }, status=status.HTTP_200_OK)
+    
+    def _handle_unexpected_error(self, e, request):
+        """Serve fallback data after an unexpected error"""
+        logger.error(f"Unexpected error in streaming view: {str(e)}")
+        episode_id = request.query_params.get('id', '').strip()
+        server = request.query_params.get('server', '').strip()
+        stream_type = request.query_params.get('type', '').strip().lower()
+        # Use fallback data when there's an exception
+        try:
+            fallback_data = fallback_service.get_streaming_data(episode_id, server, stream_type)
+            return Response({
+                'success': True,
+                'data': fallback_data,
+                'source': 'fallback',
+                'message': 'Using fallback data due to unexpected error'
+            }, status=status.HTTP_200_OK)
+        except Exception as fallback_error:
+            logger.error(f"Fallback data also failed for {episode_id}: {str(fallback_error)}")
+            return Response({
+                'success': False,
+                'message': 'An unexpected error occurred',
+                'error': 'unexpected_error'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+import logging
+import time
+
+from .extractors import (
+    anime_details_extractor,
+    episodes_extractor,
+    homepage_extractor,
+    search_extractor,
+    servers_extractor,
+    streaming_extractor
+)
+from .services import config, http_service
+from .services.dns_cache import dns_cache
+from .services.extraction_cache import extraction_cache
+from .services.origins import origins
+from .services.request_deadline import request_deadline
+from .services.session_pool import session_pool
+from .services.upstream_scheduler import upstream_scheduler
+from .views.anime_list_view import AnimeListAPIView
+
+logger = logging.getLogger(__name__)
+
+# Extractor methods run once on an empty page to compile their CSS selectors
+EXTRACTOR_METHODS = [
+    (anime_details_extractor, 'extract'),
+    (episodes_extractor, 'extract'),
+    (homepage_extractor, 'extract'),
+    (search_extractor, 'extract_search_results'),
+    (search_extractor, 'extract_suggestions'),
+    (servers_extractor, 'extract'),
+    (streaming_extractor, 'extract'),
+]
+
+# Minimal page the extractors are warmed up on
+EMPTY_PAGE = '<html><head></head><body></body></html>'
+
+# Extractions the views run on each kind of page
+HOME_EXTRACTIONS = [(homepage_extractor, 'extract')]
+LIST_EXTRACTIONS = [(search_extractor, 'extract_search_results')]
+SUGGESTION_EXTRACTIONS = [(search_extractor, 'extract_suggestions')]
+DETAILS_EXTRACTIONS = [(anime_details_extractor, 'extract'), (episodes_extractor, 'extract')]
+
+class WarmUp:
+    """
+    Gets a worker ready before it serves its first request
+    
+    The first requests after a deploy would otherwise pay for DNS lookups,
+    TCP and TLS handshakes to every origin, compiling the extractors' CSS
+    selectors and fetching the most requested pages. Run by the gunicorn
+    post_worker_init hook (see gunicorn.conf.py), which runs in each worker
+    after it is forked, so connections are never shared with the master even
+    with --preload.
+    
+    Async clients belong to an event loop that doesn't exist yet at boot, so
+    only the sync connection pools are pre-connected; the DNS cache and
+    primed pages help both.
+    
+    Warm-up is bounded by WARMUP_BUDGET like a request by its latency budget,
+    since gunicorn kills (and respawns) a worker that takes longer than its
+    --timeout to boot.
+    """
+    
+    def __init__(self):
+        self.config = config
+    
+    def run(self):
+        """Run every warm-up step, logging failures instead of raising them"""
+        started = time.monotonic()
+        with request_deadline.scope(self.config.warmup_budget):
+            for step in (self.resolve_hosts, self.preconnect, self.compile_extractors, self.prime_pages):
+                try:
+                    step()
+                except Exception as e:
+                    logger.error(f"Warm-up step {step.__name__} failed: {str(e)}")
+        logger.info(f"Worker warmed up in {time.monotonic() - started:.2f}s")
+    
+    def resolve_hosts(self):
+        """Cache the addresses of every origin's host"""
+        for origin in origins.all():
+            dns_cache.resolve(origin.base_url)
+    
+    def preconnect(self):
+        """Open WARMUP_CONNECTIONS pooled connections to every origin"""
+        count = self.config.warmup_connections
+        if count <= 0:
+            return
+        
+        session = session_pool.get()
+        timeout = request_deadline.clamp(self.config.connect_timeout)
+        if timeout <= 0:
+            return
+        # Concurrent requests each leave a connection behind in the pool
+        tasks = [origin for origin in origins.all() for _ in range(min(count, origin.pool_maxsize))]
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='warm-up') as executor:
+            list(executor.map(lambda origin: self._connect(session, origin, timeout), tasks))
+    
+    def _connect(self, session, origin, timeout):
+        try:
+            with upstream_scheduler.background(), upstream_scheduler.slot(origin):
+                session.head(origin.base_url, timeout=timeout, allow_redirects=False)
+        except Exception as e:
+            logger.warning(f"Failed to pre-connect to {origin.base_url}: {str(e)}")
+    
+    def compile_extractors(self):
+        """Run every extractor once so its selectors are compiled and cached"""
+        for extractor, method in EXTRACTOR_METHODS:
+            getattr(extractor, method)(EMPTY_PAGE)
+    
+    def prime_pages(self):
+        """Fetch the WARMUP_PRIME_ENDPOINTS pages into the cache and run the views' extractions on them"""
+        pages = []
+        for endpoint in self.config.warmup_prime_endpoints:
+            page = self._page(endpoint)
+            if page is None:
+                logger.warning(f"No view serves {endpoint}, not priming it")
+            else:
+                pages.append(page)
+        if not pages:
+            return
+        
+        with upstream_scheduler.background():
+            results = http_service.get_many([endpoint for endpoint, _ in pages])
+        
+        for (endpoint, extractions), result in zip(pages, results):
+            if not result['success']:
+                logger.warning(f"Failed to prime {endpoint}: {result['message']}")
+                continue
+            for extractor, method in extractions:
+                extraction_cache.extract(result, extractor, method)
+            logger.info(f"Primed cache for: {endpoint}")
+    
+    def _page(self, endpoint):
+        """
+        Match an endpoint to the view that fetches it
+        
+        Args:
+            endpoint (str): Upstream endpoint, e.g. /home or /most-popular
+        
+        Returns:
+            tuple: (endpoint as the view requests it, extractions the view
+                runs on the page), or None if no view fetches the endpoint
+        """
+        parts = urlsplit(endpoint)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        params = parse_qs(parts.query)
+        page = params.get('page', ['1'])[0]
+        keyword = params.get('keyword', [''])[0]
+        
+        # Homepage and genres
+        if segments == ['home'] and not parts.query:
+            return '/home', HOME_EXTRACTIONS
+        
+        if segments[:1] == ['search']:
+            if segments == ['search', 'suggestion'] and keyword:
+                return f'/search/suggestion?keyword={keyword}', SUGGESTION_EXTRACTIONS
+            if segments == ['search'] and keyword:
+                return f'/search?keyword={keyword}&page={page}', LIST_EXTRACTIONS
+            return None
+        
+        # Anime lists, with a category for the query types that take one
+        if segments and segments[0] in AnimeListAPIView.VALID_QUERIES:
+            query_config = AnimeListAPIView.VALID_QUERIES[segments[0]]
+            if query_config['has_category']:
+                if len(segments) != 2 or segments[1] not in query_config['category'].split(','):
+                    return None
+            elif len(segments) != 1:
+                return None
+            return f"/{'/'.join(segments)}?page={page}", LIST_EXTRACTIONS
+        
+        # Anime details and episodes
+        if len(segments) == 1 and not parts.query:
+            return f'/{segments[0]}', DETAILS_EXTRACTIONS
+        return None
+
+# Global warm-up instance
+warm_up = WarmUp()
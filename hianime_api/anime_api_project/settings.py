@@ -177,6 +177,7 @@ if os.getenv('REDIS_URL'):
             'LOCATION': os.getenv('REDIS_URL'),
             'OPTIONS': {
                 'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'COMPRESSOR': 'anime_api.services.cache_compressor.CacheCompressor',
             },
             'KEY_PREFIX': 'anime_api_'
         }
@@ -187,15 +188,117 @@ RATELIMIT_ENABLE = os.getenv('RATELIMIT_ENABLE', 'True').lower() == 'true'
 RATELIMIT_RATE = os.getenv('RATELIMIT_RATE', '100/h')
 RATELIMIT_USE_CACHE = 'default'
 
+# Token clients send in the X-Stats-Token header to read /stats/ (staff users need none); empty allows staff only
+STATS_TOKEN = os.getenv('STATS_TOKEN', '')
+
 # Anime API configuration
 ANIME_API_BASE_URL = os.getenv('ANIME_API_BASE_URL', 'https://hianime.bz')
 ANIME_API_BASE_URL_V2 = os.getenv('ANIME_API_BASE_URL_V2', 'https://kaido.to')
 ANIME_API_PROVIDERS = os.getenv('ANIME_API_PROVIDERS', 'https://megacloud.club')
 
+# Per-origin overrides of the upstream settings below, keyed by origin name
+# ('primary', 'mirror' or 'provider'), e.g. {'provider': {'timeout': 10, 'cache_timeout': 300}}.
+# Supported keys: timeout, cache_timeout, ttl_policy, max_connections,
+# max_keepalive_connections, pool_maxsize, pool_block, rate_limit, burst,
+# max_in_flight, retry_budget_ratio and retry_budget_max.
+UPSTREAM_ORIGIN_OPTIONS = {}
+
 # Request headers
 REQUEST_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0',
 }
 
+# Upstream timeouts: every API request gets REQUEST_LATENCY_BUDGET seconds in total,
+# which bounds the timeouts, retries and backoff of its upstream fetches
+REQUEST_CONNECT_TIMEOUT = float(os.getenv('REQUEST_CONNECT_TIMEOUT', 5))  # seconds
+REQUEST_LATENCY_BUDGET = float(os.getenv('REQUEST_LATENCY_BUDGET', 15))  # seconds
+
 # Cache timeout settings
 CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', 3600))  # 1 hour default
+
+# Per-endpoint cache lifetimes are set by CACHE_TTL_POLICY (see DEFAULT_CACHE_TTL_POLICY in
+# anime_api/services/config.py); each lifetime is randomly varied by +/- CACHE_TTL_JITTER
+CACHE_TTL_JITTER = float(os.getenv('CACHE_TTL_JITTER', 0.1))  # fraction of the TTL
+
+# Stale-while-revalidate: after CACHE_TIMEOUT an entry is served stale for up to
+# CACHE_STALE_TIMEOUT more seconds while it is refreshed in the background (0 disables)
+CACHE_STALE_TIMEOUT = int(os.getenv('CACHE_STALE_TIMEOUT', 86400))  # 1 day default
+CACHE_REFRESH_WORKERS = int(os.getenv('CACHE_REFRESH_WORKERS', 4))
+
+# BeautifulSoup parser the extractors build documents with: 'lxml' or 'html.parser'
+# (used when lxml isn't installed). Compare them with `manage.py compare_parsers`
+HTML_PARSER = os.getenv('HTML_PARSER', 'lxml')
+
+# Per-process LRU of parsed pages shared between extractors (0 disables)
+DOCUMENT_CACHE_SIZE = int(os.getenv('DOCUMENT_CACHE_SIZE', 8))
+DOCUMENT_CACHE_TTL = int(os.getenv('DOCUMENT_CACHE_TTL', 30))  # seconds
+# Parse pages while they download instead of after (needs the document cache)
+STREAM_PARSE = os.getenv('STREAM_PARSE', 'False').lower() == 'true'
+
+# Negative caching of failed upstream fetches (0 disables)
+NEGATIVE_CACHE_NOT_FOUND_TIMEOUT = int(os.getenv('NEGATIVE_CACHE_NOT_FOUND_TIMEOUT', 600))  # 404s, seconds
+NEGATIVE_CACHE_ERROR_TIMEOUT = int(os.getenv('NEGATIVE_CACHE_ERROR_TIMEOUT', 15))  # 5xx and timeouts, seconds
+
+# Compression of values stored in Redis: zstd when the zstandard package is installed
+# (optionally with a dictionary from `manage.py train_cache_dictionary`), zlib otherwise
+CACHE_COMPRESS_MIN_LENGTH = int(os.getenv('CACHE_COMPRESS_MIN_LENGTH', 1024))  # bytes
+CACHE_ZSTD_DICTIONARY = os.getenv('CACHE_ZSTD_DICTIONARY', '')  # path to a trained dictionary
+
+# Per-origin circuit breaker: fail fast after N consecutive upstream failures
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5))
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT = int(os.getenv('CIRCUIT_BREAKER_RECOVERY_TIMEOUT', 30))  # seconds before a trial request
+
+# Upstream scheduler: per-origin token bucket and concurrency cap; user requests are
+# queued ahead of background refreshes (rate 0 disables the bucket). The rate and burst
+# are totals for the whole deployment: the scheduler runs in every process, so each one
+# enforces a 1/UPSTREAM_PROCESSES share of them. The in-flight cap is per process
+UPSTREAM_RATE_LIMIT = float(os.getenv('UPSTREAM_RATE_LIMIT', 10))  # requests per second
+UPSTREAM_BURST = int(os.getenv('UPSTREAM_BURST', 20))
+UPSTREAM_MAX_IN_FLIGHT = int(os.getenv('UPSTREAM_MAX_IN_FLIGHT', 16))
+# Processes sharing the rate limit, i.e. workers times hosts; defaults to gunicorn's WEB_CONCURRENCY
+UPSTREAM_PROCESSES = int(os.getenv('UPSTREAM_PROCESSES', os.getenv('WEB_CONCURRENCY', 1)))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv('UPSTREAM_QUEUE_TIMEOUT', 10))  # seconds
+
+# Retries: each origin may retry at most RETRY_BUDGET_RATIO times its successful requests
+# (plus a reserve of RETRY_BUDGET_MAX), backing off with decorrelated jitter between
+# RETRY_BACKOFF_BASE and RETRY_BACKOFF_CAP seconds (RETRY_BACKOFF_SYNC_CAP for sync fetches,
+# which hold a worker thread while they wait). Retry-After on 429/503 is honoured up to
+# RETRY_AFTER_MAX seconds (or the sync cap); longer waits fail the request instead. Retries
+# that would not finish before the request's deadline are not made
+RETRY_BUDGET_RATIO = float(os.getenv('RETRY_BUDGET_RATIO', 0.1))
+RETRY_BUDGET_MAX = int(os.getenv('RETRY_BUDGET_MAX', 10))
+RETRY_BACKOFF_BASE = float(os.getenv('RETRY_BACKOFF_BASE', 0.5))  # seconds
+RETRY_BACKOFF_CAP = float(os.getenv('RETRY_BACKOFF_CAP', 10))  # seconds
+RETRY_BACKOFF_SYNC_CAP = float(os.getenv('RETRY_BACKOFF_SYNC_CAP', 2))  # seconds
+RETRY_AFTER_MAX = float(os.getenv('RETRY_AFTER_MAX', 10))  # seconds
+
+# Multi-origin fetching: race ANIME_API_BASE_URL and ANIME_API_BASE_URL_V2, hedging to the
+# mirror when the first origin has not answered within HEDGE_DELAY (0 uses its observed p95)
+MULTI_ORIGIN_FETCH = os.getenv('MULTI_ORIGIN_FETCH', 'False').lower() == 'true'
+HEDGE_DELAY = float(os.getenv('HEDGE_DELAY', 0))  # seconds
+
+# Single-flight coalescing of concurrent cache misses (Redis lock across workers)
+SINGLE_FLIGHT_DISTRIBUTED = bool(os.getenv('REDIS_URL'))
+SINGLE_FLIGHT_LOCK_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_LOCK_TIMEOUT', 30))  # seconds
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', 30))  # seconds
+
+# Sync upstream connection pools, shared by all threads of a worker
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 32))  # kept-alive connections per origin
+HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', 'False').lower() == 'true'  # wait for a free connection
+
+# Worker warm-up before the first request (gunicorn post_worker_init, see gunicorn.conf.py)
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+WARMUP_CONNECTIONS = int(os.getenv('WARMUP_CONNECTIONS', 2))  # pooled connections opened per origin
+# Pages fetched and extracted into the cache at boot: /home, anime lists such as
+# /most-popular, /search?keyword=..., /search/suggestion?keyword=... and anime
+# pages such as /one-piece-100. Anything else is skipped with a warning
+WARMUP_PRIME_ENDPOINTS = [e for e in os.getenv('WARMUP_PRIME_ENDPOINTS', '').split(',') if e]
+# Seconds warm-up may take; keep it well under gunicorn's worker --timeout (30s by default)
+WARMUP_BUDGET = float(os.getenv('WARMUP_BUDGET', 10))
+DNS_CACHE_TTL = int(os.getenv('DNS_CACHE_TTL', 300))  # seconds upstream host lookups are cached (0 disables)
+
+# Async upstream client settings (serve views natively async; ASGI only, refused by wsgi.py)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+ASYNC_POOL_MAX_CONNECTIONS = int(os.getenv('ASYNC_POOL_MAX_CONNECTIONS', 100))  # per origin
+ASYNC_POOL_MAX_KEEPALIVE = int(os.getenv('ASYNC_POOL_MAX_KEEPALIVE', 20))  # per origin
+ASYNC_POOL_KEEPALIVE_EXPIRY = float(os.getenv('ASYNC_POOL_KEEPALIVE_EXPIRY', 30))  # seconds
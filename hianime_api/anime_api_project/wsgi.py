@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'anime_api_project.settings')
 
 application = get_wsgi_application()
+
+# Under WSGI every async view runs on a new event loop, each opening (and
+# leaking) its own upstream connection pools
+if settings.ASYNC_VIEWS:
+    raise ImproperlyConfigured(
+        'ASYNC_VIEWS requires serving the project through ASGI (anime_api_project.asgi:application)'
+    )
@@ -0,0 +1,24 @@
+# Gunicorn reads this file from the working directory; command line options
+# still take precedence. See https://docs.gunicorn.org/en/stable/settings.html
+import os
+
+from dotenv import load_dotenv
+
+# Same .env the Django settings read
+load_dotenv()
+
+# ASYNC_VIEWS needs the ASGI application, served by uvicorn's worker; pass
+# no application on the command line so this choice applies
+if os.getenv('ASYNC_VIEWS', 'False').lower() == 'true':
+    wsgi_app = 'anime_api_project.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'anime_api_project.wsgi:application'
+
+def post_worker_init(worker):
+    """Warm each worker up after it is forked and before it accepts requests"""
+    from anime_api.services import config
+    from anime_api.warmup import warm_up
+    
+    if config.warmup_enabled:
+        warm_up.run()